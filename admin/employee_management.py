@@ -2,15 +2,28 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QTableWidget, QTableWidgetItem,
                              QDialog, QDialogButtonBox, QLineEdit, QComboBox,
                              QMessageBox, QHeaderView, QFormLayout, QCheckBox,
-                             QTabWidget)
-from PyQt5.QtCore import Qt
+                             QTabWidget, QFileDialog, QProgressDialog)
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
+import threading
+
+from admin.employee_import import (ImportResult, LookupMap, count_rows, stage_batches, store_batch,
+                                   COLUMNS)
 
 class EmployeeManagement(QWidget):
+    # emitted from the import worker thread, delivered on the GUI thread
+    import_counted = pyqtSignal(int)
+    import_staged = pyqtSignal(int, object)
+    import_done = pyqtSignal(object)
+    
     def __init__(self, db_manager, user_data):
         super().__init__()
         self.db_manager = db_manager
         self.user_data = user_data
+        self.import_state = None
+        self.import_counted.connect(self.import_total)
+        self.import_staged.connect(self.store_import_batch)
+        self.import_done.connect(self.finish_import)
         self.init_ui()
     
     def init_ui(self):
@@ -47,6 +60,23 @@ class EmployeeManagement(QWidget):
         add_emp_btn.clicked.connect(self.add_employee)
         emp_btn_layout.addWidget(add_emp_btn)
         
+        import_emp_btn = QPushButton('Import from File')
+        import_emp_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #16a085;
+                color: white;
+                padding: 10px;
+                border-radius: 5px;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #138d75;
+            }
+        """)
+        import_emp_btn.setToolTip('CSV/XLSX columns: ' + ', '.join(COLUMNS))
+        import_emp_btn.clicked.connect(self.import_employees)
+        emp_btn_layout.addWidget(import_emp_btn)
+        
         refresh_emp_btn = QPushButton('Refresh')
         refresh_emp_btn.setStyleSheet("""
             QPushButton {
@@ -146,35 +176,33 @@ class EmployeeManagement(QWidget):
         self.employee_table.setRowCount(len(employees))
         
         for row, emp in enumerate(employees):
-            # emp: (employee_id, first_name, last_name, dept_name, job_title, emp_type, skill_name)
-            self.employee_table.setItem(row, 0, QTableWidgetItem(str(emp[0])))
-            self.employee_table.setItem(row, 1, QTableWidgetItem(emp[1]))
-            self.employee_table.setItem(row, 2, QTableWidgetItem(emp[2]))
-            self.employee_table.setItem(row, 3, QTableWidgetItem(emp[3] or 'N/A'))
-            self.employee_table.setItem(row, 4, QTableWidgetItem(emp[4] or 'N/A'))
-            self.employee_table.setItem(row, 5, QTableWidgetItem(emp[5] or 'N/A'))
-            self.employee_table.setItem(row, 6, QTableWidgetItem(emp[6] or 'N/A'))
+            self.employee_table.setItem(row, 0, QTableWidgetItem(str(emp.employee_id)))
+            self.employee_table.setItem(row, 1, QTableWidgetItem(emp.first_name))
+            self.employee_table.setItem(row, 2, QTableWidgetItem(emp.last_name))
+            self.employee_table.setItem(row, 3, QTableWidgetItem(emp.department_name or 'N/A'))
+            self.employee_table.setItem(row, 4, QTableWidgetItem(emp.title_name or 'N/A'))
+            self.employee_table.setItem(row, 5, QTableWidgetItem(emp.type_name or 'N/A'))
+            self.employee_table.setItem(row, 6, QTableWidgetItem(emp.skill_name or 'N/A'))
     
     def load_user_accounts(self):
         accounts = self.db_manager.get_all_user_accounts()
         self.accounts_table.setRowCount(len(accounts))
         
         for row, acc in enumerate(accounts):
-            # acc: (user_id, employee_id, first_name, last_name, username, is_admin)
-            self.accounts_table.setItem(row, 0, QTableWidgetItem(str(acc[0])))
-            self.accounts_table.setItem(row, 1, QTableWidgetItem(f"{acc[2]} {acc[3]}"))
-            self.accounts_table.setItem(row, 2, QTableWidgetItem(acc[4]))
+            self.accounts_table.setItem(row, 0, QTableWidgetItem(str(acc.user_id)))
+            self.accounts_table.setItem(row, 1, QTableWidgetItem(f"{acc.first_name} {acc.last_name}"))
+            self.accounts_table.setItem(row, 2, QTableWidgetItem(acc.username))
             
-            admin_status = 'Yes' if acc[5] else 'No'
+            admin_status = 'Yes' if acc.is_admin else 'No'
             admin_item = QTableWidgetItem(admin_status)
-            if acc[5]:
+            if acc.is_admin:
                 admin_item.setBackground(Qt.yellow)
             self.accounts_table.setItem(row, 3, admin_item)
             
             # Delete button
             delete_btn = QPushButton('Delete')
             delete_btn.setStyleSheet('background-color: #e74c3c; color: white; padding: 5px;')
-            delete_btn.clicked.connect(lambda checked, uid=acc[0]: self.delete_user_account(uid))
+            delete_btn.clicked.connect(lambda checked, uid=acc.user_id: self.delete_user_account(uid))
             self.accounts_table.setCellWidget(row, 4, delete_btn)
     
     def add_employee(self):
@@ -185,6 +213,83 @@ class EmployeeManagement(QWidget):
             QMessageBox.information(self, 'Success', 
                                   'Employee added successfully! The employee is now available in the scheduler.')
     
+    def import_employees(self):
+        if self.import_state is not None:  # an import is already running
+            return
+        path, _ = QFileDialog.getOpenFileName(self, 'Import Employees', '',
+                                              'Employee files (*.csv *.xlsx)')
+        if not path:
+            return
+        
+        # reading, validating and hashing run on a worker thread; each staged batch
+        # comes back here to be stored, so the connection stays on the GUI thread
+        progress = QProgressDialog('Reading file...', 'Cancel', 0, 0, self)
+        progress.setWindowTitle('Import Employees')
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        cancelled = threading.Event()
+        progress.canceled.connect(cancelled.set)
+        result = ImportResult()
+        self.import_state = {'progress': progress, 'cancelled': cancelled, 'result': result, 'failed': False}
+        
+        lookups = LookupMap(self.db_manager)
+        hasher = self.db_manager.password_hasher
+        
+        def work():
+            try:
+                self.import_counted.emit(count_rows(path))
+                for read, staged in stage_batches(path, lookups, hasher, result):
+                    if cancelled.is_set():
+                        break
+                    self.import_staged.emit(read, staged)
+                self.import_done.emit(None)
+            except Exception as e:
+                self.import_done.emit(e)
+        
+        threading.Thread(target=work, name='employee-import', daemon=True).start()
+    
+    def import_total(self, total):
+        if self.import_state is not None:
+            self.import_state['progress'].setMaximum(total)
+    
+    def store_import_batch(self, read, staged):
+        state = self.import_state
+        if state is None or state['failed'] or state['cancelled'].is_set():
+            return
+        if not store_batch(self.db_manager, staged, state['result']):
+            state['failed'] = True
+            state['cancelled'].set()
+        state['progress'].setLabelText(f"Imported {state['result'].imported} employee(s)...")
+        state['progress'].setValue(read)
+    
+    def finish_import(self, error):
+        state, self.import_state = self.import_state, None
+        # closing the dialog emits canceled, so read the flag first
+        cancelled = state['cancelled'].is_set()
+        state['progress'].close()
+        result = state['result']
+        if error is not None:
+            QMessageBox.warning(self, 'Error', f'Import failed: {error}')
+            if not result.imported:
+                return
+        
+        self.load_employees()
+        self.load_user_accounts()
+        
+        result.errors.sort()
+        message = result.summary()
+        if cancelled and not state['failed']:
+            message += ' The import was cancelled; rows after the last stored batch were not imported.'
+        if result.errors:
+            # the first rows are enough to fix the file; the rest are counted in the summary
+            lines = [f"Row {row_no}: {error}" for row_no, error in result.errors[:20]]
+            if len(result.errors) > 20:
+                lines.append(f"... and {len(result.errors) - 20} more")
+            message += '\n\n' + '\n'.join(lines)
+            QMessageBox.warning(self, 'Import Finished', message)
+        else:
+            QMessageBox.information(self, 'Import Finished', message)
+    
     def create_user_account(self):
         dialog = CreateUserAccountDialog(self.db_manager)
         if dialog.exec_() == QDialog.Accepted:
@@ -206,7 +311,7 @@ class AddEmployeeDialog(QDialog):
         super().__init__()
         self.db_manager = db_manager
         self.setWindowTitle('Add New Employee')
-        self.setFixedSize(400, 350)
+        self.setFixedSize(400, 470)
         self.init_ui()
     
     def init_ui(self):
@@ -226,30 +331,51 @@ class AddEmployeeDialog(QDialog):
         self.department = QComboBox()
         departments = self.db_manager.get_departments()
         for dept in departments:
-            self.department.addItem(dept[1], dept[0])
+            self.department.addItem(dept.department_name, dept.department_id)
         layout.addRow('Department:', self.department)
         
         # job title
         self.job_title = QComboBox()
         jobs = self.db_manager.get_job_titles()
         for job in jobs:
-            self.job_title.addItem(job[1], job[0])
+            self.job_title.addItem(job.title_name, job.job_id)
         layout.addRow('Job Title:', self.job_title)
         
         # employment type
         self.emp_type = QComboBox()
         types = self.db_manager.get_employment_types()
         for emp_type in types:
-            self.emp_type.addItem(emp_type[1], emp_type[0])
+            self.emp_type.addItem(emp_type.type_name, emp_type.type_id)
         layout.addRow('Employment Type:', self.emp_type)
         
         #primary skill
         self.skill = QComboBox()
         skills = self.db_manager.get_skills()
         for skill in skills:
-            self.skill.addItem(skill[1], skill[0])
+            self.skill.addItem(skill.skill_name, skill.skill_id)
         layout.addRow('Primary Skill:', self.skill)
         
+        # optional login, created in the same transaction as the employee
+        self.create_login = QCheckBox('Create a user account now')
+        self.create_login.setStyleSheet('padding: 5px;')
+        layout.addRow(self.create_login)
+        
+        self.username = QLineEdit()
+        self.username.setPlaceholderText('Enter username')
+        layout.addRow('Username:', self.username)
+        
+        self.password = QLineEdit()
+        self.password.setPlaceholderText('Enter password')
+        self.password.setEchoMode(QLineEdit.Password)
+        layout.addRow('Password:', self.password)
+        
+        self.is_admin = QCheckBox('Administrator Access')
+        layout.addRow('Access Level:', self.is_admin)
+        
+        for field in (self.username, self.password, self.is_admin):
+            field.setEnabled(False)
+            self.create_login.toggled.connect(field.setEnabled)
+        
         #buttons
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(self.save_employee)
@@ -271,12 +397,39 @@ class AddEmployeeDialog(QDialog):
         type_id = self.emp_type.currentData()
         skill_id = self.skill.currentData()
         
+        if self.create_login.isChecked():
+            self.save_employee_with_account(first_name, last_name, dept_id, job_id, type_id, skill_id)
+            return
+        
         if self.db_manager.add_employee(first_name, last_name, dept_id, 
                                        job_id, type_id, skill_id):
             QMessageBox.information(self, 'Success', 'Employee added successfully!')
             self.accept()
         else:
             QMessageBox.warning(self, 'Error', 'Failed to add employee')
+    
+    def save_employee_with_account(self, first_name, last_name, dept_id, job_id, type_id, skill_id):
+        username = self.username.text().strip()
+        password = self.password.text().strip()
+        is_admin = 1 if self.is_admin.isChecked() else 0
+        
+        # same rules as CreateUserAccountDialog
+        if len(username) < 3:
+            QMessageBox.warning(self, 'Error', 'Username must be at least 3 characters')
+            return
+        if len(password) < 6:
+            QMessageBox.warning(self, 'Error', 'Password must be at least 6 characters')
+            return
+        if self.db_manager.check_username_exists(username):
+            QMessageBox.warning(self, 'Error', 'Username already exists. Please choose another.')
+            return
+        
+        if self.db_manager.add_employee_with_account(first_name, last_name, dept_id, job_id, type_id,
+                                                     skill_id, username, password, is_admin):
+            QMessageBox.information(self, 'Success', 'Employee and user account added successfully!')
+            self.accept()
+        else:
+            QMessageBox.warning(self, 'Error', 'Failed to add employee; nothing was saved')
 
 class CreateUserAccountDialog(QDialog):
     def __init__(self, db_manager):
@@ -337,8 +490,8 @@ class CreateUserAccountDialog(QDialog):
             self.employee_combo.addItem('No employees without accounts', None)
         else:
             for emp in employees:
-                # emp: (employee_id, first_name, last_name)
-                self.employee_combo.addItem(f"{emp[1]} {emp[2]} (ID: {emp[0]})", emp[0])
+                self.employee_combo.addItem(f"{emp.first_name} {emp.last_name} (ID: {emp.employee_id})",
+                                            emp.employee_id)
     
     def create_account(self):
         employee_id = self.employee_combo.currentData()
@@ -0,0 +1,173 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime, time
+
+FORMATS = {
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# column name, arrow type name
+ATTENDANCE_FIELDS = [
+    ('log_id', 'int64'), ('employee_id', 'int64'), ('first_name', 'string'),
+    ('last_name', 'string'), ('department_name', 'string'), ('date', 'date32'),
+    ('clock_in', 'time64'), ('clock_out', 'time64'), ('break_count', 'int64'),
+    ('break_minutes', 'int64'),
+]
+BREAK_FIELDS = [
+    ('break_id', 'int64'), ('log_id', 'int64'), ('employee_id', 'int64'),
+    ('first_name', 'string'), ('last_name', 'string'), ('department_name', 'string'),
+    ('date', 'date32'), ('start_time', 'time64'), ('end_time', 'time64'),
+]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def write_csv(batches, fields, f):
+    writer = csv.writer(f)
+    writer.writerow([name for name, _ in fields])
+    count = 0
+    for rows in batches:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def write_jsonl(batches, fields, f):
+    names = [name for name, _ in fields]
+    count = 0
+    for rows in batches:
+        f.write(''.join(json.dumps(dict(zip(names, map(_json_value, row)))) + '\n' for row in rows))
+        count += len(rows)
+    return count
+
+
+def write_arrow(batches, fields, path, fmt):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError('Parquet/Arrow export requires pyarrow (pip install pyarrow)')
+
+    types = {'int64': pa.int64(), 'string': pa.string(), 'date32': pa.date32(),
+             'time64': pa.time64('us')}
+    schema = pa.schema([(name, types[kind]) for name, kind in fields])
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema)
+        write = writer.write_table
+    else:
+        sink = pa.OSFile(path, 'wb')
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_table
+
+    count = 0
+    try:
+        for rows in batches:
+            # one row group / record batch per fetched batch keeps memory flat
+            columns = [pa.array([row[i] for row in rows], type=schema.field(i).type)
+                       for i in range(len(fields))]
+            write(pa.Table.from_arrays(columns, schema=schema))
+            count += len(rows)
+    finally:
+        writer.close()
+        if fmt == 'arrow':
+            sink.close()
+    return count
+
+
+def _tracked(batches, progress, cancelled):
+    # reports the running row count after each batch and stops between batches once cancelled
+    count = 0
+    for rows in batches:
+        if cancelled is not None and cancelled.is_set():
+            raise ExportCancelled('Export cancelled')
+        yield rows
+        count += len(rows)
+        if progress is not None:
+            progress(count)
+
+
+def export_attendance(db_manager, path, fmt, start_date, end_date, department_id=None,
+                      table='attendance', batch_size=5000, progress=None, cancelled=None):
+    # progress(rows written so far) is called after each batch; cancelled is a
+    # threading.Event checked between batches. The file is written under a temporary
+    # name next to path and only renamed once complete, so a failed or cancelled
+    # export leaves nothing behind.
+    if table == 'breaks':
+        batches = db_manager.iter_break_history(start_date, end_date, department_id, batch_size)
+        fields = BREAK_FIELDS
+    else:
+        batches = db_manager.iter_attendance_history(start_date, end_date, department_id, batch_size)
+        fields = ATTENDANCE_FIELDS
+
+    directory, name = os.path.split(os.path.abspath(path))
+    temp_path = os.path.join(directory, f'.{name}.{uuid.uuid4().hex[:8]}.part')
+    try:
+        tracked = _tracked(batches, progress, cancelled)
+        if fmt in ('parquet', 'arrow'):
+            count = write_arrow(tracked, fields, temp_path, fmt)
+        else:
+            with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+                if fmt == 'csv':
+                    count = write_csv(tracked, fields, f)
+                else:
+                    count = write_jsonl(tracked, fields, f)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        # closes the streaming cursor when the export stopped early
+        if hasattr(batches, 'close'):
+            batches.close()
+    return count
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Export attendance history for audits')
+    parser.add_argument('start', type=date.fromisoformat, help='first day (YYYY-MM-DD)')
+    parser.add_argument('end', type=date.fromisoformat, help='last day (YYYY-MM-DD)')
+    parser.add_argument('output', help='output file; the format follows the extension unless --format is given')
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--department', type=int, help='department_id to export')
+    parser.add_argument('--table', choices=['attendance', 'breaks'], default='attendance')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    fmt = args.format
+    if not fmt:
+        extension = os.path.splitext(args.output)[1].lower()
+        fmt = next((name for name, ext in FORMATS.items() if ext == extension), 'csv')
+
+    db_manager = DatabaseManager()
+    if not db_manager.connect():
+        sys.exit(1)
+    try:
+        count = export_attendance(db_manager, args.output, fmt, args.start, args.end,
+                                  args.department, args.table, args.batch_size)
+    finally:
+        db_manager.disconnect()
+    print(f"Exported {count} row(s) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,11 +5,15 @@ from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
 from datetime import date
 
+from database.leave_accrual import available, leave_days, split_by_year
+
 class LeaveRequestForm(QWidget):
     def __init__(self, db_manager, user_data):
         super().__init__()
         self.db_manager = db_manager
         self.user_data = user_data
+        self.policies = {p.leave_type_id: p for p in self.db_manager.get_leave_policies() or []}
+        self.balances = {}
         self.init_ui()
     
     def init_ui(self):
@@ -33,6 +37,11 @@ class LeaveRequestForm(QWidget):
         type_layout.addStretch()
         form_layout.addLayout(type_layout)
         
+        # remaining days for the selected type, from the precomputed balances
+        self.balance_label = QLabel()
+        self.balance_label.setStyleSheet('color: #2c3e50; font-weight: bold;')
+        form_layout.addWidget(self.balance_label)
+        
         # Start date
         start_layout = QHBoxLayout()
         start_layout.addWidget(QLabel('Start Date:'))
@@ -53,6 +62,9 @@ class LeaveRequestForm(QWidget):
         end_layout.addStretch()
         form_layout.addLayout(end_layout)
         
+        self.days_label = QLabel()
+        form_layout.addWidget(self.days_label)
+        
         # Submit button
         btn_layout = QHBoxLayout()
         submit_btn = QPushButton('Submit Request')
@@ -84,7 +96,7 @@ class LeaveRequestForm(QWidget):
                 background-color: #2980b9;
             }
         """)
-        refresh_btn.clicked.connect(self.load_requests)
+        refresh_btn.clicked.connect(self.refresh)
         btn_layout.addWidget(refresh_btn)
         
         btn_layout.addStretch()
@@ -105,12 +117,66 @@ class LeaveRequestForm(QWidget):
         layout.addWidget(self.requests_table)
         
         self.setLayout(layout)
-        self.load_requests()
+        
+        self.leave_type_combo.currentIndexChanged.connect(self.update_balance)
+        self.start_date.dateChanged.connect(self.update_days)
+        self.end_date.dateChanged.connect(self.update_days)
+        self.update_days()
+        self.refresh()
     
     def load_leave_types(self):
         leave_types = self.db_manager.get_leave_types()
         for lt in leave_types:
-            self.leave_type_combo.addItem(lt[1], lt[0])
+            self.leave_type_combo.addItem(lt.type_name, lt.leave_type_id)
+    
+    def refresh(self):
+        self.load_balances()
+        self.load_requests()
+    
+    def load_balances(self):
+        balances = self.db_manager.get_leave_balances(self.user_data['employee_id'])
+        self.balances = {b.leave_type_id: b for b in balances or []}
+        self.update_balance()
+    
+    def balance_for(self, leave_type_id, year):
+        if year == date.today().year:
+            return self.balances.get(leave_type_id)
+        balances = self.db_manager.get_leave_balances(self.user_data['employee_id'], year)
+        return next((b for b in balances or [] if b.leave_type_id == leave_type_id), None)
+    
+    def update_balance(self):
+        leave_type_id = self.leave_type_combo.currentData()
+        policy = self.policies.get(leave_type_id)
+        balance = self.balances.get(leave_type_id)
+        if policy is None:
+            self.balance_label.setText('No day limit for this leave type')
+        elif balance is None:
+            self.balance_label.setText('')
+        else:
+            free = available(policy, balance, date.today())
+            self.balance_label.setText(f'Available: {round(free, 1):g} day(s) '
+                                       f'({float(balance.used):g} used, '
+                                       f'{float(balance.pending):g} waiting for approval)')
+    
+    def update_days(self):
+        days = leave_days(self.start_date.date().toPyDate(), self.end_date.date().toPyDate())
+        self.days_label.setText(f'This request: {days} working day(s)')
+    
+    def check_balance(self, leave_type_id, start, end):
+        # returns an error message when the request is more than the employee has
+        # left; days that accrue later in the year count for leave taken then
+        policy = self.policies.get(leave_type_id)
+        if policy is None:
+            return None
+        for year, days in split_by_year(start, end):
+            balance = self.balance_for(leave_type_id, year)
+            if balance is None:
+                continue
+            free = available(policy, balance, min(end, date(year, 12, 31)))
+            if days > free:
+                return (f'This request needs {days} working day(s) of {policy.type_name} in {year}, '
+                        f'but only {max(round(free, 1), 0):g} will be available.')
+        return None
     
     def submit_request(self):
         leave_type_id = self.leave_type_combo.currentData()
@@ -121,11 +187,16 @@ class LeaveRequestForm(QWidget):
             QMessageBox.warning(self, 'Error', 'Start date must be before end date')
             return
         
+        error = self.check_balance(leave_type_id, start, end)
+        if error:
+            QMessageBox.warning(self, 'Not Enough Leave', error)
+            return
+        
         if self.db_manager.submit_leave_request(self.user_data['employee_id'], 
                                                leave_type_id, start, end):
             QMessageBox.information(self, 'Success', 
                                   'Leave request submitted! Waiting for approval.')
-            self.load_requests()
+            self.refresh()
         else:
             QMessageBox.warning(self, 'Error', 'Failed to submit leave request')
     
@@ -134,16 +205,17 @@ class LeaveRequestForm(QWidget):
         self.requests_table.setRowCount(len(requests))
         
         for row, req in enumerate(requests):
-            # req: (request_id, first_name, last_name, type_name, start_date, end_date, is_approved)
-            self.requests_table.setItem(row, 0, QTableWidgetItem(str(req[0])))
-            self.requests_table.setItem(row, 1, QTableWidgetItem(req[3]))
-            self.requests_table.setItem(row, 2, QTableWidgetItem(str(req[4])))
-            self.requests_table.setItem(row, 3, QTableWidgetItem(str(req[5])))
+            self.requests_table.setItem(row, 0, QTableWidgetItem(str(req.request_id)))
+            self.requests_table.setItem(row, 1, QTableWidgetItem(req.type_name))
+            self.requests_table.setItem(row, 2, QTableWidgetItem(str(req.start_date)))
+            self.requests_table.setItem(row, 3, QTableWidgetItem(str(req.end_date)))
             
-            status = 'Approved' if req[6] else 'Pending'
+            status = 'Approved' if req.is_approved else 'Rejected' if req.is_rejected else 'Pending'
             status_item = QTableWidgetItem(status)
-            if req[6]:
+            if req.is_approved:
                 status_item.setBackground(Qt.green)
+            elif req.is_rejected:
+                status_item.setBackground(Qt.red)
             else:
                 status_item.setBackground(Qt.yellow)
             self.requests_table.setItem(row, 4, status_item)
\ No newline at end of file
@@ -1,15 +1,30 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QTableWidget, QTableWidgetItem,
-                             QDateEdit, QHeaderView, QMessageBox, QDialog)
-from PyQt5.QtCore import Qt, QDate
+                             QDateEdit, QHeaderView, QMessageBox, QDialog,
+                             QFormLayout, QComboBox, QDialogButtonBox, QFileDialog,
+                             QCheckBox, QAbstractItemView, QProgressDialog)
+from PyQt5.QtCore import Qt, QDate, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
+from collections import Counter
 from datetime import date
+import threading
+
+from attendance_system.attendance_export import export_attendance, ExportCancelled, FORMATS
+from database import records
+from utils import tracing
 
 class ManagerAttendanceReport(QWidget):
+    # emitted from the export worker thread, delivered on the GUI thread
+    export_progress = pyqtSignal(int)
+    export_done = pyqtSignal(object, object)
+    
     def __init__(self, db_manager, user_data):
         super().__init__()
         self.db_manager = db_manager
         self.user_data = user_data
+        self.export_state = None
+        self.export_progress.connect(self.show_export_progress)
+        self.export_done.connect(self.finish_export)
         self.init_ui()
     
     def init_ui(self):
@@ -61,6 +76,21 @@ class ManagerAttendanceReport(QWidget):
         leave_btn.clicked.connect(self.view_leave_requests)
         controls.addWidget(leave_btn)
         
+        export_btn = QPushButton('Export History')
+        export_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #16a085;
+                color: white;
+                padding: 8px 15px;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #138d75;
+            }
+        """)
+        export_btn.clicked.connect(self.export_history)
+        controls.addWidget(export_btn)
+        
         controls.addStretch()
         layout.addLayout(controls)
         
@@ -107,57 +137,58 @@ class ManagerAttendanceReport(QWidget):
         self.setLayout(layout)
         self.load_report()
     
+    @tracing.traced
     def load_report(self):
         report_date = self.date_picker.date().toPyDate()
         self.current_date_label.setText(f"Showing report for: {report_date.strftime('%A, %B %d, %Y')}")
         
+        # punches only append events; bring the attendance tables up to date first
+        self.db_manager.project_clock_events()
         report = self.db_manager.get_attendance_report(report_date)
         
         self.table.setRowCount(len(report))
         
-        for row, record in enumerate(report):
-            # record: (employee_id, first_name, last_name, scheduled_start, scheduled_end,
-            #          clock_in, clock_out, status, leave_type_id)
-            
-            name = f"{record[1]} {record[2]}"
-            self.table.setItem(row, 0, QTableWidgetItem(name))
-            
-            if record[3]:  # Has scheduled shift
-                self.table.setItem(row, 1, QTableWidgetItem(str(record[3])))
-                self.table.setItem(row, 2, QTableWidgetItem(str(record[4])))
-            else:
-                self.table.setItem(row, 1, QTableWidgetItem('N/A'))
-                self.table.setItem(row, 2, QTableWidgetItem('N/A'))
-            
-            if record[5]:  # Clock in
-                self.table.setItem(row, 3, QTableWidgetItem(str(record[5])))
-            else:
-                self.table.setItem(row, 3, QTableWidgetItem('-'))
-            
-            if record[6]:  # Clock out
-                self.table.setItem(row, 4, QTableWidgetItem(str(record[6])))
-            else:
-                self.table.setItem(row, 4, QTableWidgetItem('-'))
-            
-            # Status with color coding
-            status = record[7]
-            status_item = QTableWidgetItem(status)
-            
-            if record[8]:  # On leave
-                status_item.setBackground(QColor(255, 255, 200))  # Light yellow
-                notes = 'On Approved Leave'
-            elif status == 'On Time':
-                status_item.setBackground(QColor(144, 238, 144))  # Light green
-                notes = ''
-            elif status == 'Late':
-                status_item.setBackground(QColor(240, 128, 128))  # Light coral
-                notes = 'Arrived Late'
-            else:  # Absent
-                status_item.setBackground(QColor(211, 211, 211))  # Light gray
-                notes = 'Did Not Clock In'
-            
-            self.table.setItem(row, 5, status_item)
-            self.table.setItem(row, 6, QTableWidgetItem(notes))
+        with tracing.span('populate attendance table', rows=len(report)):
+            for row, record in enumerate(report):
+                name = f"{record.first_name} {record.last_name}"
+                self.table.setItem(row, 0, QTableWidgetItem(name))
+                
+                if record.scheduled_start:  # Has scheduled shift
+                    self.table.setItem(row, 1, QTableWidgetItem(str(record.scheduled_start)))
+                    self.table.setItem(row, 2, QTableWidgetItem(str(record.scheduled_end)))
+                else:
+                    self.table.setItem(row, 1, QTableWidgetItem('N/A'))
+                    self.table.setItem(row, 2, QTableWidgetItem('N/A'))
+                
+                if record.clock_in:
+                    self.table.setItem(row, 3, QTableWidgetItem(str(record.clock_in)))
+                else:
+                    self.table.setItem(row, 3, QTableWidgetItem('-'))
+                
+                if record.clock_out:
+                    self.table.setItem(row, 4, QTableWidgetItem(str(record.clock_out)))
+                else:
+                    self.table.setItem(row, 4, QTableWidgetItem('-'))
+                
+                # Status with color coding
+                status = record.status
+                status_item = QTableWidgetItem(status)
+                
+                if record.leave_type_id:  # On leave
+                    status_item.setBackground(QColor(255, 255, 200))  # Light yellow
+                    notes = 'On Approved Leave'
+                elif status == 'On Time':
+                    status_item.setBackground(QColor(144, 238, 144))  # Light green
+                    notes = ''
+                elif status == 'Late':
+                    status_item.setBackground(QColor(240, 128, 128))  # Light coral
+                    notes = 'Arrived Late'
+                else:  # Absent
+                    status_item.setBackground(QColor(211, 211, 211))  # Light gray
+                    notes = 'Did Not Clock In'
+                
+                self.table.setItem(row, 5, status_item)
+                self.table.setItem(row, 6, QTableWidgetItem(notes))
     
     def view_leave_requests(self):
         # show all pending leave requests
@@ -165,6 +196,113 @@ class ManagerAttendanceReport(QWidget):
         dialog.exec_()
         self.load_report()  # Refresh after approving requests
 
+    def export_history(self):
+        if self.export_state is not None:  # an export is already running
+            return
+        dialog = ExportDialog(self.db_manager)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        
+        fmt = dialog.format_combo.currentData()
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Attendance History',
+                                              f'attendance{FORMATS[fmt]}',
+                                              f'{fmt.upper()} (*{FORMATS[fmt]})')
+        if not path:
+            return
+        
+        # years of history take a while; the export runs on a worker thread with its
+        # own connection, since the streaming cursor holds its connection until the end
+        progress = QProgressDialog('Exporting...', 'Cancel', 0, 0, self)
+        progress.setWindowTitle('Export Attendance History')
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        cancelled = threading.Event()
+        progress.canceled.connect(cancelled.set)
+        self.export_state = {'progress': progress, 'cancelled': cancelled, 'path': path}
+        
+        worker_db = self.db_manager.clone()
+        args = (path, fmt, dialog.start_date.date().toPyDate(), dialog.end_date.date().toPyDate(),
+                dialog.department_combo.currentData(), dialog.table_combo.currentData())
+        
+        def work():
+            try:
+                if not worker_db.connect():
+                    raise ConnectionError('Failed to connect to database')
+                # the history views read the attendance tables; fold in pending punches first
+                worker_db.project_clock_events()
+                count = export_attendance(worker_db, *args, progress=self.export_progress.emit,
+                                          cancelled=cancelled)
+                self.export_done.emit(count, None)
+            except Exception as e:
+                self.export_done.emit(None, e)
+            finally:
+                worker_db.disconnect()
+        
+        threading.Thread(target=work, name='attendance-export', daemon=True).start()
+    
+    def show_export_progress(self, count):
+        if self.export_state is not None:
+            self.export_state['progress'].setLabelText(f'Exported {count} row(s)...')
+    
+    def finish_export(self, count, error):
+        state, self.export_state = self.export_state, None
+        state['progress'].close()
+        if isinstance(error, ExportCancelled):
+            QMessageBox.information(self, 'Export Cancelled', 'The export was cancelled; no file was written.')
+        elif error is not None:
+            QMessageBox.warning(self, 'Error', f'Export failed: {error}')
+        else:
+            QMessageBox.information(self, 'Export Finished', f"Exported {count} row(s) to {state['path']}")
+
+class ExportDialog(QDialog):
+    def __init__(self, db_manager):
+        super().__init__()
+        self.db_manager = db_manager
+        self.setWindowTitle('Export Attendance History')
+        self.init_ui()
+    
+    def init_ui(self):
+        layout = QFormLayout()
+        
+        self.start_date = QDateEdit()
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDate(QDate.currentDate().addMonths(-1))
+        layout.addRow('From:', self.start_date)
+        
+        self.end_date = QDateEdit()
+        self.end_date.setCalendarPopup(True)
+        self.end_date.setDate(QDate.currentDate())
+        layout.addRow('To:', self.end_date)
+        
+        self.department_combo = QComboBox()
+        self.department_combo.addItem('All Departments', None)
+        for dept in self.db_manager.get_departments() or []:
+            self.department_combo.addItem(dept.department_name, dept.department_id)
+        layout.addRow('Department:', self.department_combo)
+        
+        self.table_combo = QComboBox()
+        self.table_combo.addItem('Attendance (one row per day)', 'attendance')
+        self.table_combo.addItem('Breaks (one row per break)', 'breaks')
+        layout.addRow('Records:', self.table_combo)
+        
+        self.format_combo = QComboBox()
+        for fmt in FORMATS:
+            self.format_combo.addItem(fmt.upper(), fmt)
+        layout.addRow('Format:', self.format_combo)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+        
+        self.setLayout(layout)
+    
+    def accept(self):
+        if self.start_date.date() > self.end_date.date():
+            QMessageBox.warning(self, 'Error', 'Start date must be before end date')
+            return
+        super().accept()
+
 class LeaveRequestDialog(QDialog):
     def __init__(self, db_manager):
         super().__init__()
@@ -187,8 +325,28 @@ class LeaveRequestDialog(QDialog):
         ])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         layout.addWidget(self.table)
         
+        # bulk actions on the selected rows
+        bulk_layout = QHBoxLayout()
+        self.remove_shifts_check = QCheckBox('Remove shifts during approved leave')
+        self.remove_shifts_check.setChecked(True)
+        bulk_layout.addWidget(self.remove_shifts_check)
+        bulk_layout.addStretch()
+        
+        approve_selected_btn = QPushButton('Approve Selected')
+        approve_selected_btn.setStyleSheet('background-color: #27ae60; color: white; padding: 8px 15px;')
+        approve_selected_btn.clicked.connect(self.approve_selected)
+        bulk_layout.addWidget(approve_selected_btn)
+        
+        reject_selected_btn = QPushButton('Reject Selected')
+        reject_selected_btn.setStyleSheet('background-color: #e74c3c; color: white; padding: 8px 15px;')
+        reject_selected_btn.clicked.connect(self.reject_selected)
+        bulk_layout.addWidget(reject_selected_btn)
+        layout.addLayout(bulk_layout)
+        
         close_btn = QPushButton('Close')
         close_btn.clicked.connect(self.close)
         layout.addWidget(close_btn)
@@ -196,31 +354,40 @@ class LeaveRequestDialog(QDialog):
         self.setLayout(layout)
         self.load_requests()
     
+    @tracing.traced
     def load_requests(self):
         requests = self.db_manager.get_leave_requests()
+        self.requests = requests
+        self.table.clearSelection()
         self.table.setRowCount(len(requests))
         
         for row, req in enumerate(requests):
-            # req: (request_id, first_name, last_name, type_name, start_date, end_date, is_approved)
-            self.table.setItem(row, 0, QTableWidgetItem(str(req[0])))
-            self.table.setItem(row, 1, QTableWidgetItem(f"{req[1]} {req[2]}"))
-            self.table.setItem(row, 2, QTableWidgetItem(req[3]))
-            self.table.setItem(row, 3, QTableWidgetItem(str(req[4])))
-            self.table.setItem(row, 4, QTableWidgetItem(str(req[5])))
+            self.table.setItem(row, 0, QTableWidgetItem(str(req.request_id)))
+            self.table.setItem(row, 1, QTableWidgetItem(f"{req.first_name} {req.last_name}"))
+            self.table.setItem(row, 2, QTableWidgetItem(req.type_name))
+            self.table.setItem(row, 3, QTableWidgetItem(str(req.start_date)))
+            self.table.setItem(row, 4, QTableWidgetItem(str(req.end_date)))
             
-            status = 'Approved' if req[6] else 'Pending'
+            status = 'Approved' if req.is_approved else 'Rejected' if req.is_rejected else 'Pending'
             status_item = QTableWidgetItem(status)
-            if req[6]:
+            if req.is_approved:
                 status_item.setBackground(Qt.green)
+            elif req.is_rejected:
+                status_item.setBackground(QColor(240, 128, 128))  # Light coral
             else:
                 status_item.setBackground(Qt.yellow)
             self.table.setItem(row, 5, status_item)
             
             #approve button for pending requests
-            if not req[6]:
+            if req.is_rejected:
+                rejected_label = QLabel('✗ Rejected')
+                rejected_label.setStyleSheet('color: #c0392b; font-weight: bold; padding: 5px;')
+                rejected_label.setAlignment(Qt.AlignCenter)
+                self.table.setCellWidget(row, 6, rejected_label)
+            elif not req.is_approved:
                 approve_btn = QPushButton('Approve')
                 approve_btn.setStyleSheet('background-color: #27ae60; color: white; padding: 5px;')
-                approve_btn.clicked.connect(lambda checked, rid=req[0]: self.approve_request(rid))
+                approve_btn.clicked.connect(lambda checked, rid=req.request_id: self.approve_request(rid))
                 self.table.setCellWidget(row, 6, approve_btn)
             else:
                 approved_label = QLabel('✓ Approved')
@@ -228,12 +395,71 @@ class LeaveRequestDialog(QDialog):
                 approved_label.setAlignment(Qt.AlignCenter)
                 self.table.setCellWidget(row, 6, approved_label)
     
+    def selected_pending_ids(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        return [self.requests[row].request_id for row in sorted(rows)
+                if not self.requests[row].is_approved and not self.requests[row].is_rejected]
+    
+    def approve_selected(self):
+        request_ids = self.selected_pending_ids()
+        if not request_ids:
+            QMessageBox.information(self, 'Approve Leave Requests', 'Select one or more pending requests first.')
+            return
+        remove_conflicts = self.remove_shifts_check.isChecked()
+        reply = QMessageBox.question(self, 'Approve Leave Requests',
+                                     f'Approve {len(request_ids)} leave request(s)?' +
+                                     ('\nShift assignments during the leave will be removed.' if remove_conflicts else ''),
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        
+        with tracing.span('LeaveRequestDialog.approve_selected', requests=len(request_ids)):
+            decisions = self.db_manager.approve_leave_requests(request_ids, remove_conflicts=remove_conflicts)
+            if decisions is not None:
+                self.load_requests()
+        if decisions is None:
+            QMessageBox.warning(self, 'Error', 'Failed to approve requests')
+            return
+        self.show_summary('Approved', decisions)
+    
+    def reject_selected(self):
+        request_ids = self.selected_pending_ids()
+        if not request_ids:
+            QMessageBox.information(self, 'Reject Leave Requests', 'Select one or more pending requests first.')
+            return
+        reply = QMessageBox.question(self, 'Reject Leave Requests',
+                                     f'Reject {len(request_ids)} leave request(s)?',
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        
+        with tracing.span('LeaveRequestDialog.reject_selected', requests=len(request_ids)):
+            decisions = self.db_manager.reject_leave_requests(request_ids)
+            if decisions is not None:
+                self.load_requests()
+        if decisions is None:
+            QMessageBox.warning(self, 'Error', 'Failed to reject requests')
+            return
+        self.show_summary('Rejected', decisions)
+    
+    def show_summary(self, action, decisions):
+        outcomes = Counter(d.outcome for d in decisions)
+        lines = [f'{action} {outcomes[records.LEAVE_OK]} request(s).']
+        if outcomes[records.LEAVE_OVERLAPS_LEAVE]:
+            lines.append(f'{outcomes[records.LEAVE_OVERLAPS_LEAVE]} skipped: overlap leave that is already approved or approved in this batch.')
+        if outcomes[records.LEAVE_SHIFT_CLASH]:
+            lines.append(f'{outcomes[records.LEAVE_SHIFT_CLASH]} skipped: shifts are assigned during the leave.')
+        if outcomes[records.LEAVE_NOT_PENDING]:
+            lines.append(f'{outcomes[records.LEAVE_NOT_PENDING]} skipped: no longer pending.')
+        QMessageBox.information(self, 'Leave Requests', '\n'.join(lines))
+    
     def approve_request(self, request_id):
         reply = QMessageBox.question(self, 'Approve Leave Request',
-                                     'Are you sure you want to approve this leave request?',
+                                     'Are you sure you want to approve this leave request?\n'
+                                     'Shift assignments during the leave will be removed.',
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            if self.db_manager.approve_leave_request(request_id):
+            if self.db_manager.approve_leave_request(request_id, remove_conflicts=True):
                 QMessageBox.information(self, 'Success', 'Leave request approved!')
                 self.load_requests()  # Refresh the table
             else:
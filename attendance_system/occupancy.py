@@ -0,0 +1,91 @@
+from collections import defaultdict
+from datetime import date
+
+ON_FLOOR = 0
+ON_BREAK = 1
+UNASSIGNED = 'Unassigned'
+
+
+class FloorModel:
+    """Who is clocked in (and who is on break) today, kept in memory.
+
+    refresh() asks the database only for punches that changed since the last
+    row-version watermark and updates the per-department and per-location
+    counts incrementally; the full list is reloaded only when the day changes.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.directory = {}   # employee_id -> FloorEmployee
+        self.present = {}     # employee_id -> FloorState, clocked in and not out
+        self.by_department = defaultdict(lambda: [0, 0])  # name -> [on floor, on break]
+        self.by_location = defaultdict(lambda: [0, 0])
+        self.day = None
+        self.watermark = None
+
+    def load_directory(self):
+        rows = self.db_manager.get_floor_directory()
+        if rows is None:
+            return False
+        self.directory = {row.employee_id: row for row in rows}
+        return True
+
+    def reset(self, day):
+        self.present.clear()
+        self.by_department.clear()
+        self.by_location.clear()
+        self.day = day
+        self.watermark = None
+
+    def refresh(self, today=None):
+        # returns True when anything on the floor changed
+        today = today or date.today()
+        if today != self.day:
+            self.reset(today)
+            if not self.directory:
+                self.load_directory()
+
+        # read the watermark first: anything committed while the changes are being
+        # read is picked up again next time, and applying a state twice is harmless
+        watermark = self.db_manager.get_floor_watermark()
+        changes = self.db_manager.get_floor_changes(self.watermark, today)
+        if watermark is None or changes is None:
+            return False
+
+        if any(state.employee_id not in self.directory for state in changes):
+            self.load_directory()  # someone hired since the board opened
+
+        changed = self.watermark is None  # first load of the day always redraws
+        for state in changes:
+            changed = self.apply(state) or changed
+        self.watermark = watermark
+        return changed
+
+    def apply(self, state):
+        old = self.present.get(state.employee_id)
+        working = state.clock_in is not None and state.clock_out is None
+        if old == state or (old is None and not working):
+            return False
+        if old is not None:
+            self._count(old, -1)
+            del self.present[state.employee_id]
+        if working:
+            self.present[state.employee_id] = state
+            self._count(state, 1)
+        return True
+
+    def _count(self, state, delta):
+        employee = self.directory.get(state.employee_id)
+        slot = ON_BREAK if state.on_break else ON_FLOOR
+        self.by_department[(employee and employee.department_name) or UNASSIGNED][slot] += delta
+        self.by_location[(employee and employee.location) or UNASSIGNED][slot] += delta
+
+    def totals(self):
+        on_break = sum(1 for state in self.present.values() if state.on_break)
+        return len(self.present) - on_break, on_break
+
+    def people(self):
+        # (FloorEmployee or None, FloorState) sorted by name
+        rows = [(self.directory.get(employee_id), state) for employee_id, state in self.present.items()]
+        rows.sort(key=lambda row: (row[0].last_name, row[0].first_name) if row[0] else ('', ''))
+        return rows
@@ -0,0 +1,110 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont, QColor
+
+from attendance_system.occupancy import FloorModel, ON_FLOOR, ON_BREAK
+
+POLL_INTERVAL_MS = 5000
+
+class OccupancyBoard(QWidget):
+    def __init__(self, db_manager, user_data):
+        super().__init__()
+        self.db_manager = db_manager
+        self.user_data = user_data
+        self.model = FloorModel(db_manager)
+
+        # polls only while the board is on screen
+        self.timer = QTimer(self)
+        self.timer.setInterval(POLL_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # header
+        header = QLabel('Floor Board - Who Is In Now')
+        header.setFont(QFont('Arial', 16, QFont.Bold))
+        layout.addWidget(header)
+
+        self.totals_label = QLabel()
+        self.totals_label.setFont(QFont('Arial', 12, QFont.Bold))
+        self.totals_label.setStyleSheet('color: #2c3e50; padding: 5px;')
+        layout.addWidget(self.totals_label)
+
+        # counts per department and per location side by side
+        counts = QHBoxLayout()
+        self.department_table = self.create_table(['Department', 'On Floor', 'On Break'])
+        counts.addWidget(self.department_table)
+        self.location_table = self.create_table(['Location', 'On Floor', 'On Break'])
+        counts.addWidget(self.location_table)
+        layout.addLayout(counts)
+
+        # everyone clocked in
+        self.people_table = self.create_table(['Employee', 'Department', 'Location', 'Clock In', 'Status'])
+        layout.addWidget(self.people_table)
+
+        self.setLayout(layout)
+        self.refresh()
+
+    def create_table(self, labels):
+        table = QTableWidget()
+        table.setColumnCount(len(labels))
+        table.setHorizontalHeaderLabels(labels)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        return table
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        # only the rows that changed since the last poll come back; redraw only
+        # when one of them actually moved someone on or off the floor
+        if self.model.refresh():
+            self.render()
+
+    def render(self):
+        on_floor, on_break = self.model.totals()
+        self.totals_label.setText(f'On floor: {on_floor}    On break: {on_break}    '
+                                  f'Clocked in: {on_floor + on_break}')
+        self.fill_counts(self.department_table, self.model.by_department)
+        self.fill_counts(self.location_table, self.model.by_location)
+
+        people = self.model.people()
+        self.people_table.setRowCount(len(people))
+        for row, (employee, state) in enumerate(people):
+            if employee:
+                name = f'{employee.first_name} {employee.last_name}'
+                department, location = employee.department_name, employee.location
+            else:
+                name, department, location = f'Employee {state.employee_id}', None, None
+            self.people_table.setItem(row, 0, QTableWidgetItem(name))
+            self.people_table.setItem(row, 1, QTableWidgetItem(department or '-'))
+            self.people_table.setItem(row, 2, QTableWidgetItem(location or '-'))
+            self.people_table.setItem(row, 3, QTableWidgetItem(str(state.clock_in)))
+
+            status_item = QTableWidgetItem('On Break' if state.on_break else 'Working')
+            if state.on_break:
+                status_item.setBackground(QColor(255, 255, 200))  # Light yellow
+            else:
+                status_item.setBackground(QColor(144, 238, 144))  # Light green
+            self.people_table.setItem(row, 4, status_item)
+
+    def fill_counts(self, table, counts):
+        # groups that emptied out stay in the model with zero counts; skip them
+        rows = sorted((name, c) for name, c in counts.items() if c[ON_FLOOR] or c[ON_BREAK])
+        table.setRowCount(len(rows))
+        for row, (name, c) in enumerate(rows):
+            table.setItem(row, 0, QTableWidgetItem(name))
+            for column, value in ((1, c[ON_FLOOR]), (2, c[ON_BREAK])):
+                item = QTableWidgetItem(str(value))
+                item.setTextAlignment(Qt.AlignCenter)
+                table.setItem(row, column, item)
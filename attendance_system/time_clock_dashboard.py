@@ -5,6 +5,19 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 from datetime import date
 
+from database.records import (
+    PUNCH_OK, PUNCH_NOT_CLOCKED_IN, PUNCH_ALREADY_CLOCKED_IN, PUNCH_ALREADY_CLOCKED_OUT,
+    PUNCH_BREAK_ACTIVE, PUNCH_NO_ACTIVE_BREAK
+)
+
+PUNCH_MESSAGES = {
+    PUNCH_NOT_CLOCKED_IN: ('Not Clocked In', 'No clock-in record found for today'),
+    PUNCH_ALREADY_CLOCKED_IN: ('Already In', 'You have already clocked in today'),
+    PUNCH_ALREADY_CLOCKED_OUT: ('Already Out', 'You have already clocked out'),
+    PUNCH_BREAK_ACTIVE: ('Active Break', 'A break is already active'),
+    PUNCH_NO_ACTIVE_BREAK: ('No Active Break', 'There is no active break to end'),
+}
+
 
 class TimeClockDashboard(QWidget):
     def __init__(self, db_manager, user_data):
@@ -79,118 +92,58 @@ class TimeClockDashboard(QWidget):
             self.attendance_label.setText('Attendance: (no employee selected)')
             return
 
-        today = date.today()
-        sched = self.db_manager.get_today_shift(self.employee_id, today)
-        if sched:
-            # sched: (assignment_id, shift_name, start_time, end_time)
-            try:
-                _, shift_name, start_time, end_time = sched
-            except Exception:
-                shift_name = sched[1] if len(sched) > 1 else 'N/A'
-                start_time = sched[2] if len(sched) > 2 else None
-                end_time = sched[3] if len(sched) > 3 else None
-
-            self.shift_label.setText(f"Scheduled Shift: {shift_name} ({start_time} - {end_time})")
+        state = self.db_manager.get_day_state(self.employee_id, date.today())
+        if state and state.shift_name:
+            self.shift_label.setText(
+                f"Scheduled Shift: {state.shift_name} ({state.start_time} - {state.end_time})")
         else:
             self.shift_label.setText('Scheduled Shift: No shift scheduled for today')
 
-        log = self.db_manager.get_attendance_log(self.employee_id, today)
-        if log:
-            # log: (log_id, clock_in, clock_out)
-            log_id, clock_in, clock_out = log
-            status = f"Clock In: {clock_in or '-'} | Clock Out: {clock_out or '-'}"
+        if state and state.log_id:
+            status = f"Clock In: {state.clock_in or '-'} | Clock Out: {state.clock_out or '-'}"
+            if state.break_id:
+                status += ' | On Break'
             self.attendance_label.setText('Attendance: ' + status)
         else:
             self.attendance_label.setText('Attendance: No record for today')
 
+        # only offer the punches that can succeed; the procedures check again anyway
+        clocked_in = bool(state and state.log_id)
+        working = clocked_in and not state.clock_out
+        self.clock_in_btn.setEnabled(not clocked_in)
+        self.clock_out_btn.setEnabled(working)
+        self.start_break_btn.setEnabled(working and not state.break_id)
+        self.end_break_btn.setEnabled(working and bool(state.break_id))
+
+    def punch(self, status, success):
+        if status == PUNCH_OK:
+            QMessageBox.information(self, 'Success', success)
+        elif status in PUNCH_MESSAGES:
+            QMessageBox.information(self, *PUNCH_MESSAGES[status])
+        else:
+            QMessageBox.warning(self, 'Error', 'The time clock could not be updated, please try again')
+        self.refresh_view()
+
     def clock_in(self):
         if not self.employee_id:
             QMessageBox.warning(self, 'Error', 'No employee associated with this session')
             return
-
-        today = date.today()
-        log = self.db_manager.get_attendance_log(self.employee_id, today)
-        if log:
-            QMessageBox.information(self, 'Already In', 'You have already clocked in today')
-            self.refresh_view()
-            return
-
-        if self.db_manager.clock_in(self.employee_id):
-            QMessageBox.information(self, 'Success', 'Clocked in successfully')
-        else:
-            QMessageBox.warning(self, 'Error', 'Failed to clock in')
-        self.refresh_view()
+        self.punch(self.db_manager.clock_in(self.employee_id), 'Clocked in successfully')
 
     def clock_out(self):
         if not self.employee_id:
             QMessageBox.warning(self, 'Error', 'No employee associated with this session')
             return
-
-        today = date.today()
-        log = self.db_manager.get_attendance_log(self.employee_id, today)
-        if not log:
-            QMessageBox.warning(self, 'Error', 'No clock-in record found for today')
-            return
-
-        log_id, clock_in, clock_out = log
-        if clock_out:
-            QMessageBox.information(self, 'Already Out', 'You have already clocked out')
-            return
-
-        if self.db_manager.clock_out(log_id):
-            QMessageBox.information(self, 'Success', 'Clocked out successfully')
-        else:
-            QMessageBox.warning(self, 'Error', 'Failed to clock out')
-        self.refresh_view()
+        self.punch(self.db_manager.clock_out(self.employee_id), 'Clocked out successfully')
 
     def start_break(self):
         if not self.employee_id:
             QMessageBox.warning(self, 'Error', 'No employee associated with this session')
             return
-
-        today = date.today()
-        log = self.db_manager.get_attendance_log(self.employee_id, today)
-        if not log:
-            QMessageBox.warning(self, 'Error', 'You must clock in before starting a break')
-            return
-
-        log_id = log[0]
-        active = self.db_manager.get_active_break(log_id)
-        if active:
-            QMessageBox.information(self, 'Active Break', 'A break is already active')
-            return
-
-        if self.db_manager.start_break(log_id):
-            QMessageBox.information(self, 'Success', 'Break started')
-        else:
-            QMessageBox.warning(self, 'Error', 'Failed to start break')
-        self.refresh_view()
+        self.punch(self.db_manager.start_break(self.employee_id), 'Break started')
 
     def end_break(self):
         if not self.employee_id:
             QMessageBox.warning(self, 'Error', 'No employee associated with this session')
             return
-
-        today = date.today()
-        log = self.db_manager.get_attendance_log(self.employee_id, today)
-        if not log:
-            QMessageBox.warning(self, 'Error', 'No clock-in record found for today')
-            return
-
-        log_id = log[0]
-        active = self.db_manager.get_active_break(log_id)
-        if not active:
-            QMessageBox.information(self, 'No Active Break', 'There is no active break to end')
-            return
-
-        # active may be a row tuple (break_id,) or similar
-        try:
-            break_id = active[0]
-        except Exception:
-            break_id = active
-
-        if self.db_manager.end_break(break_id):
-            QMessageBox.information(self, 'Success', 'Break ended')
-        else:
-            QMessageBox.warning(self, 'Error', 'Failed to end break')
-        self.refresh_view()
+        self.punch(self.db_manager.end_break(self.employee_id), 'Break ended')
@@ -0,0 +1,228 @@
+"""Times every DatabaseManager method at several data scales.
+
+    python -m benchmarks.bench_db_manager --scales 100,1000,10000 --weeks 4
+    python -m benchmarks.bench_db_manager --baseline benchmarks/results/<earlier>.json
+
+Each scale reloads the bench database (never DBPROJECT) with benchmarks.datagen
+data, then runs every method --repeat times. Results are written as JSON so a
+later run can be compared against them; methods that got more than
+--threshold times slower are flagged.
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import summarize, write_results, check_baseline
+from benchmarks.datagen import generate, load, DEFAULT_START, BENCH_PASSWORD
+from database import records
+from database.create_database import create_database
+from database.db_manager import DatabaseManager
+
+def _count(result):
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result else 0
+
+
+class _Rollback(Exception):
+    def __init__(self, result):
+        super().__init__()
+        self.result = result
+
+
+def bench_context(data):
+    # a mid-range employee who actually worked on a mid-range day, and their session
+    log = data['AttendanceLogs'][len(data['AttendanceLogs']) // 2]
+    return {
+        'start': DEFAULT_START,
+        'day': log[2],
+        'employee_id': log[1],
+        # sessions are identified by their clock-in event (see get_attendance_log)
+        'log_id': next(e[0] for e in data['ClockEvents']
+                       if e[1] == log[1] and e[3] == log[2] and e[4] == records.CLOCK_IN),
+        'schedule_id': 1,
+        'username': data['UserAccounts'][len(data['UserAccounts']) // 2][2],
+        'pending_request_ids': [r[0] for r in data['LeaveRequests'] if not r[5]][:50],
+    }
+
+
+def read_cases(ctx):
+    # name -> callable(db); arguments come from the generated data so every call hits rows
+    day = ctx['day']
+    emp = ctx['employee_id']
+    week_end = ctx['start'] + timedelta(days=6)
+
+    def approve_rolled_back(db):
+        # the whole batch check and approval, undone so the data stays put
+        try:
+            with db.transaction():
+                raise _Rollback(db.approve_leave_requests(ctx['pending_request_ids']))
+        except _Rollback as rollback:
+            return rollback.result
+
+    return {
+        'get_login_record': lambda db: db.get_login_record(ctx['username']),
+        'authenticate_user': lambda db: db.authenticate_user(ctx['username'], BENCH_PASSWORD),
+        'get_all_employees': lambda db: db.get_all_employees(),
+        'get_departments': lambda db: db.get_departments(),
+        'get_job_titles': lambda db: db.get_job_titles(),
+        'get_skills': lambda db: db.get_skills(),
+        'get_employment_types': lambda db: db.get_employment_types(),
+        'get_weekly_schedules': lambda db: db.get_weekly_schedules(),
+        'get_shift_types': lambda db: db.get_shift_types(),
+        'get_shift_assignments': lambda db: db.get_shift_assignments(ctx['schedule_id']),
+        'get_employee_shifts': lambda db: db.get_employee_shifts(emp),
+        'get_signed_in_employees': lambda db: db.get_signed_in_employees(day),
+        'get_today_shift': lambda db: db.get_today_shift(emp, day),
+        'get_attendance_log': lambda db: db.get_attendance_log(emp, day),
+        'get_active_break': lambda db: db.get_active_break(ctx['log_id']),
+        'get_day_state': lambda db: db.get_day_state(emp, day),
+        'get_leave_types': lambda db: db.get_leave_types(),
+        'get_leave_requests(employee)': lambda db: db.get_leave_requests(emp),
+        'get_leave_requests(all)': lambda db: db.get_leave_requests(),
+        'get_attendance_report': lambda db: db.get_attendance_report(day),
+        'get_attendance_report(department)': lambda db: db.get_attendance_report(day, department_id=1),
+        'get_all_user_accounts': lambda db: db.get_all_user_accounts(),
+        'get_employees_without_accounts': lambda db: db.get_employees_without_accounts(),
+        'check_username_exists': lambda db: db.check_username_exists(ctx['username']),
+        'iter_attendance_history(week)': lambda db: sum(len(b) for b in db.iter_attendance_history(
+            ctx['start'], week_end)),
+        'iter_break_history(week)': lambda db: sum(len(b) for b in db.iter_break_history(
+            ctx['start'], week_end)),
+        'get_attendance_history_page(week)': lambda db: db.get_attendance_history_page(ctx['start'], week_end),
+        'get_break_history_page(week)': lambda db: db.get_break_history_page(ctx['start'], week_end),
+        'get_assignment_slots(week)': lambda db: db.get_assignment_slots(ctx['start'], week_end),
+        'get_employee_profiles': lambda db: db.get_employee_profiles(),
+        'get_availability_masks': lambda db: db.get_availability_masks(),
+        'get_availability_overrides(week)': lambda db: db.get_availability_overrides(ctx['start'], week_end),
+        'get_coverage_counts(week)': lambda db: db.get_coverage_counts(ctx['start'], week_end),
+        'get_coverage_leave(week)': lambda db: db.get_coverage_leave(ctx['start'], week_end),
+        'get_floor_directory': lambda db: db.get_floor_directory(),
+        'get_floor_changes(all)': lambda db: db.get_floor_changes(today=day),
+        'get_floor_changes(since)': lambda db: db.get_floor_changes(db.get_floor_watermark(), day),
+        'get_leave_policies': lambda db: db.get_leave_policies(),
+        'get_leave_balances': lambda db: db.get_leave_balances(emp, day.year),
+        'approve_leave_requests(rolled back)': approve_rolled_back,
+    }
+
+
+def write_cases(ctx):
+    # each case is a write plus the call that undoes it, so repeats see the same data
+    emp = ctx['employee_id']
+
+    def assignment(db):
+        db.add_shift_assignment(ctx['schedule_id'], emp, 1, ctx['day'])
+        row = db.execute_query("SELECT MAX(assignment_id) FROM ShiftAssignments")
+        db.delete_shift_assignment(row[0][0])
+
+    def schedule(db):
+        db.create_weekly_schedule(ctx['start'] - timedelta(days=7000), ctx['start'] - timedelta(days=6994))
+        db.execute_query("DELETE FROM WeeklySchedules WHERE start_date = ?",
+                         (ctx['start'] - timedelta(days=7000),), fetch=False)
+
+    def leave(db):
+        # submit and approve move days into LeaveBalances; the employee's rows are put back
+        balances = db.execute_query("""
+        SELECT employee_id, leave_type_id, year, carried_over, used, pending
+        FROM LeaveBalances WHERE employee_id = ?
+        """, (emp,))
+        db.submit_leave_request(emp, 1, ctx['start'], ctx['start'])
+        row = db.execute_query("SELECT MAX(request_id) FROM LeaveRequests")
+        db.approve_leave_request(row[0][0])
+        db.execute_query("DELETE FROM LeaveRequests WHERE request_id = ?", (row[0][0],), fetch=False)
+        db.execute_query("DELETE FROM LeaveBalances WHERE employee_id = ?", (emp,), fetch=False)
+        for balance in balances:
+            db.execute_query("""
+            INSERT INTO LeaveBalances (employee_id, leave_type_id, year, carried_over, used, pending)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, tuple(balance), fetch=False)
+
+    def punches(db):
+        # clock_in writes today's date; the events and their projection are removed afterwards
+        db.clock_in(emp)
+        db.start_break(emp)
+        db.end_break(emp)
+        db.clock_out(emp)
+        db.project_clock_events()
+        db.execute_query("DELETE FROM ClockEvents WHERE employee_id = ? AND work_date = ?",
+                         (emp, date.today()), fetch=False)
+        db.execute_query("DELETE bl FROM BreakLogs bl JOIN AttendanceLogs al ON bl.log_id = al.log_id "
+                         "WHERE al.employee_id = ? AND al.date = ?", (emp, date.today()), fetch=False)
+        db.execute_query("DELETE FROM AttendanceLogs WHERE employee_id = ? AND date = ?",
+                         (emp, date.today()), fetch=False)
+
+    return {
+        'add+delete_shift_assignment': assignment,
+        'create_weekly_schedule': schedule,
+        'submit+approve_leave_request': leave,
+        'clock_in+break+clock_out': punches,
+    }
+
+
+def time_case(db, func, repeat):
+    samples = []
+    rows = 0
+    func(db)  # warm the plan cache
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = _count(func(db))
+        samples.append((time.perf_counter() - started) * 1000)
+    return dict(summarize(samples), rows=rows)
+
+
+def run_scale(args, employees):
+    data = generate(employees, args.weeks, args.seed)
+    db = DatabaseManager(server=args.server, database=args.database)
+    if not db.connect():
+        raise SystemExit('could not connect to the bench database')
+    try:
+        load(db, data)
+        ctx = bench_context(data)
+        results = {}
+        for name, func in {**read_cases(ctx), **write_cases(ctx)}.items():
+            results[name] = time_case(db, func, args.repeat)
+            print(f"  {name:38s} median {results[name]['median_ms']:9.2f} ms  "
+                  f"p95 {results[name]['p95_ms']:9.2f} ms  rows {results[name]['rows']}")
+        return results
+    finally:
+        db.disconnect()
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DatabaseManager benchmark suite')
+    parser.add_argument('--scales', default='100,1000,10000', help='comma-separated employee counts')
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--server', default='localhost\\SQLEXPRESS')
+    parser.add_argument('--database', default='DBPROJECT_BENCH')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/db_manager-<timestamp>.json)')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='flag methods whose median grew by more than this factor')
+    args = parser.parse_args()
+
+    if args.database == 'DBPROJECT':
+        parser.error('refusing to overwrite the application database')
+
+    create_database(args.server, args.database, sample_data=False)
+    results = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'weeks': args.weeks,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for employees in [int(s) for s in args.scales.split(',')]:
+        print(f"{employees} employees, {args.weeks} weeks")
+        results['scales'][str(employees)] = run_scale(args, employees)
+
+    write_results(results, 'db_manager', args.output)
+
+    if args.baseline:
+        check_baseline(results, args.baseline, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Labor-rule engine benchmarks on full-site weeks.
+
+    python -m benchmarks.bench_labor_rules --scales 1000,10000,100000
+
+Each scale generates benchmarks.datagen data for that many employees over two
+weeks and times, against the second week:
+  load          RuleEngine state for everything in the rule window
+  check         1000 single-assignment checks, as the scheduler makes them
+  build_week    checking and adding every assignment of the week in date order
+  recheck_week  the vectorized pass over the same assignments
+No database is involved; results use the bench_db_manager JSON layout.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import summarize, write_results, check_baseline
+from benchmarks.datagen import generate, DEFAULT_START
+from database import records
+from shifting_system import labor_rules
+
+
+def _timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def run_scale(employees, repeat, seed):
+    data = generate(employees, 2, seed)
+    shift_types = [records.ShiftType._make(row) for row in data['ShiftTypes']]
+    slots = [records.AssignmentSlot(a[2], a[3], a[4]) for a in data['ShiftAssignments']]
+    start = DEFAULT_START + timedelta(weeks=1)
+    end = start + timedelta(days=6)
+    first, last = labor_rules.window(start, end)
+    in_window = [s for s in slots if first <= s.assigned_date <= last]
+    before = [s for s in in_window if s.assigned_date < start]
+    week = sorted((s for s in in_window if start <= s.assigned_date <= end), key=lambda s: s.assigned_date)
+
+    rng = random.Random(seed)
+    candidates = [(rng.randint(1, employees), rng.choice(shift_types).shift_type_id,
+                   start + timedelta(days=rng.randrange(7))) for _ in range(1000)]
+    engine = labor_rules.RuleEngine(shift_types).load(in_window)
+
+    def build_week():
+        built = labor_rules.RuleEngine(shift_types).load(before)
+        for s in week:
+            built.check(s.employee_id, s.shift_type_id, s.assigned_date)
+            built.add(s.employee_id, s.shift_type_id, s.assigned_date)
+
+    results = {
+        'load': _timed(lambda: labor_rules.RuleEngine(shift_types).load(in_window), repeat),
+        'check': _timed(lambda: [engine.check(*c) for c in candidates], repeat),
+        'build_week': _timed(build_week, repeat),
+        'recheck_week': _timed(lambda: labor_rules.recheck(in_window, shift_types), repeat),
+    }
+    violations = labor_rules.recheck(in_window, shift_types)
+    print(f"  {len(week)} assignments this week, {len(in_window)} in the rule window, "
+          f"{len(violations)} violations")
+    for key, numbers in results.items():
+        print(f"  {key:20s} median {numbers['median_ms']:9.2f} ms  p95 {numbers['p95_ms']:9.2f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Labor-rule engine benchmarks')
+    parser.add_argument('--scales', default='1000,10000,100000', help='comma-separated employee counts')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/labor_rules-<timestamp>.json)')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for employees in [int(s) for s in args.scales.split(',')]:
+        print(f"{employees} employees")
+        results['scales'][str(employees)] = run_scale(employees, args.repeat, args.seed)
+
+    write_results(results, 'labor_rules', args.output)
+
+    if args.baseline:
+        check_baseline(results, args.baseline, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
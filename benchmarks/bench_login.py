@@ -0,0 +1,77 @@
+"""Sustained login throughput at a given PBKDF2 cost.
+
+Run from the repository root:
+    python -m benchmarks.bench_login --iterations 200000 --seconds 10
+
+Use the printed logins/sec to size HR_PASSWORD_ITERATIONS for shift-change
+bursts (e.g. 300 punches in the 5 minutes around 09:00 needs >= 1 login/sec
+per terminal sharing this machine).
+"""
+import argparse
+import os
+import time
+
+from utils.passwords import PasswordHasher, hash_password, DEFAULT_ITERATIONS
+
+
+def run(iterations, workers, seconds, with_db):
+    hasher = PasswordHasher(iterations=iterations, workers=workers)
+    stored = hash_password('correct horse', iterations)
+
+    db = None
+    if with_db:
+        from database.db_manager import DatabaseManager
+        db = DatabaseManager()
+        if not db.connect():
+            raise SystemExit('could not connect to the database')
+
+    in_flight = set()
+    completed = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        # keep two requests queued per worker so the pool never idles
+        while len(in_flight) < hasher.workers * 2:
+            if db:
+                record = db.get_login_record('jdoe')
+                target = record.password if record else None
+            else:
+                target = stored
+            submitted = time.perf_counter()
+            future = hasher.submit_verify('correct horse', target)
+            future.submitted = submitted
+            in_flight.add(future)
+        done = [f for f in in_flight if f.done()]
+        for f in done:
+            in_flight.discard(f)
+            latencies.append(time.perf_counter() - f.submitted)
+            completed += 1
+        if not done:
+            time.sleep(0.0005)
+    elapsed = time.perf_counter() - started
+    hasher.shutdown()
+    if db:
+        db.disconnect()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f"iterations={iterations} workers={hasher.workers} "
+          f"logins={completed} elapsed={elapsed:.2f}s")
+    print(f"throughput={completed / elapsed:.1f} logins/sec p50={p50:.1f}ms p99={p99:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--with-db', action='store_true',
+                        help='include the username lookup against the configured database')
+    args = parser.parse_args()
+    run(args.iterations, args.workers, args.seconds, args.with_db)
+
+
+if __name__ == '__main__':
+    main()
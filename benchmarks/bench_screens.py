@@ -0,0 +1,163 @@
+"""Headless render benchmarks for every screen.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_screens --scales 100,10000,100000
+
+Each screen is built against benchmarks.fake_db at each scale (number of
+employees) and timed in three separate phases:
+  construct  - __init__ with the fake returning no rows (widgets and layout only)
+  load       - each data-loading method with the full data set
+  repaint    - rendering the populated screen into a pixmap
+Results use the same JSON layout as bench_db_manager, so --baseline works the same.
+"""
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import argparse
+import time
+from datetime import datetime
+
+from PyQt5.QtCore import QDate
+from PyQt5.QtWidgets import QApplication
+
+from admin.employee_management import EmployeeManagement
+from attendance_system.leave_request_form import LeaveRequestForm
+from attendance_system.manager_attendance_report import ManagerAttendanceReport, LeaveRequestDialog
+from attendance_system.occupancy_board import OccupancyBoard
+from attendance_system.time_clock_dashboard import TimeClockDashboard
+from benchmarks.common import summarize, write_results, check_baseline
+from benchmarks.fake_db import FakeDatabaseManager
+from shifting_system.coverage_heatmap import CoverageHeatmap
+from shifting_system.employee_roster_view import EmployeeRosterView
+from shifting_system.manager_dashboard import ManagerDashboard
+from shifting_system.scheduler_interface import SchedulerInterface
+
+
+def screens(ctx):
+    # name -> (factory, {phase name: load callable})
+    return {
+        'ManagerAttendanceReport': (
+            lambda db: ManagerAttendanceReport(db, ctx['user']),
+            {'load_report': lambda w: (w.date_picker.blockSignals(True),
+                                       w.date_picker.setDate(QDate(ctx['day'])),
+                                       w.date_picker.blockSignals(False),
+                                       w.load_report())}),
+        'EmployeeManagement': (
+            lambda db: EmployeeManagement(db, ctx['user']),
+            {'load_employees': lambda w: w.load_employees(),
+             'load_user_accounts': lambda w: w.load_user_accounts()}),
+        'SchedulerInterface': (
+            lambda db: SchedulerInterface(db, ctx['user']),
+            {'load_employees': lambda w: w.load_employees(),
+             'load_schedule': lambda w: w.load_schedule(ctx['schedule_id'])}),
+        'ManagerDashboard': (
+            lambda db: ManagerDashboard(db, ctx['user']),
+            {'load_schedules': lambda w: w.load_schedules()}),
+        'LeaveRequestDialog': (
+            lambda db: LeaveRequestDialog(db),
+            {'load_requests': lambda w: w.load_requests()}),
+        'EmployeeRosterView': (
+            lambda db: EmployeeRosterView(db, ctx['user']),
+            {'load_shifts': lambda w: w.load_shifts()}),
+        'LeaveRequestForm': (
+            lambda db: LeaveRequestForm(db, ctx['user']),
+            {'load_requests': lambda w: w.load_requests()}),
+        'TimeClockDashboard': (
+            lambda db: TimeClockDashboard(db, ctx['user']),
+            {'refresh_view': lambda w: w.refresh_view()}),
+        'CoverageHeatmap': (
+            lambda db: CoverageHeatmap(db, ctx['user']),
+            {'load_coverage': lambda w: (w.start_date.setDate(QDate(ctx['day'])), w.load_coverage())}),
+        'OccupancyBoard': (
+            lambda db: OccupancyBoard(db, ctx['user']),
+            {'refresh': lambda w: (w.model.reset(None), w.model.refresh(ctx['day']), w.render())}),
+    }
+
+
+def _timed(func, repeat, budget):
+    # stop repeating once a phase has used its time budget; screens that create a
+    # widget per row can take minutes at 100k rows
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+        if sum(samples) > budget * 1000:
+            break
+    return summarize(samples)
+
+
+def run_scale(app, employees, repeat, budget):
+    db = FakeDatabaseManager(employees)
+    # a user with a punch, a shift and leave requests, on that punch's day, so the
+    # self-service screens render rows rather than their empty states
+    requesters = {r[1] for r in db.data['LeaveRequests']}
+    logs = [log for log in db.data['AttendanceLogs'] if log[1] in requesters] or db.data['AttendanceLogs']
+    log = logs[len(logs) // 2]
+    db.today = log[2]
+    ctx = {
+        'day': log[2],
+        'schedule_id': 1,
+        'user': {'user_id': log[1], 'employee_id': log[1], 'is_admin': True,
+                 'first_name': 'Bench', 'last_name': 'User'},
+    }
+
+    results = {}
+    for name, (factory, loads) in screens(ctx).items():
+        widgets = []
+
+        def construct():
+            db.empty = True
+            widgets.append(factory(db))
+            db.empty = False
+
+        results[f'{name}.construct'] = _timed(construct, repeat, budget)
+        widget = widgets[-1]
+        for phase, load in loads.items():
+            results[f'{name}.{phase}'] = _timed(lambda: load(widget), repeat, budget)
+
+        widget.resize(1200, 800)
+        widget.show()
+        app.processEvents()
+        results[f'{name}.repaint'] = _timed(widget.grab, repeat, budget)
+        widget.close()
+
+        for w in widgets:
+            w.deleteLater()
+        app.processEvents()
+
+    for key, numbers in results.items():
+        print(f"  {key:45s} median {numbers['median_ms']:9.2f} ms  p95 {numbers['p95_ms']:9.2f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offscreen Qt screen benchmarks')
+    parser.add_argument('--scales', default='100,10000,100000', help='comma-separated employee counts')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=30,
+                        help='seconds per phase after which no more repeats are run')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/screens-<timestamp>.json)')
+    parser.add_argument('--baseline', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    results = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'platform': app.platformName(),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for employees in [int(s) for s in args.scales.split(',')]:
+        print(f"{employees} employees")
+        results['scales'][str(employees)] = run_scale(app, employees, args.repeat, args.budget)
+
+    write_results(results, 'screens', args.output)
+
+    if args.baseline:
+        check_baseline(results, args.baseline, args.threshold)
+
+
+if __name__ == '__main__':
+    main()
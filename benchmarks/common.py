@@ -0,0 +1,45 @@
+import json
+import os
+import statistics
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'min_ms': round(samples[0], 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+    }
+
+
+def write_results(results, prefix, output=None):
+    output = output or os.path.join(RESULTS_DIR, f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+def compare(results, baseline, threshold):
+    # returns (scale, name, before_ms, after_ms, ratio) for medians that grew past threshold
+    regressions = []
+    for scale, methods in results['scales'].items():
+        for name, numbers in methods.items():
+            before = baseline.get('scales', {}).get(scale, {}).get(name)
+            if before and before['median_ms'] > 0:
+                ratio = numbers['median_ms'] / before['median_ms']
+                if ratio > threshold:
+                    regressions.append((scale, name, before['median_ms'], numbers['median_ms'], ratio))
+    return regressions
+
+
+def check_baseline(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        regressions = compare(results, json.load(f), threshold)
+    for scale, name, before, after, ratio in regressions:
+        print(f"REGRESSION {scale} {name}: {before:.2f} -> {after:.2f} ms ({ratio:.2f}x)")
+    if regressions:
+        raise SystemExit(1)
@@ -0,0 +1,210 @@
+"""Deterministic synthetic data for DatabaseManager benchmarks.
+
+    python -m benchmarks.datagen --employees 10000 --weeks 8 --database DBPROJECT_BENCH
+
+The same (employees, weeks, seed) always produces identical rows, so timings
+from different runs and branches are comparable.
+"""
+import argparse
+import random
+from datetime import date, datetime, time, timedelta
+
+from utils.passwords import hash_password
+
+DEFAULT_START = date(2025, 12, 1)  # a Monday, same week as the sample data
+BENCH_PASSWORD = 'password1'
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+               'Thomas', 'Sarah', 'Ahmet', 'Ayse', 'Mehmet', 'Fatma', 'Wei', 'Mei', 'Carlos', 'Sofia']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas',
+              'Taylor', 'Moore', 'Jackson', 'Yilmaz', 'Kaya', 'Demir', 'Chen', 'Wang', 'Silva']
+DEPARTMENTS = ['IT Department', 'HR Department', 'Logistics', 'Warehouse', 'Customer Service',
+               'Finance', 'Maintenance', 'Security', 'Packaging', 'Quality Control']
+JOB_TITLES = ['Software Engineer', 'HR Manager', 'Warehouse Supervisor', 'Picker', 'Packer',
+              'Forklift Operator', 'Agent', 'Accountant', 'Technician', 'Guard', 'Inspector']
+SKILLS = ['Python Programming', 'Project Management', 'First Aid Certified', 'Forklift License',
+          'Customer Support', 'Bookkeeping', 'Electrical', 'Quality Assurance']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+SHIFT_TYPES = [('Morning', time(9), time(17)), ('Night', time(18), time(2))]
+
+# table -> column list, in foreign-key load order
+COLUMNS = {
+    'WorkLocations': ['location_id', 'address'],
+    'Skills': ['skill_id', 'skill_name'],
+    'Departments': ['department_id', 'department_name', 'location_id'],
+    'JobTitles': ['job_id', 'title_name'],
+    'EmploymentTypes': ['type_id', 'type_name'],
+    'Employees': ['employee_id', 'first_name', 'last_name', 'department_id', 'job_id', 'type_id', 'skill_id'],
+    'UserAccounts': ['user_id', 'employee_id', 'username', 'password', 'is_admin'],
+    'ShiftTypes': ['shift_type_id', 'shift_name', 'start_time', 'end_time'],
+    'WeeklySchedules': ['schedule_id', 'start_date', 'end_date', 'is_published'],
+    'EmployeeAvailability': ['availability_id', 'employee_id', 'day_of_week', 'is_available'],
+    'ShiftAssignments': ['assignment_id', 'schedule_id', 'employee_id', 'shift_type_id', 'assigned_date'],
+    'LeaveTypes': ['leave_type_id', 'type_name'],
+    'LeaveRequests': ['request_id', 'employee_id', 'leave_type_id', 'start_date', 'end_date', 'is_approved'],
+    'LeavePolicies': ['policy_id', 'leave_type_id', 'days_per_year', 'accrues_monthly', 'max_carryover'],
+    'AttendanceLogs': ['log_id', 'employee_id', 'date', 'clock_in', 'clock_out'],
+    'BreakLogs': ['break_id', 'log_id', 'start_time', 'end_time'],
+    'ClockEvents': ['event_id', 'employee_id', 'ts', 'work_date', 'event_type'],
+}
+
+
+def _shift_time(base, minutes):
+    return (datetime.combine(date(2000, 1, 1), base) + timedelta(minutes=minutes)).time()
+
+
+def _punch_at(day, clock_in, t):
+    # a time earlier than the clock-in fell after midnight
+    return datetime.combine(day + timedelta(days=1) if t < clock_in else day, t)
+
+
+def generate(employees, weeks, seed=42, start=DEFAULT_START):
+    """Returns {table: rows} with explicit ids, ready for load()."""
+    rng = random.Random(seed)
+    # availability draws come from their own stream so the rest of the data stays as it was
+    spare_rng = random.Random(seed + 1)
+    data = {table: [] for table in COLUMNS}
+
+    data['WorkLocations'] = [(1, '123 Tech Park, Building A'), (2, '456 Industrial Rd, Warehouse 1'),
+                             (3, '789 Harbour St, Depot 3')]
+    data['Skills'] = [(i, name) for i, name in enumerate(SKILLS, 1)]
+    data['Departments'] = [(i, name, 1 + i % 3) for i, name in enumerate(DEPARTMENTS, 1)]
+    data['JobTitles'] = [(i, name) for i, name in enumerate(JOB_TITLES, 1)]
+    data['EmploymentTypes'] = [(1, 'Full-Time'), (2, 'Part-Time')]
+    data['ShiftTypes'] = [(i, name, s, e) for i, (name, s, e) in enumerate(SHIFT_TYPES, 1)]
+    data['LeaveTypes'] = [(1, 'Sick Leave'), (2, 'Vacation')]
+    data['LeavePolicies'] = [(1, 1, 10, 0, 0), (2, 2, 20, 1, 5)]
+
+    # department sizes follow a skewed distribution: a few large operational departments
+    dept_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(DEPARTMENTS))]
+    # one hash shared by every synthetic account; hashing 100k passwords would dominate setup
+    password = hash_password(BENCH_PASSWORD, salt=b'benchmark-salt!!')
+
+    profiles = []
+    for emp_id in range(1, employees + 1):
+        dept_id = rng.choices(range(1, len(DEPARTMENTS) + 1), dept_weights)[0]
+        type_id = 1 if rng.random() < 0.75 else 2
+        skill_id = rng.randint(1, len(SKILLS)) if rng.random() < 0.85 else None
+        data['Employees'].append((emp_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), dept_id,
+                                  rng.randint(1, len(JOB_TITLES)), type_id, skill_id))
+        if rng.random() < 0.9:
+            data['UserAccounts'].append((emp_id, emp_id, f'user{emp_id:06d}', password,
+                                         1 if rng.random() < 0.03 else 0))
+
+        # part-timers work 3 days, full-timers 5; a fifth of the workforce works nights
+        days_per_week = 5 if type_id == 1 else 3
+        workdays = sorted(rng.sample(range(7), days_per_week))
+        shift_type_id = 2 if rng.random() < 0.2 else 1
+        profiles.append((emp_id, workdays, shift_type_id))
+        # available on every workday and on about half the other days, so swaps find cover
+        for day in range(7):
+            available = day in workdays or spare_rng.random() < 0.5
+            data['EmployeeAvailability'].append((len(data['EmployeeAvailability']) + 1, emp_id,
+                                                 WEEKDAYS[day], 1 if available else 0))
+
+    # leave: on average ~2 requests a year per employee, 1-10 days, mostly approved
+    leave_days = {}
+    expected_requests = employees * 2 * weeks / 52
+    for request_id in range(1, int(expected_requests) + 1):
+        emp_id = rng.randint(1, employees)
+        first = start + timedelta(days=rng.randrange(weeks * 7))
+        last = first + timedelta(days=rng.choice([1, 1, 2, 3, 5, 7, 10]) - 1)
+        approved = 1 if rng.random() < 0.8 else 0
+        data['LeaveRequests'].append((request_id, emp_id, 1 if rng.random() < 0.35 else 2, first, last, approved))
+        if approved:
+            day = first
+            while day <= last:
+                leave_days.setdefault(emp_id, set()).add(day)
+                day += timedelta(days=1)
+
+    shifts = {shift_id: (s, e) for shift_id, _, s, e in data['ShiftTypes']}
+    for week in range(weeks):
+        week_start = start + timedelta(weeks=week)
+        schedule_id = week + 1
+        data['WeeklySchedules'].append((schedule_id, week_start, week_start + timedelta(days=6),
+                                        1 if week < weeks - 1 else 0))
+        for emp_id, workdays, shift_type_id in profiles:
+            for day in workdays:
+                assigned = week_start + timedelta(days=day)
+                data['ShiftAssignments'].append((len(data['ShiftAssignments']) + 1, schedule_id,
+                                                 emp_id, shift_type_id, assigned))
+                if assigned in leave_days.get(emp_id, ()) or rng.random() < 0.03:
+                    continue  # on leave or absent
+
+                # arrivals cluster a few minutes early; roughly 1 in 10 is late
+                shift_start, shift_end = shifts[shift_type_id]
+                clock_in = _shift_time(shift_start, round(rng.gauss(-5, 6)))
+                clock_out = _shift_time(shift_end, round(abs(rng.gauss(3, 8))))
+                log_id = len(data['AttendanceLogs']) + 1
+                data['AttendanceLogs'].append((log_id, emp_id, assigned, clock_in, clock_out))
+
+                # the punch events the attendance rows are a projection of
+                punches = [(clock_in, 0)]
+                if rng.random() < 0.9:
+                    break_start = _shift_time(shift_start, 180 + rng.randint(0, 120))
+                    break_end = _shift_time(break_start, max(5, round(rng.gauss(30, 8))))
+                    data['BreakLogs'].append((len(data['BreakLogs']) + 1, log_id, break_start, break_end))
+                    punches += [(break_start, 2), (break_end, 3)]
+                punches.append((clock_out, 1))
+                for t, event_type in punches:
+                    data['ClockEvents'].append((len(data['ClockEvents']) + 1, emp_id,
+                                                _punch_at(assigned, clock_in, t), assigned, event_type))
+    return data
+
+
+def load(db_manager, data):
+    """Replaces every row in the target database with data (keeps explicit ids)."""
+    cursor = db_manager.conn.cursor()
+    # LeaveBalances and the availability masks are derived, so they are emptied first and
+    # rebuilt from the loaded rows
+    for table in ['LeaveBalances', 'BreakLogsArchive', 'AttendanceLogsArchive', 'ClockEventsArchive',
+                  'AvailabilityOverrides', 'EmployeeAvailabilityMask'] + list(reversed(list(COLUMNS))):
+        cursor.execute(f"DELETE FROM {table}")
+    db_manager.conn.commit()
+
+    cursor.fast_executemany = True
+    for table, columns in COLUMNS.items():
+        rows = data[table]
+        if not rows:
+            continue
+        placeholders = ', '.join('?' * len(columns))
+        cursor.execute(f"SET IDENTITY_INSERT {table} ON")
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        cursor.execute(f"SET IDENTITY_INSERT {table} OFF")
+        db_manager.conn.commit()
+    # the loaded attendance rows already match the loaded events
+    cursor.execute("UPDATE ProjectionState SET watermark = MIN_ACTIVE_ROWVERSION() WHERE name = 'attendance'")
+    db_manager.conn.commit()
+    db_manager.rebuild_leave_balances()
+    db_manager.import_legacy_availability()
+
+
+def main():
+    from database.create_database import create_database
+    from database.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Load deterministic synthetic data into a database')
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--server', default='localhost\\SQLEXPRESS')
+    parser.add_argument('--database', default='DBPROJECT_BENCH')
+    args = parser.parse_args()
+
+    if args.database == 'DBPROJECT':
+        parser.error('refusing to overwrite the application database')
+
+    create_database(args.server, args.database, sample_data=False)
+    db = DatabaseManager(server=args.server, database=args.database)
+    if not db.connect():
+        raise SystemExit(1)
+    data = generate(args.employees, args.weeks, args.seed)
+    load(db, data)
+    db.disconnect()
+    print(', '.join(f"{table}={len(rows)}" for table, rows in data.items() if rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from benchmarks.datagen import generate
+from database import records
+from shifting_system import availability
+
+
+class FakeDatabaseManager:
+    """In-memory DatabaseManager built from benchmarks.datagen data.
+
+    Read methods return the same record types the real queries produce;
+    writes succeed without doing anything. Lookups are pre-indexed so the fake
+    costs next to nothing and screen timings measure the UI alone. The data is
+    dated around its own weeks, so setting today to one of its days makes the
+    screens that ask for date.today() get that day's rows instead.
+    """
+
+    def __init__(self, employees=100, weeks=1, seed=42):
+        self.data = generate(employees, weeks, seed)
+        self.empty = False
+        self.today = None  # the day date.today() stands for; None keeps the real date
+        self._index()
+
+    def _index(self):
+        d = self.data
+        departments = dict((row[0], row[1]) for row in d['Departments'])
+        jobs = dict(d['JobTitles'])
+        types = dict(d['EmploymentTypes'])
+        skills = dict(d['Skills'])
+        self.shift_types = {row[0]: records.ShiftType._make(row) for row in d['ShiftTypes']}
+        leave_types = dict(d['LeaveTypes'])
+        self.names = {row[0]: (row[1], row[2]) for row in d['Employees']}
+        self.profiles = [records.EmployeeProfile(*row[:4], row[6]) for row in d['Employees']]
+        # the masks import_legacy_availability() builds from the weekday rows
+        days_off = {}
+        for row in d['EmployeeAvailability']:
+            off = days_off.setdefault(row[1], set())
+            weekday = availability.weekday_index(row[2])
+            if not row[3] and weekday is not None:
+                off.add(weekday)
+        self.availability_masks = [records.AvailabilityMask(employee_id, availability.weekday_mask(days))
+                                   for employee_id, days in days_off.items()]
+        self.slots = {a[0]: records.AssignmentSlot(a[2], a[3], a[4]) for a in d['ShiftAssignments']}
+        self.department_of = {row[0]: row[3] or 0 for row in d['Employees']}
+        published = {row[0]: row[3] for row in d['WeeklySchedules']}
+
+        self.employees = [records.Employee(e[0], e[1], e[2], departments.get(e[3]), jobs.get(e[4]),
+                                           types.get(e[5]), skills.get(e[6])) for e in d['Employees']]
+        self.departments = [records.Department(row[0], row[1]) for row in d['Departments']]
+        self.job_titles = list(map(records.JobTitle._make, d['JobTitles']))
+        self.skills = list(map(records.Skill._make, d['Skills']))
+        self.employment_types = list(map(records.EmploymentType._make, d['EmploymentTypes']))
+        self.leave_types = list(map(records.LeaveType._make, d['LeaveTypes']))
+        self.leave_policies = [records.LeavePolicy(row[1], leave_types[row[1]], *row[2:])
+                               for row in d['LeavePolicies']]
+        self.schedules = sorted(map(records.WeeklySchedule._make, d['WeeklySchedules']),
+                                key=lambda row: row.start_date, reverse=True)
+
+        self.assignments = defaultdict(list)
+        self.employee_shifts = defaultdict(list)
+        self.day_shift = {}
+        for a in d['ShiftAssignments']:
+            shift = self.shift_types[a[3]]
+            first, last = self.names[a[2]]
+            self.assignments[a[1]].append(records.ShiftAssignment(a[0], a[4], first, last, shift.shift_name,
+                                                                  shift.start_time, shift.end_time))
+            self.employee_shifts[a[2]].append(records.EmployeeShift(a[4], shift.shift_name, shift.start_time,
+                                                                    shift.end_time, published[a[1]]))
+            self.day_shift[(a[2], a[4])] = records.TodayShift(a[0], shift.shift_name, shift.start_time,
+                                                              shift.end_time)
+        for rows in self.assignments.values():
+            rows.sort(key=lambda row: (row.assigned_date, row.start_time))
+        for rows in self.employee_shifts.values():
+            rows.sort(key=lambda row: row.assigned_date, reverse=True)
+
+        self.logs = {(log[1], log[2]): log for log in d['AttendanceLogs']}
+        locations = dict(d['WorkLocations'])
+        department_location = {row[0]: locations.get(row[2]) for row in d['Departments']}
+        self.floor_directory = [records.FloorEmployee(e[0], e[1], e[2], departments.get(e[3]),
+                                                      department_location.get(e[3])) for e in d['Employees']]
+
+        self.leave_requests = []
+        self.approved_leave = defaultdict(list)
+        for r in d['LeaveRequests']:
+            first, last = self.names[r[1]]
+            self.leave_requests.append((records.LeaveRequest(r[0], first, last, leave_types[r[2]], r[3], r[4], r[5],
+                                                             False), r[1]))
+            if r[5]:
+                self.approved_leave[r[1]].append(r)
+        self.leave_requests.sort(key=lambda item: (item[0].is_approved, -item[0].start_date.toordinal()))
+
+        with_accounts = {a[1] for a in d['UserAccounts']}
+        self.accounts = sorted((records.UserAccount(a[0], a[1], *self.names[a[1]], a[2], a[4])
+                                for a in d['UserAccounts']),
+                               key=lambda row: (row.last_name, row.first_name))
+        self.without_accounts = [records.EmployeeName(e[0], e[1], e[2]) for e in d['Employees']
+                                 if e[0] not in with_accounts]
+
+    def _rows(self, rows):
+        return [] if self.empty else rows
+
+    def _day(self, day=None):
+        if day is None or day == date.today():
+            return self.today or date.today()
+        return day
+
+    # connection
+    def connect(self):
+        return True
+
+    def disconnect(self):
+        pass
+
+    # reference data
+    def get_all_employees(self):
+        return self._rows(self.employees)
+
+    def get_departments(self):
+        return self._rows(self.departments)
+
+    def get_job_titles(self):
+        return self._rows(self.job_titles)
+
+    def get_skills(self):
+        return self._rows(self.skills)
+
+    def get_employment_types(self):
+        return self._rows(self.employment_types)
+
+    def get_leave_types(self):
+        return self._rows(self.leave_types)
+
+    def get_shift_types(self):
+        return self._rows(list(self.shift_types.values()))
+
+    # scheduling
+    def get_weekly_schedules(self):
+        return self._rows(self.schedules)
+
+    def get_shift_assignments(self, schedule_id):
+        return self._rows(self.assignments.get(schedule_id, []))
+
+    def get_employee_shifts(self, employee_id):
+        return self._rows(self.employee_shifts.get(employee_id, []))
+
+    # attendance
+    def get_today_shift(self, employee_id, today=None):
+        return None if self.empty else self.day_shift.get((employee_id, self._day(today)))
+
+    def get_attendance_log(self, employee_id, today=None):
+        log = None if self.empty else self.logs.get((employee_id, self._day(today)))
+        return records.AttendanceLog(log[0], log[3], log[4]) if log else None
+
+    def get_active_break(self, log_id):
+        return None
+    
+    def get_day_state(self, employee_id, day=None):
+        if self.empty:
+            return None
+        day = self._day(day)
+        shift = self.day_shift.get((employee_id, day))
+        log = self.logs.get((employee_id, day))
+        return records.DayState(shift.shift_name if shift else None, shift.start_time if shift else None,
+                                shift.end_time if shift else None, log[0] if log else None,
+                                log[3] if log else None, log[4] if log else None, None)
+    
+    def clock_in(self, employee_id):
+        return records.PUNCH_OK
+    
+    def clock_out(self, employee_id):
+        return records.PUNCH_OK
+    
+    def start_break(self, employee_id):
+        return records.PUNCH_OK
+    
+    def end_break(self, employee_id):
+        return records.PUNCH_OK
+
+    def get_signed_in_employees(self, today=None):
+        return []
+
+    def get_assignment_slots(self, start_date, end_date):
+        if self.empty:
+            return []
+        return [records.AssignmentSlot(a[2], a[3], a[4]) for a in self.data['ShiftAssignments']
+                if start_date <= a[4] <= end_date]
+    
+    def get_assignment_slot(self, assignment_id):
+        return None if self.empty else self.slots.get(assignment_id)
+    
+    def get_employee_profiles(self):
+        return self._rows(self.profiles)
+    
+    def get_availability_masks(self, employee_id=None):
+        if employee_id:
+            return self._rows([row for row in self.availability_masks if row.employee_id == employee_id])
+        return self._rows(self.availability_masks)
+    
+    def get_availability_overrides(self, start_date, end_date, employee_id=None):
+        return []
+    
+    def get_coverage_counts(self, start_date, end_date):
+        if self.empty:
+            return []
+        on_leave = {(r[1], r[3] + timedelta(days=i)) for rows in self.approved_leave.values()
+                    for r in rows for i in range((r[4] - r[3]).days + 1)}
+        counts = defaultdict(lambda: [0, 0])
+        for a in self.data['ShiftAssignments']:
+            if start_date <= a[4] <= end_date:
+                count = counts[((a[4] - start_date).days, a[3], self.department_of[a[2]])]
+                count[0] += 1
+                count[1] += (a[2], a[4]) in on_leave
+        return [records.CoverageCount(*key, *count) for key, count in counts.items()]
+    
+    def get_coverage_leave(self, start_date, end_date):
+        if self.empty:
+            return []
+        return [records.CoverageLeave(r[1], self.department_of[r[1]], (max(r[3], start_date) - start_date).days,
+                                      (min(r[4], end_date) - start_date).days)
+                for rows in self.approved_leave.values() for r in rows
+                if r[3] <= end_date and r[4] >= start_date]
+    
+    def get_floor_directory(self):
+        return self._rows(self.floor_directory)
+
+    def get_floor_watermark(self):
+        return 0
+
+    def get_floor_changes(self, since=None, today=None):
+        # nothing ever changes in the fake, so only the first load returns rows
+        if self.empty or since is not None:
+            return []
+        today = self._day(today)
+        return [records.FloorState(log[0], log[1], log[3], log[4], False)
+                for (employee_id, day), log in self.logs.items() if day == today]
+
+    def get_attendance_report(self, report_date=None, department_id=None):
+        if self.empty:
+            return []
+        report_date = self._day(report_date)
+        rows = []
+        for employee_id, (first, last) in self.names.items():
+            shift = self.day_shift.get((employee_id, report_date))
+            leave = next((r[2] for r in self.approved_leave.get(employee_id, ())
+                          if r[3] <= report_date <= r[4]), None)
+            if not shift and not leave:
+                continue
+            log = self.logs.get((employee_id, report_date))
+            clock_in = log[3] if log else None
+            if clock_in is None:
+                status = 'Absent'
+            elif shift and clock_in > shift.start_time:
+                status = 'Late'
+            else:
+                status = 'On Time'
+            rows.append(records.AttendanceReportRow(employee_id, first, last,
+                                                    shift.start_time if shift else None,
+                                                    shift.end_time if shift else None,
+                                                    clock_in, log[4] if log else None, status, leave))
+        rows.sort(key=lambda row: (row.last_name, row.first_name))
+        return rows
+
+    # leave
+    def get_leave_policies(self):
+        return self._rows(self.leave_policies)
+
+    def get_leave_balances(self, employee_id, year=None):
+        year = year or self._day().year
+        return self._rows([records.LeaveBalance(p.leave_type_id, p.type_name, year, 0, 0, 0)
+                           for p in self.leave_policies])
+
+    def get_leave_requests(self, employee_id=None):
+        if employee_id:
+            return self._rows([r for r, owner in self.leave_requests if owner == employee_id])
+        return self._rows([r for r, _ in self.leave_requests])
+
+    # accounts
+    def get_all_user_accounts(self):
+        return self._rows(self.accounts)
+
+    def get_employees_without_accounts(self):
+        return self._rows(self.without_accounts)
+
+    def check_username_exists(self, username):
+        return False
+
+    def __getattr__(self, name):
+        # any write method: succeed without changing anything
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: True
@@ -0,0 +1,192 @@
+"""Query-plan regression checks for the SQL in DatabaseManager.
+
+    python -m benchmarks.query_plans --employees 20000 --update-baseline   # record
+    python -m benchmarks.query_plans --employees 20000                     # check
+
+Every read method is run against DBPROJECT_BENCH filled with benchmarks.datagen
+data, with SET STATISTICS XML/IO on. For each statement the actual plan's scans
+and lookups and the logical reads per table are stored. A check run fails when a
+statement gains a scan (table, clustered index or non-clustered index) or a
+key/RID lookup the baseline did not have, or when its logical reads grow past
+--threshold.
+"""
+import argparse
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+import pyodbc
+
+from benchmarks.bench_db_manager import bench_context, read_cases
+from benchmarks.datagen import generate, load
+from database.create_database import create_database
+from database.db_manager import DatabaseManager
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_plans_baseline.json')
+SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+SCAN_OPS = {'Table Scan', 'Clustered Index Scan', 'Index Scan'}
+LOOKUP_OPS = {'Key Lookup', 'RID Lookup'}
+IO_MESSAGE = re.compile(r"Table '([^']+)'\. Scan count (\d+), logical reads (\d+)")
+# system and temp objects are not interesting
+IGNORED_TABLES = ('#', 'Worktable', 'Workfile')
+
+
+class PlanCapturingDatabaseManager(DatabaseManager):
+    """Runs every fetching query with actual-plan and IO statistics and keeps them."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.captured = []
+
+    def execute_query(self, query, params=None, fetch=True, columnar=None, record_type=None):
+        if not fetch or columnar:
+            return super().execute_query(query, params, fetch, columnar, record_type)
+
+        cursor = self.conn.cursor()
+        cursor.execute("SET STATISTICS XML ON; SET STATISTICS IO ON;")
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            rows = cursor.fetchall()
+            messages = list(cursor.messages or [])
+            plans = []
+            while cursor.nextset():
+                messages.extend(cursor.messages or [])
+                try:
+                    plans.extend(row[0] for row in cursor.fetchall())
+                except pyodbc.ProgrammingError:
+                    pass  # a result without columns (e.g. DECLARE)
+        finally:
+            cursor.execute("SET STATISTICS XML OFF; SET STATISTICS IO OFF;")
+
+        self.captured.append(analyze(query, plans, messages))
+        return list(map(record_type._make, rows)) if record_type else rows
+
+
+def analyze(query, plans, messages):
+    operators = []
+    cost = 0.0
+    for plan in plans:
+        root = ET.fromstring(plan)
+        for stmt in root.iter(f'{SHOWPLAN_NS}StmtSimple'):
+            cost += float(stmt.get('StatementSubTreeCost') or 0)
+        for relop in root.iter(f'{SHOWPLAN_NS}RelOp'):
+            op = relop.get('PhysicalOp')
+            if op not in SCAN_OPS | LOOKUP_OPS:
+                continue
+            obj = relop.find(f'.//{SHOWPLAN_NS}Object')
+            table = (obj.get('Table') or '').strip('[]') if obj is not None else ''
+            index = (obj.get('Index') or '').strip('[]') if obj is not None else ''
+            if table.startswith(IGNORED_TABLES) or not table:
+                continue
+            operators.append({'op': op, 'table': table, 'index': index,
+                              'estimated_rows': float(relop.get('EstimateRows') or 0)})
+
+    reads = {}
+    for _, text in messages:
+        for table, _, logical in IO_MESSAGE.findall(text):
+            if not table.startswith(IGNORED_TABLES):
+                reads[table] = reads.get(table, 0) + int(logical)
+
+    return {
+        'sql': ' '.join(query.split())[:200],
+        'estimated_cost': round(cost, 4),
+        'scans': sorted({f"{o['op']} {o['table']}.{o['index']}".rstrip('.') for o in operators
+                         if o['op'] in SCAN_OPS}),
+        'lookups': sorted({f"{o['op']} {o['table']}.{o['index']}".rstrip('.') for o in operators
+                           if o['op'] in LOOKUP_OPS}),
+        'logical_reads': reads,
+    }
+
+
+def capture(db, data):
+    ctx = bench_context(data)
+    results = {}
+    for name, func in read_cases(ctx).items():
+        if name.startswith('iter_'):
+            continue  # streamed through their own cursor, checked via the exporter
+        db.captured = []
+        func(db)
+        results[name] = db.captured
+    return results
+
+
+def check(results, baseline, threshold):
+    problems = []
+    for name, statements in results.items():
+        before = baseline.get(name)
+        if before is None:
+            problems.append(f"{name}: no baseline (run with --update-baseline)")
+            continue
+        for i, stmt in enumerate(statements):
+            old = before[i] if i < len(before) else {'scans': [], 'lookups': [], 'logical_reads': {}}
+            for scan in set(stmt['scans']) - set(old['scans']):
+                problems.append(f"{name}: new {scan}")
+            for lookup in set(stmt['lookups']) - set(old['lookups']):
+                problems.append(f"{name}: new {lookup}")
+            for table, reads in stmt['logical_reads'].items():
+                old_reads = old['logical_reads'].get(table, 0)
+                if reads > max(old_reads * threshold, old_reads + 8):
+                    problems.append(f"{name}: logical reads on {table} {old_reads} -> {reads}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query-plan regression checks for DatabaseManager')
+    parser.add_argument('--employees', type=int, default=20000)
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--server', default='localhost\\SQLEXPRESS')
+    parser.add_argument('--database', default='DBPROJECT_BENCH')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='flag statements whose logical reads grew by more than this factor')
+    parser.add_argument('--skip-load', action='store_true', help='reuse the data already in the bench database')
+    args = parser.parse_args()
+
+    if args.database == 'DBPROJECT':
+        parser.error('refusing to overwrite the application database')
+
+    data = generate(args.employees, args.weeks, args.seed)
+    db = PlanCapturingDatabaseManager(server=args.server, database=args.database)
+    if not args.skip_load:
+        create_database(args.server, args.database, sample_data=False)
+    if not db.connect():
+        raise SystemExit('could not connect to the bench database')
+    try:
+        if not args.skip_load:
+            load(db, data)
+            db.execute_query("EXEC sp_updatestats", fetch=False)
+        results = capture(db, data)
+    finally:
+        db.disconnect()
+
+    for name, statements in results.items():
+        for stmt in statements:
+            reads = sum(stmt['logical_reads'].values())
+            flags = ', '.join(stmt['scans'] + stmt['lookups']) or 'seeks only'
+            print(f"  {name:36s} reads {reads:8d}  cost {stmt['estimated_cost']:9.4f}  {flags}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        raise SystemExit(f"No baseline at {args.baseline}; run with --update-baseline first")
+    with open(args.baseline) as f:
+        problems = check(results, json.load(f), args.threshold)
+    for problem in problems:
+        print(f"PLAN REGRESSION {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("No plan regressions")
+
+
+if __name__ == '__main__':
+    main()
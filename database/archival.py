@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import threading
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+
+class ArchivalJob(threading.Thread):
+    """Background thread that moves closed months of attendance into the archive tables.
+
+    Uses its own DatabaseManager because pyodbc connections are not shared across threads.
+    """
+
+    def __init__(self, interval=6 * 3600, **db_kwargs):
+        super().__init__(name='attendance-archival', daemon=True)
+        self.interval = interval
+        self.db_kwargs = db_kwargs
+        self.stopped = threading.Event()
+
+    def run(self):
+        db = DatabaseManager(**self.db_kwargs)
+        if not db.connect():
+            return
+        try:
+            while not self.stopped.is_set():
+                run = db.archive_attendance()
+                if run.moved:
+                    print(f"Archived {run.moved} attendance log(s) before {run.before}")
+                self.stopped.wait(self.interval)
+        finally:
+            db.disconnect()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move closed months of attendance into the archive tables')
+    parser.add_argument('--before', type=date.fromisoformat,
+                        help='archive days before this date (default: first day of the current month)')
+    parser.add_argument('--server', default='localhost\\SQLEXPRESS')
+    parser.add_argument('--database', default='DBPROJECT')
+    args = parser.parse_args()
+
+    before = args.before or date.today().replace(day=1)
+    if before > date.today().replace(day=1):
+        parser.error('the current month must stay in the hot tables')
+
+    db = DatabaseManager(server=args.server, database=args.database)
+    if not db.connect():
+        sys.exit(1)
+    try:
+        run = db.archive_attendance(before)
+        # the cutoff stops short of days still taking punches or not yet projected
+        print(f"Archived {run.moved} attendance log(s) before {run.before or before}")
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
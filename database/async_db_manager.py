@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from database.connection_pool import DatabaseManagerPool
+from database.db_manager import DatabaseManager
+
+
+class AsyncDatabaseManager:
+    """asyncio variant of DatabaseManager with the same method set.
+
+    pyodbc has no async driver, so every call runs on a dedicated executor whose
+    workers each check out their own pooled connection. Independent queries can
+    therefore run concurrently with asyncio.gather:
+
+        db = AsyncDatabaseManager(pool_size=8)
+        await db.connect()
+        report = await db.get_attendance_report(d)
+    """
+
+    def __init__(self, pool_size=4, **db_kwargs):
+        self.pool = DatabaseManagerPool(pool_size, **db_kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='async-db')
+
+    @property
+    def size(self):
+        return self.pool.size
+
+    async def connect(self):
+        # open one connection up front so configuration errors surface immediately
+        try:
+            await self.run('get_departments')
+            return True
+        except Exception as e:
+            print(f"Database connection error: {e}")
+            return False
+
+    async def disconnect(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+        self.pool.close()
+
+    async def run(self, name, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self._call, name, args, kwargs))
+
+    def _call(self, name, args, kwargs):
+        with self.pool.manager() as db:
+            return getattr(db, name)(*args, **kwargs)
+
+    async def get_department_attendance_reports(self, report_date=None, department_ids=None):
+        # one query per department, all in flight at once (bounded by the pool size)
+        if department_ids is None:
+            department_ids = [dept[0] for dept in await self.get_departments() or []]
+        reports = await asyncio.gather(*(self.get_attendance_report(report_date, department_id=dept_id)
+                                         for dept_id in department_ids))
+        return dict(zip(department_ids, reports))
+
+    # async generators of row batches; each batch is one keyset page read on a worker,
+    # so no connection is held while the caller processes a batch
+    def iter_attendance_history(self, start_date, end_date, department_id=None, batch_size=5000):
+        return self._iter_pages('get_attendance_history_page', lambda row: (row.date, row.log_id),
+                                start_date, end_date, department_id, batch_size)
+
+    def iter_break_history(self, start_date, end_date, department_id=None, batch_size=5000):
+        return self._iter_pages('get_break_history_page', lambda row: (row.date, row.break_id),
+                                start_date, end_date, department_id, batch_size)
+
+    async def _iter_pages(self, name, key, start_date, end_date, department_id, batch_size):
+        after = None
+        while True:
+            rows = await self.run(name, start_date, end_date, department_id, after, batch_size)
+            if rows is None:
+                raise RuntimeError(f'{name} failed')
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            after = key(rows[-1])
+
+
+def _async_method(name):
+    async def method(self, *args, **kwargs):
+        return await self.run(name, *args, **kwargs)
+    method.__name__ = name
+    method.__qualname__ = f'AsyncDatabaseManager.{name}'
+    method.__doc__ = getattr(DatabaseManager, name).__doc__
+    return method
+
+
+# mirror every public DatabaseManager method; submit_login is the GUI's
+# future-based login and has no place in an async API (use authenticate_user),
+# and transaction() cannot span calls that may land on different pooled
+# connections (the multi-step methods such as add_employee_with_account can).
+# A generator would only start after its connection went back to the pool, so
+# those need hand-written versions above.
+for _name, _value in vars(DatabaseManager).items():
+    if (not _name.startswith('_') and callable(_value) and not inspect.isgeneratorfunction(_value)
+            and _name not in ('connect', 'disconnect', 'submit_login', 'transaction')
+            and not hasattr(AsyncDatabaseManager, _name)):
+        setattr(AsyncDatabaseManager, _name, _async_method(_name))
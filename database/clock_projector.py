@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+
+class ProjectionJob(threading.Thread):
+    """Background thread that folds new punch events into AttendanceLogs and BreakLogs.
+
+    Punches only append to ClockEvents, so this is the one writer of the attendance
+    tables. Uses its own DatabaseManager because pyodbc connections are not shared
+    across threads.
+    """
+
+    def __init__(self, interval=5, **db_kwargs):
+        super().__init__(name='clock-projection', daemon=True)
+        self.interval = interval
+        self.db_kwargs = db_kwargs
+        self.stopped = threading.Event()
+
+    def run(self):
+        db = DatabaseManager(**self.db_kwargs)
+        if not db.connect():
+            return
+        try:
+            while not self.stopped.is_set():
+                db.project_clock_events()
+                self.stopped.wait(self.interval)
+        finally:
+            db.disconnect()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fold new punch events into the attendance tables')
+    parser.add_argument('--interval', type=float, default=0,
+                        help='keep running, projecting every this many seconds (default: run once)')
+    parser.add_argument('--server', default='localhost\\SQLEXPRESS')
+    parser.add_argument('--database', default='DBPROJECT')
+    args = parser.parse_args()
+
+    if args.interval > 0:
+        job = ProjectionJob(args.interval, server=args.server, database=args.database)
+        job.start()
+        try:
+            job.join()
+        except KeyboardInterrupt:
+            job.stop()
+        return
+
+    db = DatabaseManager(server=args.server, database=args.database)
+    if not db.connect():
+        sys.exit(1)
+    try:
+        projected = db.project_clock_events()
+        if projected is None:
+            sys.exit(1)
+        print(f"Projected {projected} attendance session(s)")
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Column-at-a-time query results.
+
+execute_query(..., columnar='numpy') returns {column: numpy array} and
+columnar='arrow' returns a pyarrow Table instead of a list of rows. DATE
+columns become datetime64[D], DATETIME become datetime64[us] and TIME become
+timedelta64[us] since midnight; NULLs are NaT/NaN (nulls in Arrow).
+"""
+import importlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+MODES = ('numpy', 'arrow')
+
+
+def optional_import(name, feature):
+    # the module, or a RuntimeError naming the feature that needs it
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise RuntimeError(f"{feature} requires {name} (pip install {name})")
+
+
+def require(mode):
+    # fail before the query runs rather than after the rows are fetched
+    if mode not in MODES:
+        raise ValueError(f"columnar must be one of {', '.join(MODES)}, not {mode!r}")
+    optional_import('numpy', 'Columnar mode')
+    if mode == 'arrow':
+        optional_import('pyarrow', 'Columnar mode')
+
+
+def _since_midnight(value):
+    return timedelta(hours=value.hour, minutes=value.minute, seconds=value.second,
+                     microseconds=value.microsecond)
+
+
+def _numpy_column(np, values, type_code):
+    if type_code is datetime:
+        return np.array(values, dtype='datetime64[us]')
+    if type_code is date:
+        return np.array(values, dtype='datetime64[D]')
+    if type_code is time:
+        return np.array([None if v is None else _since_midnight(v) for v in values], dtype='timedelta64[us]')
+    has_null = any(v is None for v in values)
+    if type_code is bool:
+        return np.array(values, dtype='float64' if has_null else 'bool')
+    if type_code is int:
+        return np.array(values, dtype='float64' if has_null else 'int64')
+    if type_code in (float, Decimal):
+        return np.array(values, dtype='float64')
+    return np.array(values, dtype=object)
+
+
+def _arrow_column(pa, values, type_code):
+    if type_code is datetime:
+        return pa.array(values, type=pa.timestamp('us'))
+    if type_code is date:
+        return pa.array(values, type=pa.date32())
+    if type_code is time:
+        return pa.array([None if v is None else _since_midnight(v) for v in values], type=pa.duration('us'))
+    if type_code is bool:
+        return pa.array(values, type=pa.bool_())
+    if type_code is int:
+        return pa.array(values, type=pa.int64())
+    if type_code in (float, Decimal):
+        return pa.array([None if v is None else float(v) for v in values], type=pa.float64())
+    if type_code is str:
+        return pa.array(values, type=pa.string())
+    return pa.array(values)
+
+
+def to_columns(cursor, mode, batch_size=5000):
+    # rows are fetched a batch at a time and appended to per-column lists, so only
+    # one batch of row tuples is held on top of the columns being built
+    names = [column[0] for column in cursor.description]
+    types = [column[1] for column in cursor.description]
+    columns = [[] for _ in names]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for values, column in zip(zip(*rows), columns):
+            column.extend(values)
+
+    if mode == 'arrow':
+        import pyarrow as pa
+        arrays = [_arrow_column(pa, values, type_code) for values, type_code in zip(columns, types)]
+        return pa.Table.from_arrays(arrays, names=names)
+
+    import numpy as np
+    result = {}
+    for name, type_code in zip(names, types):
+        # each list is released as soon as its array is built
+        result[name] = _numpy_column(np, columns.pop(0), type_code)
+    return result
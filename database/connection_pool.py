@@ -0,0 +1,79 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+from database.db_manager import DatabaseManager
+from utils.passwords import PasswordHasher
+
+
+class DatabaseManagerPool:
+    """A fixed number of connected DatabaseManagers shared between worker threads.
+
+    pyodbc connections must not be used by two threads at once, so each worker
+    checks a whole manager out, uses it and hands it back.
+    """
+
+    def __init__(self, size=4, timeout=30, **db_kwargs):
+        self.size = size
+        self.timeout = timeout
+        self.db_kwargs = db_kwargs
+        self.password_hasher = db_kwargs.pop('password_hasher', None) or PasswordHasher()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._timeouts = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if not create:
+            try:
+                return self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f'No database connection free after {self.timeout}s')
+
+        db = DatabaseManager(password_hasher=self.password_hasher, **self.db_kwargs)
+        if not db.connect():
+            with self._lock:
+                self._created -= 1
+            raise ConnectionError('Failed to connect to database')
+        return db
+
+    def stats(self):
+        # connections open, idle and checked out, and acquires that gave up waiting
+        with self._lock:
+            created, timeouts = self._created, self._timeouts
+        idle = self._idle.qsize()
+        return {'size': self.size, 'open': created, 'idle': idle, 'in_use': created - idle, 'timeouts': timeouts}
+
+    def release(self, db):
+        self._idle.put(db)
+
+    @contextmanager
+    def manager(self):
+        db = self.acquire()
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def close(self):
+        while True:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            db.disconnect()
+            with self._lock:
+                self._created -= 1
+        self.password_hasher.shutdown()
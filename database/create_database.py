@@ -1,20 +1,28 @@
+import os
+import sys
+
 import pyodbc
 
-def create_database():
-    """Creates the database and all tables with sample data"""
+# allow running as a script from the database folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+def create_database(server='localhost\\SQLEXPRESS', database='DBPROJECT', sample_data=True):
+    """Creates the database and all tables, with sample data unless sample_data is False"""
     
     # Connect to SQL Server (without database)
     try:
         conn = pyodbc.connect(
             'DRIVER={ODBC Driver 17 for SQL Server};'
-            'SERVER=localhost\\SQLEXPRESS;'
+            f'SERVER={server};'
             'Trusted_Connection=yes;'
         )
         conn.autocommit = True
         cursor = conn.cursor()
         
         # Create database if not exists
-        cursor.execute("IF NOT EXISTS (SELECT * FROM sys.databases WHERE name = 'DBPROJECT') CREATE DATABASE DBPROJECT")
+        cursor.execute(f"IF NOT EXISTS (SELECT * FROM sys.databases WHERE name = '{database}') CREATE DATABASE [{database}]")
         print("Database created successfully!")
         
         conn.close()
@@ -22,8 +30,8 @@ def create_database():
         # Connect to the new database
         conn = pyodbc.connect(
             'DRIVER={ODBC Driver 17 for SQL Server};'
-            'SERVER=localhost\\SQLEXPRESS;'
-            'DATABASE=DBPROJECT;'
+            f'SERVER={server};'
+            f'DATABASE={database};'
             'Trusted_Connection=yes;'
         )
         cursor = conn.cursor()
@@ -64,7 +72,7 @@ def create_database():
                 user_id INT PRIMARY KEY IDENTITY(1,1),
                 employee_id INT UNIQUE REFERENCES Employees(employee_id),
                 username VARCHAR(50) UNIQUE NOT NULL,
-                password VARCHAR(50) NOT NULL,
+                password VARCHAR(255) NOT NULL,
                 is_admin BIT DEFAULT 0
             )""",
             """CREATE TABLE ShiftTypes (
@@ -88,6 +96,19 @@ def create_database():
                 day_of_week VARCHAR(10) NOT NULL,
                 is_available BIT DEFAULT 1
             )""",
+            # availability as bits (weekday x 4-hour slot, see AVAILABILITY_SLOTS in
+            # database/records.py); EmployeeAvailability is only read to import old rows
+            """CREATE TABLE EmployeeAvailabilityMask (
+                employee_id INT PRIMARY KEY REFERENCES Employees(employee_id),
+                mask BIGINT NOT NULL
+            )""",
+            # one date's slot bits, replacing the weekday's
+            """CREATE TABLE AvailabilityOverrides (
+                employee_id INT NOT NULL REFERENCES Employees(employee_id),
+                override_date DATE NOT NULL,
+                mask TINYINT NOT NULL,
+                CONSTRAINT PK_AvailabilityOverrides PRIMARY KEY (employee_id, override_date)
+            )""",
             """CREATE TABLE ShiftAssignments (
                 assignment_id INT PRIMARY KEY IDENTITY(1,1),
                 schedule_id INT REFERENCES WeeklySchedules(schedule_id),
@@ -110,24 +131,78 @@ def create_database():
                 -- Constraint
                 CONSTRAINT CK_LeaveRequests_Dates CHECK (start_date <= end_date)
             )""",
+            # entitlement per leave type; types without a policy are unlimited
+            """CREATE TABLE LeavePolicies (
+                policy_id INT PRIMARY KEY IDENTITY(1,1),
+                leave_type_id INT UNIQUE NOT NULL REFERENCES LeaveTypes(leave_type_id),
+                days_per_year DECIMAL(5,2) NOT NULL,
+                accrues_monthly BIT DEFAULT 0,
+                max_carryover DECIMAL(5,2) NOT NULL DEFAULT 0
+            )""",
+            # kept current by DatabaseManager, rebuilt by database/leave_accrual.py
+            """CREATE TABLE LeaveBalances (
+                employee_id INT NOT NULL REFERENCES Employees(employee_id),
+                leave_type_id INT NOT NULL REFERENCES LeaveTypes(leave_type_id),
+                year SMALLINT NOT NULL,
+                carried_over DECIMAL(5,2) NOT NULL DEFAULT 0,
+                used DECIMAL(5,2) NOT NULL DEFAULT 0,
+                pending DECIMAL(5,2) NOT NULL DEFAULT 0,
+                CONSTRAINT PK_LeaveBalances PRIMARY KEY (employee_id, leave_type_id, year)
+            )""",
+            # AttendanceLogs and BreakLogs are projections of ClockEvents, kept current by
+            # usp_ProjectClockEvents; a clock_out (or break end_time) earlier than its
+            # start means it fell after midnight
             """CREATE TABLE AttendanceLogs (
                 log_id INT PRIMARY KEY IDENTITY(1,1),
                 employee_id INT REFERENCES Employees(employee_id),
                 date DATE DEFAULT CAST(GETDATE() AS DATE),
                 clock_in TIME,
                 clock_out TIME
-
-                -- Constraint:
-                CONSTRAINT CK_Attendance_ValidTime CHECK (clock_out > clock_in)
             )""",
             """CREATE TABLE BreakLogs (
                 break_id INT PRIMARY KEY IDENTITY(1,1),
                 log_id INT REFERENCES AttendanceLogs(log_id),
                 start_time TIME NOT NULL,
                 end_time TIME
-
-                -- Constraint:
-                CONSTRAINT CK_Break_TimeOrder CHECK (end_time > start_time)
+            )""",
+            # every punch is one appended row (event_type is a CLOCK_* code from
+            # database/records.py); work_date is the day of the clock-in it belongs to
+            """CREATE TABLE ClockEvents (
+                event_id BIGINT IDENTITY(1,1) NOT NULL,
+                employee_id INT NOT NULL REFERENCES Employees(employee_id),
+                ts DATETIME2(3) NOT NULL,
+                work_date DATE NOT NULL,
+                event_type TINYINT NOT NULL,
+                row_version ROWVERSION,
+                CONSTRAINT PK_ClockEvents PRIMARY KEY NONCLUSTERED (event_id)
+            )""",
+            # how far each projection of ClockEvents has got, as a row version
+            """CREATE TABLE ProjectionState (
+                name VARCHAR(50) PRIMARY KEY,
+                watermark BINARY(8) NOT NULL
+            )""",
+            # closed months are moved here by DatabaseManager.archive_attendance();
+            # no IDENTITY or foreign keys so rows keep their ids and can be bulk-moved
+            """CREATE TABLE AttendanceLogsArchive (
+                log_id INT PRIMARY KEY NONCLUSTERED,
+                employee_id INT NOT NULL,
+                date DATE NOT NULL,
+                clock_in TIME,
+                clock_out TIME
+            )""",
+            """CREATE TABLE BreakLogsArchive (
+                break_id INT PRIMARY KEY NONCLUSTERED,
+                log_id INT NOT NULL,
+                start_time TIME NOT NULL,
+                end_time TIME
+            )""",
+            # the punch events of archived days; no row_version, they are never projected again
+            """CREATE TABLE ClockEventsArchive (
+                event_id BIGINT PRIMARY KEY NONCLUSTERED,
+                employee_id INT NOT NULL,
+                ts DATETIME2(3) NOT NULL,
+                work_date DATE NOT NULL,
+                event_type TINYINT NOT NULL
             )"""
         ]
         
@@ -138,6 +213,275 @@ def create_database():
             except Exception as e:
                 print(f"Table creation warning: {e}")
         
+        # Indexes and views
+        objects = [
+            "CREATE INDEX IX_AttendanceLogs_Date ON AttendanceLogs (date, employee_id) INCLUDE (clock_in, clock_out)",
+            "CREATE INDEX IX_BreakLogs_Log ON BreakLogs (log_id) INCLUDE (end_time)",
+            "CREATE INDEX IX_ShiftAssignments_Date ON ShiftAssignments (assigned_date, employee_id) INCLUDE (shift_type_id)",
+            "CREATE INDEX IX_ShiftAssignments_Schedule ON ShiftAssignments (schedule_id, assigned_date)",
+            "CREATE INDEX IX_ShiftAssignments_Employee ON ShiftAssignments (employee_id, assigned_date) INCLUDE (shift_type_id, schedule_id)",
+            "CREATE INDEX IX_LeaveRequests_Approved ON LeaveRequests (start_date, end_date) INCLUDE (employee_id, leave_type_id) WHERE is_approved = 1",
+            "CREATE INDEX IX_LeaveRequests_Employee ON LeaveRequests (employee_id, start_date) INCLUDE (end_date, is_approved, leave_type_id)",
+            "CREATE CLUSTERED INDEX IX_AttendanceLogsArchive_Date ON AttendanceLogsArchive (date, employee_id)",
+            # the occupancy board polls ClockEvents now; databases created before the punch
+            # event store had row versions on the projections
+            "IF INDEXPROPERTY(OBJECT_ID('AttendanceLogs'), 'IX_AttendanceLogs_RowVersion', 'IndexID') IS NOT NULL DROP INDEX IX_AttendanceLogs_RowVersion ON AttendanceLogs",
+            "IF INDEXPROPERTY(OBJECT_ID('BreakLogs'), 'IX_BreakLogs_RowVersion', 'IndexID') IS NOT NULL DROP INDEX IX_BreakLogs_RowVersion ON BreakLogs",
+            "IF COL_LENGTH('AttendanceLogs', 'row_version') IS NOT NULL ALTER TABLE AttendanceLogs DROP COLUMN row_version",
+            "IF COL_LENGTH('BreakLogs', 'row_version') IS NOT NULL ALTER TABLE BreakLogs DROP COLUMN row_version",
+            "IF COL_LENGTH('LeaveRequests', 'is_rejected') IS NULL ALTER TABLE LeaveRequests ADD is_rejected BIT NOT NULL DEFAULT 0",
+            "CREATE CLUSTERED INDEX IX_BreakLogsArchive_Log ON BreakLogsArchive (log_id)",
+            "CREATE CLUSTERED INDEX IX_ClockEventsArchive_WorkDate ON ClockEventsArchive (work_date, employee_id)",
+            # overnight shifts are stored now; databases created before the punch event store had these
+            "IF OBJECT_ID('CK_Attendance_ValidTime') IS NOT NULL ALTER TABLE AttendanceLogs DROP CONSTRAINT CK_Attendance_ValidTime",
+            "IF OBJECT_ID('CK_Break_TimeOrder') IS NOT NULL ALTER TABLE BreakLogs DROP CONSTRAINT CK_Break_TimeOrder",
+            # an employee's punches are contiguous, so each punch reads and appends within one range
+            "CREATE CLUSTERED INDEX IX_ClockEvents_Employee ON ClockEvents (employee_id, ts)",
+            "CREATE INDEX IX_ClockEvents_WorkDate ON ClockEvents (work_date) INCLUDE (ts, event_type)",
+            "CREATE INDEX IX_ClockEvents_RowVersion ON ClockEvents (row_version) INCLUDE (work_date)",
+            "IF NOT EXISTS (SELECT 1 FROM ProjectionState WHERE name = 'attendance') INSERT INTO ProjectionState (name, watermark) VALUES ('attendance', 0x0)",
+            # history = current (hot) rows + archived months
+            """CREATE VIEW AttendanceHistory AS
+                SELECT log_id, employee_id, date, clock_in, clock_out FROM AttendanceLogs
+                UNION ALL
+                SELECT log_id, employee_id, date, clock_in, clock_out FROM AttendanceLogsArchive""",
+            """CREATE VIEW BreakHistory AS
+                SELECT break_id, log_id, start_time, end_time FROM BreakLogs
+                UNION ALL
+                SELECT break_id, log_id, start_time, end_time FROM BreakLogsArchive"""
+        ]
+        
+        for object_sql in objects:
+            try:
+                cursor.execute(object_sql)
+                conn.commit()
+                print(f"Index/view created successfully!")
+            except Exception as e:
+                print(f"Index/view creation warning: {e}")
+        
+        # Punch procedures: each punch is one call with its checks done server-side and
+        # appends a single ClockEvents row. They return a single status row (see PUNCH_*
+        # in database/records.py). The open session is read from the employee's latest
+        # event; a session from yesterday that was never clocked out is still open while
+        # it can be a night shift (see ufn_OvernightSession), so night shifts clock out
+        # after midnight. One left open any longer stays open for a manager to fix.
+        procedures = [
+            # a row when yesterday's open session may still be running at @now: the
+            # employee's shift that day ends after midnight, or they clocked in less than
+            # a maximum shift length (16 hours) ago
+            """CREATE OR ALTER FUNCTION ufn_OvernightSession(@employee_id INT, @work_date DATE, @now DATETIME2(3))
+            RETURNS TABLE AS RETURN
+                SELECT 1 AS overnight
+                WHERE EXISTS (
+                    SELECT 1 FROM ShiftAssignments sa
+                    JOIN ShiftTypes st ON sa.shift_type_id = st.shift_type_id
+                    WHERE sa.employee_id = @employee_id AND sa.assigned_date = @work_date
+                      AND st.end_time < st.start_time)
+                OR EXISTS (
+                    SELECT 1 FROM ClockEvents
+                    WHERE employee_id = @employee_id AND work_date = @work_date AND event_type = 0
+                      AND ts >= CAST(@work_date AS DATETIME2) AND ts > DATEADD(HOUR, -16, @now))""",
+            """CREATE OR ALTER PROCEDURE usp_ClockIn @employee_id INT AS
+            BEGIN
+                SET NOCOUNT ON;
+                SET XACT_ABORT ON;
+                DECLARE @now DATETIME2(3) = SYSDATETIME(), @type TINYINT, @work_date DATE;
+                DECLARE @today DATE = CAST(@now AS DATE);
+                BEGIN TRAN;
+                -- the range lock only covers this employee's events
+                SELECT TOP 1 @type = event_type, @work_date = work_date
+                FROM ClockEvents WITH (UPDLOCK, HOLDLOCK)
+                WHERE employee_id = @employee_id ORDER BY ts DESC;
+                IF @type <> 1 AND @work_date = DATEADD(DAY, -1, @today)
+                   AND NOT EXISTS (SELECT 1 FROM ufn_OvernightSession(@employee_id, @work_date, @now))
+                    SELECT @type = NULL, @work_date = NULL;
+                IF @work_date = @today OR (@type <> 1 AND @work_date = DATEADD(DAY, -1, @today))
+                BEGIN
+                    COMMIT;
+                    SELECT 2 AS status;
+                    RETURN;
+                END
+                INSERT INTO ClockEvents (employee_id, ts, work_date, event_type) VALUES (@employee_id, @now, @today, 0);
+                COMMIT;
+                SELECT 0 AS status;
+            END""",
+            """CREATE OR ALTER PROCEDURE usp_ClockOut @employee_id INT AS
+            BEGIN
+                SET NOCOUNT ON;
+                SET XACT_ABORT ON;
+                DECLARE @now DATETIME2(3) = SYSDATETIME(), @type TINYINT, @work_date DATE;
+                DECLARE @today DATE = CAST(@now AS DATE);
+                BEGIN TRAN;
+                SELECT TOP 1 @type = event_type, @work_date = work_date
+                FROM ClockEvents WITH (UPDLOCK, HOLDLOCK)
+                WHERE employee_id = @employee_id ORDER BY ts DESC;
+                IF @type <> 1 AND @work_date = DATEADD(DAY, -1, @today)
+                   AND NOT EXISTS (SELECT 1 FROM ufn_OvernightSession(@employee_id, @work_date, @now))
+                    SELECT @type = NULL, @work_date = NULL;
+                IF @work_date IS NULL OR @work_date < DATEADD(DAY, -1, @today) OR @type = 1
+                BEGIN
+                    COMMIT;
+                    SELECT CASE WHEN @type = 1 AND @work_date = @today THEN 3 ELSE 1 END AS status;
+                    RETURN;
+                END
+                -- a break still open at clock-out ends with the shift (see usp_ProjectClockEvents)
+                INSERT INTO ClockEvents (employee_id, ts, work_date, event_type) VALUES (@employee_id, @now, @work_date, 1);
+                COMMIT;
+                SELECT 0 AS status;
+            END""",
+            """CREATE OR ALTER PROCEDURE usp_StartBreak @employee_id INT AS
+            BEGIN
+                SET NOCOUNT ON;
+                SET XACT_ABORT ON;
+                DECLARE @now DATETIME2(3) = SYSDATETIME(), @type TINYINT, @work_date DATE;
+                DECLARE @today DATE = CAST(@now AS DATE);
+                BEGIN TRAN;
+                SELECT TOP 1 @type = event_type, @work_date = work_date
+                FROM ClockEvents WITH (UPDLOCK, HOLDLOCK)
+                WHERE employee_id = @employee_id ORDER BY ts DESC;
+                IF @type <> 1 AND @work_date = DATEADD(DAY, -1, @today)
+                   AND NOT EXISTS (SELECT 1 FROM ufn_OvernightSession(@employee_id, @work_date, @now))
+                    SELECT @type = NULL, @work_date = NULL;
+                IF @work_date IS NULL OR @work_date < DATEADD(DAY, -1, @today) OR @type IN (1, 2)
+                BEGIN
+                    COMMIT;
+                    SELECT CASE WHEN @type = 2 AND @work_date >= DATEADD(DAY, -1, @today) THEN 4
+                                WHEN @type = 1 AND @work_date = @today THEN 3 ELSE 1 END AS status;
+                    RETURN;
+                END
+                INSERT INTO ClockEvents (employee_id, ts, work_date, event_type) VALUES (@employee_id, @now, @work_date, 2);
+                COMMIT;
+                SELECT 0 AS status;
+            END""",
+            """CREATE OR ALTER PROCEDURE usp_EndBreak @employee_id INT AS
+            BEGIN
+                SET NOCOUNT ON;
+                SET XACT_ABORT ON;
+                DECLARE @now DATETIME2(3) = SYSDATETIME(), @type TINYINT, @work_date DATE;
+                DECLARE @today DATE = CAST(@now AS DATE);
+                BEGIN TRAN;
+                SELECT TOP 1 @type = event_type, @work_date = work_date
+                FROM ClockEvents WITH (UPDLOCK, HOLDLOCK)
+                WHERE employee_id = @employee_id ORDER BY ts DESC;
+                IF @type <> 1 AND @work_date = DATEADD(DAY, -1, @today)
+                   AND NOT EXISTS (SELECT 1 FROM ufn_OvernightSession(@employee_id, @work_date, @now))
+                    SELECT @type = NULL, @work_date = NULL;
+                IF @work_date IS NULL OR @work_date < DATEADD(DAY, -1, @today) OR @type <> 2
+                BEGIN
+                    COMMIT;
+                    SELECT CASE WHEN @work_date = @today OR (@type <> 1 AND @work_date = DATEADD(DAY, -1, @today))
+                                THEN 5 ELSE 1 END AS status;
+                    RETURN;
+                END
+                INSERT INTO ClockEvents (employee_id, ts, work_date, event_type) VALUES (@employee_id, @now, @work_date, 3);
+                COMMIT;
+                SELECT 0 AS status;
+            END""",
+            # everything the time clock shows, in one round trip, straight from the events
+            # so a punch shows up before it is projected. log_id is the session's clock-in
+            # event and break_id its open break-start event.
+            """CREATE OR ALTER PROCEDURE usp_GetDayState @employee_id INT, @day DATE = NULL AS
+            BEGIN
+                SET NOCOUNT ON;
+                SET @day = ISNULL(@day, CAST(GETDATE() AS DATE));
+                DECLARE @type TINYINT, @work_date DATE, @now DATETIME2(3) = SYSDATETIME();
+                -- a past day is seen as it stood at its end
+                IF @now > DATEADD(DAY, 1, CAST(@day AS DATETIME2))
+                    SET @now = DATEADD(DAY, 1, CAST(@day AS DATETIME2));
+                SELECT TOP 1 @type = event_type, @work_date = work_date FROM ClockEvents
+                WHERE employee_id = @employee_id AND ts >= DATEADD(DAY, -1, CAST(@day AS DATETIME2))
+                  AND ts < DATEADD(DAY, 2, CAST(@day AS DATETIME2)) AND work_date <= @day
+                ORDER BY ts DESC;
+                -- yesterday's session only while it is still open and can be a night shift,
+                -- as the punch procedures see it
+                IF @work_date < @day AND (@type = 1 OR @work_date < DATEADD(DAY, -1, @day)
+                   OR NOT EXISTS (SELECT 1 FROM ufn_OvernightSession(@employee_id, @work_date, @now)))
+                    SET @work_date = NULL;
+                SELECT s.shift_name, s.start_time, s.end_time, ev.log_id, ev.clock_in, ev.clock_out,
+                       CASE WHEN @type = 2 THEN ev.last_event_id END AS break_id
+                FROM (VALUES (1)) AS one(x)
+                OUTER APPLY (
+                    SELECT TOP 1 st.shift_name, st.start_time, st.end_time
+                    FROM ShiftAssignments sa
+                    JOIN ShiftTypes st ON sa.shift_type_id = st.shift_type_id
+                    WHERE sa.employee_id = @employee_id AND sa.assigned_date = @day
+                    ORDER BY st.start_time
+                ) s
+                OUTER APPLY (
+                    SELECT MIN(CASE WHEN event_type = 0 THEN event_id END) AS log_id,
+                           CAST(MIN(CASE WHEN event_type = 0 THEN ts END) AS TIME) AS clock_in,
+                           CAST(MAX(CASE WHEN event_type = 1 THEN ts END) AS TIME) AS clock_out,
+                           MAX(event_id) AS last_event_id
+                    FROM ClockEvents
+                    WHERE employee_id = @employee_id AND work_date = @work_date
+                      AND ts >= CAST(@work_date AS DATETIME2) AND ts < DATEADD(DAY, 2, CAST(@work_date AS DATETIME2))
+                ) ev;
+            END""",
+            # folds events committed since the last run into AttendanceLogs and BreakLogs.
+            # Every (employee, work_date) touched is recomputed from its own events, so
+            # running twice over the same events changes nothing. Returns the number of
+            # sessions projected.
+            """CREATE OR ALTER PROCEDURE usp_ProjectClockEvents AS
+            BEGIN
+                SET NOCOUNT ON;
+                SET XACT_ABORT ON;
+                DECLARE @from BINARY(8), @upto BINARY(8) = MIN_ACTIVE_ROWVERSION();
+                BEGIN TRAN;
+                -- one projector at a time; punches never wait on this lock
+                SELECT @from = watermark FROM ProjectionState WITH (UPDLOCK, HOLDLOCK) WHERE name = 'attendance';
+                SELECT DISTINCT employee_id, work_date INTO #sessions
+                FROM ClockEvents WHERE row_version >= @from AND row_version < @upto;
+
+                SELECT s.employee_id, s.work_date, e.event_id, e.ts, e.event_type INTO #events
+                FROM #sessions s
+                JOIN ClockEvents e ON e.employee_id = s.employee_id AND e.work_date = s.work_date
+                 AND e.ts >= CAST(s.work_date AS DATETIME2) AND e.ts < DATEADD(DAY, 2, CAST(s.work_date AS DATETIME2));
+
+                MERGE AttendanceLogs AS al
+                USING (
+                    SELECT employee_id, work_date,
+                           CAST(MIN(CASE WHEN event_type = 0 THEN ts END) AS TIME) AS clock_in,
+                           CAST(MAX(CASE WHEN event_type = 1 THEN ts END) AS TIME) AS clock_out
+                    FROM #events GROUP BY employee_id, work_date
+                ) AS p ON al.employee_id = p.employee_id AND al.date = p.work_date
+                WHEN MATCHED AND EXISTS (SELECT al.clock_in, al.clock_out EXCEPT SELECT p.clock_in, p.clock_out)
+                    THEN UPDATE SET clock_in = p.clock_in, clock_out = p.clock_out
+                WHEN NOT MATCHED THEN INSERT (employee_id, date, clock_in, clock_out)
+                    VALUES (p.employee_id, p.work_date, p.clock_in, p.clock_out);
+
+                -- a break ends at the next break-end or clock-out of the session
+                MERGE BreakLogs AS bl
+                USING (
+                    SELECT al.log_id, CAST(b.ts AS TIME) AS start_time, CAST(x.ts AS TIME) AS end_time
+                    FROM #events b
+                    JOIN AttendanceLogs al ON al.employee_id = b.employee_id AND al.date = b.work_date
+                    OUTER APPLY (
+                        SELECT TOP 1 n.ts FROM #events n
+                        WHERE n.employee_id = b.employee_id AND n.work_date = b.work_date
+                          AND n.event_id > b.event_id AND n.event_type IN (1, 3)
+                        ORDER BY n.event_id
+                    ) x
+                    WHERE b.event_type = 2
+                ) AS p ON bl.log_id = p.log_id AND bl.start_time = p.start_time
+                WHEN MATCHED AND EXISTS (SELECT bl.end_time EXCEPT SELECT p.end_time)
+                    THEN UPDATE SET end_time = p.end_time
+                WHEN NOT MATCHED THEN INSERT (log_id, start_time, end_time)
+                    VALUES (p.log_id, p.start_time, p.end_time);
+
+                UPDATE ProjectionState SET watermark = @upto WHERE name = 'attendance';
+                COMMIT;
+                SELECT COUNT(*) AS projected FROM #sessions;
+            END"""
+        ]
+        
+        for procedure_sql in procedures:
+            try:
+                cursor.execute(procedure_sql)
+                conn.commit()
+                print(f"Procedure created successfully!")
+            except Exception as e:
+                print(f"Procedure creation warning: {e}")
+        
         # Insert sample data
         inserts = [
             "INSERT INTO WorkLocations (address) VALUES ('123 Tech Park, Building A'), ('456 Industrial Rd, Warehouse 1')",
@@ -153,10 +497,15 @@ def create_database():
             "INSERT INTO ShiftAssignments (schedule_id, employee_id, shift_type_id, assigned_date) VALUES (1, 1, 1, '2025-12-01'), (1, 2, 1, '2025-12-01'), (1, 3, 2, '2025-12-02')",
             "INSERT INTO LeaveTypes (type_name) VALUES ('Sick Leave'), ('Vacation')",
             "INSERT INTO LeaveRequests (employee_id, leave_type_id, start_date, end_date, is_approved) VALUES (1, 2, '2025-12-20', '2025-12-25', 1)",
+            "INSERT INTO LeavePolicies (leave_type_id, days_per_year, accrues_monthly, max_carryover) VALUES (1, 10, 0, 0), (2, 20, 1, 5)",
+            "INSERT INTO LeaveBalances (employee_id, leave_type_id, year, used) VALUES (1, 2, 2025, 4)",
             "INSERT INTO AttendanceLogs (employee_id, date, clock_in, clock_out) VALUES (1, '2025-12-01', '08:55:00', '17:05:00'), (2, '2025-12-01', '09:15:00', '17:00:00')",
             "INSERT INTO BreakLogs (log_id, start_time, end_time) VALUES (1, '12:30:00', '13:00:00')"
         ]
         
+        if not sample_data:
+            inserts = []
+        
         for insert_sql in inserts:
             try:
                 cursor.execute(insert_sql)
@@ -166,6 +515,14 @@ def create_database():
                 print(f"Insert warning: {e}")
         
         conn.close()
+        
+        # replace the plaintext sample passwords with salted hashes
+        db = DatabaseManager(server=server, database=database)
+        if db.connect():
+            print(f"Upgraded {db.upgrade_password_hashes()} password(s) to hashes")
+            db.import_legacy_availability()
+            db.disconnect()
+        
         print("\nDatabase setup completed successfully!")
         
     except Exception as e:
@@ -1,19 +1,34 @@
 import pyodbc
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, date, time
 
+from database import columnar as columnar_results
+from database import leave_accrual
+from database import records
+from utils.passwords import PasswordHasher, ALGORITHM
+
 class DatabaseManager:
-    def __init__(self, server='localhost\\SQLEXPRESS', database='DBPROJECT', trusted_connection=True):
+    def __init__(self, server='localhost\\SQLEXPRESS', database='DBPROJECT', trusted_connection=True,
+                 password_hasher=None):
         self.connection_string = (
             f'DRIVER={{ODBC Driver 17 for SQL Server}};'
             f'SERVER={server};'
             f'DATABASE={database};'
             f'Trusted_Connection={"yes" if trusted_connection else "no"};'
         )
+        self.db_kwargs = {'server': server, 'database': database, 'trusted_connection': trusted_connection}
         self.conn = None
+        # created on first use, so managers that never hash do not start a hashing pool
+        self._password_hasher = password_hasher
+        self._owns_hasher = password_hasher is None
+        self._procedure_cursors = {}
+        self._transaction_depth = 0
     
     def connect(self):
         try:
             self.conn = pyodbc.connect(self.connection_string)
+            self._procedure_cursors = {}
             return True
         except Exception as e:
             print(f"Database connection error: {e}")
@@ -22,8 +37,27 @@ class DatabaseManager:
     def disconnect(self):
         if self.conn:
             self.conn.close()
+        if self._owns_hasher and self._password_hasher is not None:
+            self._password_hasher.shutdown()
+            self._password_hasher = None
+    
+    @property
+    def password_hasher(self):
+        if self._password_hasher is None:
+            self._password_hasher = PasswordHasher()
+        return self._password_hasher
+    
+    def clone(self):
+        # a new, unconnected manager for the same database, for work on another thread
+        if self._owns_hasher:
+            return DatabaseManager(**self.db_kwargs)
+        return DatabaseManager(password_hasher=self._password_hasher, **self.db_kwargs)
     
-    def execute_query(self, query, params=None, fetch=True):
+    def execute_query(self, query, params=None, fetch=True, columnar=None, record_type=None):
+        # columnar='numpy' or 'arrow' returns whole columns instead of rows, see database/columnar.py;
+        # record_type (a database/records.py namedtuple) is built from each row as it is read
+        if columnar:
+            columnar_results.require(columnar)
         try:
             cursor = self.conn.cursor()
             if params:
@@ -32,27 +66,127 @@ class DatabaseManager:
                 cursor.execute(query)
             
             if fetch:
+                if columnar:
+                    return columnar_results.to_columns(cursor, columnar)
+                if record_type:
+                    return list(map(record_type._make, cursor))
                 return cursor.fetchall()
             else:
-                self.conn.commit()
+                if not self._transaction_depth:
+                    self.conn.commit()
                 return True
         except Exception as e:
             print(f"Query execution error: {e}")
+            if self._transaction_depth:
+                raise  # transaction() rolls the whole unit of work back
             return None if fetch else False
     
+    @contextmanager
+    def transaction(self):
+        """Runs the statements in the block as one unit of work with a single commit.
+        
+        Statement errors raise instead of returning None/False and roll the block back.
+        A nested block is a savepoint, so its failure can be handled without losing
+        the outer work.
+        """
+        depth = self._transaction_depth
+        cursor = self.conn.cursor()
+        if depth == 0:
+            # explicit BEGIN/COMMIT so SAVE TRANSACTION always has a transaction to mark
+            self.conn.commit()
+            self.conn.autocommit = True
+            cursor.execute("BEGIN TRANSACTION")
+        else:
+            savepoint = f"unit_of_work_{depth}"
+            cursor.execute(f"SAVE TRANSACTION {savepoint}")
+        self._transaction_depth += 1
+        try:
+            yield self
+            if depth == 0:
+                cursor.execute("COMMIT TRANSACTION")
+        except BaseException:
+            try:
+                if depth == 0:
+                    cursor.execute("IF @@TRANCOUNT > 0 ROLLBACK TRANSACTION")
+                else:
+                    # a doomed transaction cannot go back to a savepoint; the outer block rolls it back
+                    cursor.execute(f"IF XACT_STATE() = 1 ROLLBACK TRANSACTION {savepoint}")
+            except Exception as e:
+                print(f"Rollback error: {e}")
+            raise
+        finally:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.conn.autocommit = False
+    
     # Authentication
-    def authenticate_user(self, username, password):
+    def get_login_record(self, username):
+        # single seek on the UNIQUE index over username; the hash is checked in Python
         query = """
-        SELECT ua.user_id, ua.employee_id, ua.is_admin, e.first_name, e.last_name
+        SELECT ua.user_id, ua.employee_id, ua.is_admin, e.first_name, e.last_name, ua.password
         FROM UserAccounts ua
         JOIN Employees e ON ua.employee_id = e.employee_id
-        WHERE ua.username = ? AND ua.password = ?
+        WHERE ua.username = ?
         """
-        result = self.execute_query(query, (username, password))
+        result = self.execute_query(query, (username,), record_type=records.LoginRecord)
         return result[0] if result else None
     
+    def authenticate_user(self, username, password):
+        record = self.get_login_record(username)
+        ok, new_hash = self.password_hasher.verify_and_rehash(password, record.password if record else None)
+        if not ok:
+            return None
+        if new_hash:
+            self.update_password_hash(record.user_id, new_hash)
+        return records.User._make(record[:5])
+    
+    def submit_login(self, username, password):
+        # resolves to (user, new_hash); user is None when the login failed and new_hash
+        # is set when the caller should store an upgraded hash on its own thread
+        record = self.get_login_record(username)
+        result = Future()
+        
+        def verified(future):
+            try:
+                ok, new_hash = future.result()
+            except Exception as e:
+                print(f"Password verification error: {e}")
+                ok, new_hash = False, None
+            result.set_result((records.User._make(record[:5]), new_hash) if ok else (None, None))
+        
+        self.password_hasher.submit_verify(password, record.password if record else None).add_done_callback(verified)
+        return result
+    
+    def update_password_hash(self, user_id, password_hash):
+        query = "UPDATE UserAccounts SET password = ? WHERE user_id = ?"
+        return self.execute_query(query, (password_hash, user_id), fetch=False)
+    
+    def upgrade_password_hashes(self):
+        # widen the column for databases created before hashing was introduced
+        self.execute_query("""
+        IF COL_LENGTH('UserAccounts', 'password') < 255
+            ALTER TABLE UserAccounts ALTER COLUMN password VARCHAR(255) NOT NULL
+        """, fetch=False)
+        rows = self.execute_query(
+            "SELECT user_id, password FROM UserAccounts WHERE password NOT LIKE ?",
+            (ALGORITHM + '$%',))
+        if not rows:
+            return 0
+        hashes = self.password_hasher.hash_many([row[1] for row in rows])
+        try:
+            cursor = self.conn.cursor()
+            cursor.fast_executemany = True
+            cursor.executemany("UPDATE UserAccounts SET password = ? WHERE user_id = ?",
+                               [(h, row[0]) for h, row in zip(hashes, rows)])
+            self.conn.commit()
+            return len(rows)
+        except Exception as e:
+            print(f"Password upgrade error: {e}")
+            self.conn.rollback()
+            return 0
+    
     # Employee Management
-    def get_all_employees(self):
+    def get_all_employees(self, columnar=None):
         query = """
         SELECT e.employee_id, e.first_name, e.last_name, 
                d.department_name, jt.title_name, et.type_name, s.skill_name
@@ -62,7 +196,7 @@ class DatabaseManager:
         LEFT JOIN EmploymentTypes et ON e.type_id = et.type_id
         LEFT JOIN Skills s ON e.skill_id = s.skill_id
         """
-        return self.execute_query(query)
+        return self.execute_query(query, columnar=columnar, record_type=records.Employee)
     
     def add_employee(self, first_name, last_name, dept_id, job_id, type_id, skill_id):
         query = """
@@ -71,18 +205,103 @@ class DatabaseManager:
         """
         return self.execute_query(query, (first_name, last_name, dept_id, job_id, type_id, skill_id), fetch=False)
     
+    def add_employee_with_account(self, first_name, last_name, dept_id, job_id, type_id, skill_id,
+                                  username, password, is_admin):
+        # the employee and their login are created together or not at all;
+        # hash first so no locks are held while PBKDF2 runs
+        password_hash = self.password_hasher.hash(password)
+        try:
+            with self.transaction():
+                employee_id = self.execute_query("""
+                INSERT INTO Employees (first_name, last_name, department_id, job_id, type_id, skill_id)
+                OUTPUT INSERTED.employee_id
+                VALUES (?, ?, ?, ?, ?, ?)
+                """, (first_name, last_name, dept_id, job_id, type_id, skill_id))[0][0]
+                self.execute_query("""
+                INSERT INTO UserAccounts (employee_id, username, password, is_admin)
+                VALUES (?, ?, ?, ?)
+                """, (employee_id, username, password_hash, is_admin), fetch=False)
+            return True
+        except Exception as e:
+            print(f"Add employee error: {e}")
+            return False
+    
+    def bulk_import_employees(self, rows):
+        # rows: (row_no, first_name, last_name, dept_id, job_id, type_id, skill_id,
+        #        username, password_hash, is_admin); username may be None for no account.
+        # Returns (imported row_nos, row_nos rejected because the username is taken) or None.
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+            CREATE TABLE #EmployeeImport (
+                row_no INT PRIMARY KEY,
+                first_name VARCHAR(50) NOT NULL,
+                last_name VARCHAR(50) NOT NULL,
+                department_id INT, job_id INT, type_id INT, skill_id INT,
+                username VARCHAR(50) NULL,
+                password VARCHAR(255) NULL,
+                is_admin BIT,
+                employee_id INT NULL
+            )
+            """)
+            cursor.fast_executemany = True
+            cursor.executemany("""
+            INSERT INTO #EmployeeImport (row_no, first_name, last_name, department_id, job_id,
+                                         type_id, skill_id, username, password, is_admin)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            
+            # usernames already in use reject the whole row, before anything is inserted
+            cursor.execute("""
+            DELETE s OUTPUT deleted.row_no
+            FROM #EmployeeImport s
+            JOIN UserAccounts ua ON ua.username = s.username
+            """)
+            rejected = [row[0] for row in cursor.fetchall()]
+            
+            # MERGE (unlike INSERT) can OUTPUT source columns, which maps row_no to the new id
+            cursor.execute("""
+            CREATE TABLE #ImportedIds (row_no INT PRIMARY KEY, employee_id INT NOT NULL);
+            MERGE Employees AS e
+            USING #EmployeeImport AS s ON 1 = 0
+            WHEN NOT MATCHED THEN
+                INSERT (first_name, last_name, department_id, job_id, type_id, skill_id)
+                VALUES (s.first_name, s.last_name, s.department_id, s.job_id, s.type_id, s.skill_id)
+            OUTPUT s.row_no, inserted.employee_id INTO #ImportedIds;
+            
+            INSERT INTO UserAccounts (employee_id, username, password, is_admin)
+            SELECT i.employee_id, s.username, s.password, s.is_admin
+            FROM #EmployeeImport s
+            JOIN #ImportedIds i ON i.row_no = s.row_no
+            WHERE s.username IS NOT NULL;
+            """)
+            cursor.execute("SELECT row_no FROM #ImportedIds ORDER BY row_no")
+            imported = [row[0] for row in cursor.fetchall()]
+            cursor.execute("DROP TABLE #ImportedIds; DROP TABLE #EmployeeImport;")
+            self.conn.commit()
+            return imported, rejected
+        except Exception as e:
+            print(f"Bulk import error: {e}")
+            self.conn.rollback()
+            try:
+                self.conn.cursor().execute(
+                    "DROP TABLE IF EXISTS #ImportedIds; DROP TABLE IF EXISTS #EmployeeImport;")
+            except Exception:
+                pass
+            return None
+    
     # Departments, JobTitles, Skills, etc.
     def get_departments(self):
-        return self.execute_query("SELECT department_id, department_name FROM Departments")
+        return self.execute_query("SELECT department_id, department_name FROM Departments", record_type=records.Department)
     
     def get_job_titles(self):
-        return self.execute_query("SELECT job_id, title_name FROM JobTitles")
+        return self.execute_query("SELECT job_id, title_name FROM JobTitles", record_type=records.JobTitle)
     
     def get_skills(self):
-        return self.execute_query("SELECT skill_id, skill_name FROM Skills")
+        return self.execute_query("SELECT skill_id, skill_name FROM Skills", record_type=records.Skill)
     
     def get_employment_types(self):
-        return self.execute_query("SELECT type_id, type_name FROM EmploymentTypes")
+        return self.execute_query("SELECT type_id, type_name FROM EmploymentTypes", record_type=records.EmploymentType)
     
     # Weekly Schedules
     def get_weekly_schedules(self):
@@ -91,11 +310,37 @@ class DatabaseManager:
         FROM WeeklySchedules
         ORDER BY start_date DESC
         """
-        return self.execute_query(query)
+        return self.execute_query(query, record_type=records.WeeklySchedule)
     
-    def create_weekly_schedule(self, start_date, end_date):
+    def create_weekly_schedule(self, start_date, end_date, copy_from=None):
         query = "INSERT INTO WeeklySchedules (start_date, end_date) VALUES (?, ?)"
-        return self.execute_query(query, (start_date, end_date), fetch=False)
+        if copy_from is None:
+            return self.execute_query(query, (start_date, end_date), fetch=False)
+        
+        # the new week and its copied assignments are committed together
+        try:
+            with self.transaction():
+                schedule_id = self.execute_query(
+                    "INSERT INTO WeeklySchedules (start_date, end_date) OUTPUT INSERTED.schedule_id VALUES (?, ?)",
+                    (start_date, end_date))[0][0]
+                # same weekday and shift in the new week, skipping days on approved leave
+                self.execute_query("""
+                INSERT INTO ShiftAssignments (schedule_id, employee_id, shift_type_id, assigned_date)
+                SELECT ?, sa.employee_id, sa.shift_type_id, moved.assigned_date
+                FROM ShiftAssignments sa
+                JOIN WeeklySchedules ws ON sa.schedule_id = ws.schedule_id
+                CROSS APPLY (SELECT DATEADD(DAY, DATEDIFF(DAY, ws.start_date, ?), sa.assigned_date) AS assigned_date) moved
+                WHERE sa.schedule_id = ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM LeaveRequests lr
+                      WHERE lr.employee_id = sa.employee_id AND lr.is_approved = 1
+                        AND moved.assigned_date BETWEEN lr.start_date AND lr.end_date
+                  )
+                """, (schedule_id, start_date, copy_from), fetch=False)
+            return True
+        except Exception as e:
+            print(f"Create schedule error: {e}")
+            return False
     
     def publish_schedule(self, schedule_id):
         query = "UPDATE WeeklySchedules SET is_published = 1 WHERE schedule_id = ?"
@@ -103,10 +348,10 @@ class DatabaseManager:
     
     # Shift Types
     def get_shift_types(self):
-        return self.execute_query("SELECT shift_type_id, shift_name, start_time, end_time FROM ShiftTypes")
+        return self.execute_query("SELECT shift_type_id, shift_name, start_time, end_time FROM ShiftTypes", record_type=records.ShiftType)
     
     # Shift Assignments
-    def get_shift_assignments(self, schedule_id):
+    def get_shift_assignments(self, schedule_id, columnar=None):
         query = """
         SELECT sa.assignment_id, sa.assigned_date, 
                e.first_name, e.last_name, st.shift_name, st.start_time, st.end_time
@@ -116,7 +361,7 @@ class DatabaseManager:
         WHERE sa.schedule_id = ?
         ORDER BY sa.assigned_date, st.start_time
         """
-        return self.execute_query(query, (schedule_id,))
+        return self.execute_query(query, (schedule_id,), columnar=columnar, record_type=records.ShiftAssignment)
     
     def add_shift_assignment(self, schedule_id, employee_id, shift_type_id, assigned_date):
         query = """
@@ -129,6 +374,108 @@ class DatabaseManager:
         query = "DELETE FROM ShiftAssignments WHERE assignment_id = ?"
         return self.execute_query(query, (assignment_id,), fetch=False)
     
+    def get_assignment_slots(self, start_date, end_date):
+        # every assignment in the range, for shifting_system/labor_rules.py
+        query = """
+        SELECT employee_id, shift_type_id, assigned_date
+        FROM ShiftAssignments
+        WHERE assigned_date BETWEEN ? AND ?
+        """
+        return self.execute_query(query, (start_date, end_date), record_type=records.AssignmentSlot)
+    
+    def get_assignment_slot(self, assignment_id):
+        query = "SELECT employee_id, shift_type_id, assigned_date FROM ShiftAssignments WHERE assignment_id = ?"
+        result = self.execute_query(query, (assignment_id,), record_type=records.AssignmentSlot)
+        return result[0] if result else None
+    
+    # Shift swaps: the inputs of shifting_system/shift_swap.py
+    def get_employee_profiles(self):
+        query = "SELECT employee_id, first_name, last_name, department_id, skill_id FROM Employees"
+        return self.execute_query(query, record_type=records.EmployeeProfile)
+    
+    # Availability bitmasks (records.AVAILABILITY_SLOTS per weekday); no mask row means always available
+    def get_availability_masks(self, employee_id=None):
+        query = "SELECT employee_id, mask FROM EmployeeAvailabilityMask"
+        if employee_id:
+            query += " WHERE employee_id = ?"
+            return self.execute_query(query, (employee_id,), record_type=records.AvailabilityMask)
+        return self.execute_query(query, record_type=records.AvailabilityMask)
+    
+    def get_availability_overrides(self, start_date, end_date, employee_id=None):
+        params = [start_date, end_date]
+        employee_filter = ""
+        if employee_id:
+            employee_filter = "AND employee_id = ?"
+            params.append(employee_id)
+        query = f"""
+        SELECT employee_id, override_date, mask
+        FROM AvailabilityOverrides
+        WHERE override_date BETWEEN ? AND ? {employee_filter}
+        """
+        return self.execute_query(query, params, record_type=records.AvailabilityOverride)
+    
+    def set_availability_mask(self, employee_id, mask):
+        query = """
+        MERGE EmployeeAvailabilityMask WITH (HOLDLOCK) AS m
+        USING (SELECT ? AS employee_id, ? AS mask) AS s ON m.employee_id = s.employee_id
+        WHEN MATCHED THEN UPDATE SET mask = s.mask
+        WHEN NOT MATCHED THEN INSERT (employee_id, mask) VALUES (s.employee_id, s.mask);
+        """
+        return self.execute_query(query, (employee_id, mask), fetch=False)
+    
+    def set_availability_override(self, employee_id, override_date, mask):
+        # mask=None removes the override, so the weekday mask applies again
+        if mask is None:
+            query = "DELETE FROM AvailabilityOverrides WHERE employee_id = ? AND override_date = ?"
+            return self.execute_query(query, (employee_id, override_date), fetch=False)
+        query = """
+        MERGE AvailabilityOverrides WITH (HOLDLOCK) AS o
+        USING (SELECT ? AS employee_id, ? AS override_date, ? AS mask) AS s
+            ON o.employee_id = s.employee_id AND o.override_date = s.override_date
+        WHEN MATCHED THEN UPDATE SET mask = s.mask
+        WHEN NOT MATCHED THEN INSERT (employee_id, override_date, mask)
+            VALUES (s.employee_id, s.override_date, s.mask);
+        """
+        return self.execute_query(query, (employee_id, override_date, mask), fetch=False)
+    
+    def import_legacy_availability(self):
+        # builds masks from the old one-row-per-weekday EmployeeAvailability table for
+        # employees that have none yet; a weekday marked unavailable clears all its slots.
+        # A day name counts by its first three letters after leading spaces, in any case,
+        # as in availability.weekday_index; anything else is ignored
+        slots = records.AVAILABILITY_SLOTS
+        query = """
+        INSERT INTO EmployeeAvailabilityMask (employee_id, mask)
+        SELECT ea.employee_id,
+               ? - COALESCE(SUM(DISTINCT CASE WHEN ea.is_available = 0 THEN ? * POWER(CAST(2 AS BIGINT), ? * d.weekday) END), 0)
+        FROM EmployeeAvailability ea
+        CROSS APPLY (SELECT UPPER(LEFT(LTRIM(ea.day_of_week), 3)) AS prefix) n
+        CROSS APPLY (SELECT CHARINDEX(n.prefix, 'MONTUEWEDTHUFRISATSUN') AS pos) p
+        CROSS APPLY (SELECT CASE WHEN LEN(n.prefix) = 3 AND p.pos % 3 = 1 THEN (p.pos - 1) / 3 END AS weekday) d
+        WHERE NOT EXISTS (SELECT 1 FROM EmployeeAvailabilityMask m WHERE m.employee_id = ea.employee_id)
+        GROUP BY ea.employee_id
+        """
+        return self.execute_query(query, ((1 << 7 * slots) - 1, (1 << slots) - 1, slots), fetch=False)
+    
+    def reassign_shift(self, assignment_id, employee_id):
+        # hands the assignment over unless the new employee already works that day
+        try:
+            with self.transaction():
+                moved = self.execute_query("""
+                UPDATE sa SET employee_id = ?
+                OUTPUT inserted.assignment_id
+                FROM ShiftAssignments sa
+                WHERE sa.assignment_id = ?
+                  AND NOT EXISTS (
+                      SELECT 1 FROM ShiftAssignments other WITH (UPDLOCK, HOLDLOCK)
+                      WHERE other.employee_id = ? AND other.assigned_date = sa.assigned_date
+                  )
+                """, (employee_id, assignment_id, employee_id))
+            return bool(moved)
+        except Exception as e:
+            print(f"Reassign shift error: {e}")
+            return False
+
     # Employee Roster
     def get_employee_shifts(self, employee_id):
         query = """
@@ -139,19 +486,119 @@ class DatabaseManager:
         WHERE sa.employee_id = ?
         ORDER BY sa.assigned_date DESC
         """
-        return self.execute_query(query, (employee_id,))
+        return self.execute_query(query, (employee_id,), record_type=records.EmployeeShift)
     
     def get_signed_in_employees(self, today=None):
+        # sessions clocked in on today and not clocked out, read from ClockEvents so a
+        # punch shows up before the projection has run
         if today is None:
             today = date.today()
         query = """
         SELECT e.employee_id, e.first_name, e.last_name
         FROM Employees e
-        JOIN AttendanceLogs al ON e.employee_id = al.employee_id
-        WHERE al.date = ? AND al.clock_in IS NOT NULL AND al.clock_out IS NULL
+        JOIN (
+            SELECT employee_id FROM ClockEvents WHERE work_date = ?
+            GROUP BY employee_id
+            HAVING COUNT(CASE WHEN event_type = 1 THEN 1 END) = 0
+        ) s ON e.employee_id = s.employee_id
         ORDER BY e.last_name, e.first_name
         """
-        return self.execute_query(query, (today,))
+        return self.execute_query(query, (today,), record_type=records.EmployeeName)
+    
+    # Coverage heatmap
+    def get_coverage_counts(self, start_date, end_date):
+        # assignments per (day offset from start_date, shift type, department), and how
+        # many of them fall inside approved leave; see shifting_system/coverage.py
+        query = """
+        DECLARE @start DATE = ?, @end DATE = ?;
+        SELECT DATEDIFF(DAY, @start, sa.assigned_date) AS day, sa.shift_type_id,
+               COALESCE(e.department_id, 0) AS department_id,
+               COUNT(*) AS scheduled, COUNT(lv.request_id) AS on_leave
+        FROM ShiftAssignments sa
+        JOIN Employees e ON sa.employee_id = e.employee_id
+        OUTER APPLY (
+            SELECT TOP 1 lr.request_id FROM LeaveRequests lr
+            WHERE lr.employee_id = sa.employee_id AND lr.is_approved = 1
+              AND lr.start_date <= sa.assigned_date AND lr.end_date >= sa.assigned_date
+        ) lv
+        WHERE sa.assigned_date BETWEEN @start AND @end
+        GROUP BY sa.assigned_date, sa.shift_type_id, e.department_id
+        """
+        return self.execute_query(query, (start_date, end_date), record_type=records.CoverageCount)
+    
+    def get_coverage_leave(self, start_date, end_date):
+        # approved leave overlapping the range, as day offsets clipped to it
+        query = """
+        DECLARE @start DATE = ?, @end DATE = ?;
+        SELECT lr.employee_id, COALESCE(e.department_id, 0) AS department_id,
+               DATEDIFF(DAY, @start, CASE WHEN lr.start_date < @start THEN @start ELSE lr.start_date END) AS first_day,
+               DATEDIFF(DAY, @start, CASE WHEN lr.end_date > @end THEN @end ELSE lr.end_date END) AS last_day
+        FROM LeaveRequests lr
+        JOIN Employees e ON lr.employee_id = e.employee_id
+        WHERE lr.is_approved = 1 AND lr.start_date <= @end AND lr.end_date >= @start
+        """
+        return self.execute_query(query, (start_date, end_date), record_type=records.CoverageLeave)
+    
+    # Occupancy board: a directory loaded once plus row-version deltas of the punch events
+    def get_floor_directory(self):
+        query = """
+        SELECT e.employee_id, e.first_name, e.last_name, d.department_name, wl.address AS location
+        FROM Employees e
+        LEFT JOIN Departments d ON e.department_id = d.department_id
+        LEFT JOIN WorkLocations wl ON d.location_id = wl.location_id
+        """
+        return self.execute_query(query, record_type=records.FloorEmployee)
+    
+    def get_floor_watermark(self):
+        # every change committed after this point has a row_version >= the watermark
+        result = self.execute_query("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT)")
+        return result[0][0] if result else None
+    
+    def get_floor_changes(self, since=None, today=None):
+        # the latest session (today's, or yesterday's overnight one) of every employee
+        # who punched at or after the watermark `since`; with since=None, of everyone
+        # who punched today or yesterday. Read from ClockEvents, so it does not wait
+        # for the projection; log_id is the session's clock-in event. Yesterday's open
+        # session counts only while it can still be a night shift (ufn_OvernightSession,
+        # as for punches); after that clock_in is NULL, so the board drops the employee.
+        # Such a session ages out without a new punch, so deltas also re-read everyone
+        # whose session yesterday has no clock-out.
+        if today is None:
+            today = date.today()
+        changed = ""
+        params = [today]
+        if since is not None:
+            changed = ("AND (employee_id IN (SELECT employee_id FROM ClockEvents "
+                       "WHERE row_version >= CAST(CAST(? AS BIGINT) AS BINARY(8))) "
+                       "OR employee_id IN (SELECT employee_id FROM ClockEvents WHERE work_date = DATEADD(DAY, -1, @day) "
+                       "GROUP BY employee_id HAVING COUNT(CASE WHEN event_type = 1 THEN 1 END) = 0))")
+            params.append(since)
+        query = """
+        DECLARE @day DATE = ?;
+        DECLARE @now DATETIME2(3) = SYSDATETIME();
+        IF @now > DATEADD(DAY, 1, CAST(@day AS DATETIME2))
+            SET @now = DATEADD(DAY, 1, CAST(@day AS DATETIME2));
+        SELECT log_id, employee_id,
+               CASE WHEN work_date = @day OR clock_out IS NOT NULL
+                         OR EXISTS (SELECT 1 FROM ufn_OvernightSession(employee_id, work_date, @now))
+                    THEN CAST(clock_in AS TIME) END AS clock_in,
+               CAST(clock_out AS TIME) AS clock_out,
+               CASE WHEN clock_out IS NULL AND open_breaks > 0 THEN 1 ELSE 0 END AS on_break
+        FROM (
+            SELECT employee_id, work_date,
+                   MIN(CASE WHEN event_type = 0 THEN event_id END) AS log_id,
+                   MIN(CASE WHEN event_type = 0 THEN ts END) AS clock_in,
+                   MAX(CASE WHEN event_type = 1 THEN ts END) AS clock_out,
+                   SUM(CASE event_type WHEN 2 THEN 1 WHEN 3 THEN -1 ELSE 0 END) AS open_breaks,
+                   ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY work_date DESC) AS latest
+            FROM ClockEvents
+            WHERE work_date BETWEEN DATEADD(DAY, -1, @day) AND @day {changed}
+            GROUP BY employee_id, work_date
+        ) s
+        WHERE latest = 1
+        """
+        return self.execute_query(query.format(changed=changed), params, record_type=records.FloorState)
+    
     # Attendance Logs
     def get_today_shift(self, employee_id, today=None):
         if today is None:
@@ -162,85 +609,454 @@ class DatabaseManager:
         JOIN ShiftTypes st ON sa.shift_type_id = st.shift_type_id
         WHERE sa.employee_id = ? AND sa.assigned_date = ?
         """
-        result = self.execute_query(query, (employee_id, today))
+        result = self.execute_query(query, (employee_id, today), record_type=records.TodayShift)
         return result[0] if result else None
     
     def get_attendance_log(self, employee_id, today=None):
+        # the session as usp_GetDayState sees it: log_id is its clock-in event
         if today is None:
             today = date.today()
         query = """
-        SELECT log_id, clock_in, clock_out
-        FROM AttendanceLogs
-        WHERE employee_id = ? AND date = ?
+        DECLARE @employee_id INT = ?, @day DATE = ?;
+        SELECT MIN(CASE WHEN event_type = 0 THEN event_id END) AS log_id,
+               CAST(MIN(CASE WHEN event_type = 0 THEN ts END) AS TIME) AS clock_in,
+               CAST(MAX(CASE WHEN event_type = 1 THEN ts END) AS TIME) AS clock_out
+        FROM ClockEvents
+        WHERE employee_id = @employee_id AND work_date = @day
+          AND ts >= CAST(@day AS DATETIME2) AND ts < DATEADD(DAY, 2, CAST(@day AS DATETIME2))
+        HAVING COUNT(*) > 0
         """
-        result = self.execute_query(query, (employee_id, today))
+        result = self.execute_query(query, (employee_id, today), record_type=records.AttendanceLog)
         return result[0] if result else None
     
+    # Punches: one stored-procedure call each, checked on the server, appending one
+    # ClockEvents row; they return a PUNCH_* status code from database/records.py, or
+    # None on a database error. AttendanceLogs and BreakLogs catch up when
+    # project_clock_events() runs.
+    def _call_procedure(self, name, params):
+        # one cursor per procedure: pyodbc keeps the last prepared statement on a cursor,
+        # so repeated calls reuse the prepared {CALL} handle instead of preparing again
+        try:
+            cached = self._procedure_cursors.get(name)
+            if cached is None:
+                sql = f"{{CALL {name} ({', '.join('?' * len(params))})}}"
+                cached = self._procedure_cursors[name] = (self.conn.cursor(), sql)
+            cursor, sql = cached
+            cursor.execute(sql, params)
+            # drain the results: without MARS a cursor left with pending results keeps the
+            # connection busy for every other statement
+            rows = cursor.fetchall()
+            while cursor.nextset():
+                pass
+            row = rows[0] if rows else None
+            if not self._transaction_depth:
+                self.conn.commit()
+            return row
+        except Exception as e:
+            print(f"Procedure error ({name}): {e}")
+            if self._transaction_depth:
+                raise
+            try:
+                self.conn.rollback()
+            except Exception:
+                pass
+            return None
+    
+    def _punch(self, name, employee_id):
+        row = self._call_procedure(name, (employee_id,))
+        return row[0] if row else None
+    
+    def get_day_state(self, employee_id, day=None):
+        # shift, attendance log and open break for the day in one round trip
+        row = self._call_procedure('usp_GetDayState', (employee_id, day))
+        return records.DayState._make(row) if row else None
+    
     def clock_in(self, employee_id):
-        query = "INSERT INTO AttendanceLogs (employee_id, date, clock_in) VALUES (?, CAST(GETDATE() AS DATE), CAST(GETDATE() AS TIME))"
-        return self.execute_query(query, (employee_id,), fetch=False)
+        return self._punch('usp_ClockIn', employee_id)
+    
+    def clock_out(self, employee_id):
+        return self._punch('usp_ClockOut', employee_id)
     
-    def clock_out(self, log_id):
-        query = "UPDATE AttendanceLogs SET clock_out = CAST(GETDATE() AS TIME) WHERE log_id = ?"
-        return self.execute_query(query, (log_id,), fetch=False)
+    def project_clock_events(self):
+        # folds new punch events into AttendanceLogs/BreakLogs; returns the number of
+        # sessions updated, or None on error
+        row = self._call_procedure('usp_ProjectClockEvents', ())
+        return row[0] if row else None
     
     # Break Logs
     def get_active_break(self, log_id):
-        query = "SELECT break_id FROM BreakLogs WHERE log_id = ? AND end_time IS NULL"
-        result = self.execute_query(query, (log_id,))
+        # log_id is the session's clock-in event (see get_attendance_log); the open
+        # break is a break-start with no break-end or clock-out after it
+        query = """
+        SELECT TOP 1 b.event_id AS break_id
+        FROM ClockEvents s
+        JOIN ClockEvents b ON b.employee_id = s.employee_id AND b.work_date = s.work_date AND b.event_type = 2
+        WHERE s.event_id = ?
+          AND NOT EXISTS (SELECT 1 FROM ClockEvents n
+                          WHERE n.employee_id = b.employee_id AND n.work_date = b.work_date
+                            AND n.event_id > b.event_id AND n.event_type IN (1, 3))
+        ORDER BY b.event_id DESC
+        """
+        result = self.execute_query(query, (log_id,), record_type=records.ActiveBreak)
         return result[0] if result else None
     
-    def start_break(self, log_id):
-        query = "INSERT INTO BreakLogs (log_id, start_time) VALUES (?, CAST(GETDATE() AS TIME))"
-        return self.execute_query(query, (log_id,), fetch=False)
+    def start_break(self, employee_id):
+        return self._punch('usp_StartBreak', employee_id)
     
-    def end_break(self, break_id):
-        query = "UPDATE BreakLogs SET end_time = CAST(GETDATE() AS TIME) WHERE break_id = ?"
-        return self.execute_query(query, (break_id,), fetch=False)
+    def end_break(self, employee_id):
+        return self._punch('usp_EndBreak', employee_id)
     
     # Leave Requests
     def get_leave_types(self):
-        return self.execute_query("SELECT leave_type_id, type_name FROM LeaveTypes")
+        return self.execute_query("SELECT leave_type_id, type_name FROM LeaveTypes", record_type=records.LeaveType)
     
     def submit_leave_request(self, employee_id, leave_type_id, start_date, end_date):
+        # the request and its pending days on the balance are written together
+        try:
+            with self.transaction():
+                self.execute_query("""
+                INSERT INTO LeaveRequests (employee_id, leave_type_id, start_date, end_date)
+                VALUES (?, ?, ?, ?)
+                """, (employee_id, leave_type_id, start_date, end_date), fetch=False)
+                self._adjust_leave_balance(employee_id, leave_type_id, start_date, end_date, pending=1)
+            return True
+        except Exception as e:
+            print(f"Submit leave error: {e}")
+            return False
+    
+    def get_leave_policies(self):
         query = """
-        INSERT INTO LeaveRequests (employee_id, leave_type_id, start_date, end_date)
-        VALUES (?, ?, ?, ?)
+        SELECT p.leave_type_id, lt.type_name, p.days_per_year, p.accrues_monthly, p.max_carryover
+        FROM LeavePolicies p
+        JOIN LeaveTypes lt ON p.leave_type_id = lt.leave_type_id
         """
-        return self.execute_query(query, (employee_id, leave_type_id, start_date, end_date), fetch=False)
+        return self.execute_query(query, record_type=records.LeavePolicy)
     
-    def get_leave_requests(self, employee_id=None):
+    def get_leave_balances(self, employee_id, year=None):
+        # one row per leave type with a policy; a year with no balance row yet starts
+        # from what the previous year carries over
+        query = """
+        DECLARE @employee_id INT = ?, @year SMALLINT = ?;
+        SELECT p.leave_type_id, lt.type_name, @year AS year,
+               COALESCE(b.carried_over, CASE
+                   WHEN prev.carried_over IS NULL THEN 0
+                   WHEN prev.carried_over + p.days_per_year - prev.used > p.max_carryover THEN p.max_carryover
+                   WHEN prev.carried_over + p.days_per_year - prev.used < 0 THEN 0
+                   ELSE prev.carried_over + p.days_per_year - prev.used END) AS carried_over,
+               COALESCE(b.used, 0) AS used, COALESCE(b.pending, 0) AS pending
+        FROM LeavePolicies p
+        JOIN LeaveTypes lt ON p.leave_type_id = lt.leave_type_id
+        LEFT JOIN LeaveBalances b ON b.employee_id = @employee_id
+         AND b.leave_type_id = p.leave_type_id AND b.year = @year
+        LEFT JOIN LeaveBalances prev ON prev.employee_id = @employee_id
+         AND prev.leave_type_id = p.leave_type_id AND prev.year = @year - 1
+        ORDER BY lt.type_name
+        """
+        return self.execute_query(query, (employee_id, year or date.today().year),
+                                  record_type=records.LeaveBalance)
+    
+    def _adjust_leave_balance(self, employee_id, leave_type_id, start_date, end_date, used=0, pending=0):
+        # adds the request's working days (times used/pending, e.g. +1/-1) to each
+        # year it touches; does nothing for leave types without a policy
+        self._apply_leave_deltas([(employee_id, leave_type_id, year, used * days, pending * days)
+                                  for year, days in leave_accrual.split_by_year(start_date, end_date)
+                                  if days])
+    
+    def rebuild_leave_balances(self, through_year=None):
+        # recomputes LeaveBalances from the whole request history (database/leave_accrual.py);
+        # returns the number of balance rows written, or None on error
+        policies = self.get_leave_policies()
+        requests = self.execute_query("""
+        SELECT employee_id, leave_type_id, start_date, end_date, is_approved FROM LeaveRequests
+        WHERE is_rejected = 0
+        """)
+        employees = self.execute_query("SELECT employee_id FROM Employees")
+        if policies is None or requests is None or employees is None:
+            return None
+        rows = leave_accrual.rebuild(requests, [row[0] for row in employees],
+                                     {policy.leave_type_id: policy for policy in policies}, through_year)
+        try:
+            with self.transaction():
+                cursor = self.conn.cursor()
+                cursor.execute("DELETE FROM LeaveBalances")
+                if rows:
+                    cursor.fast_executemany = True
+                    cursor.executemany("""
+                    INSERT INTO LeaveBalances (employee_id, leave_type_id, year, carried_over, used, pending)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """, rows)
+            return len(rows)
+        except Exception as e:
+            print(f"Rebuild leave balances error: {e}")
+            return None
+    
+    def get_leave_requests(self, employee_id=None, columnar=None):
         if employee_id:
             query = """
             SELECT lr.request_id, e.first_name, e.last_name, lt.type_name, 
-                   lr.start_date, lr.end_date, lr.is_approved
+                   lr.start_date, lr.end_date, lr.is_approved, lr.is_rejected
             FROM LeaveRequests lr
             JOIN Employees e ON lr.employee_id = e.employee_id
             JOIN LeaveTypes lt ON lr.leave_type_id = lt.leave_type_id
             WHERE lr.employee_id = ?
             ORDER BY lr.start_date DESC
             """
-            return self.execute_query(query, (employee_id,))
+            return self.execute_query(query, (employee_id,), columnar=columnar,
+                                      record_type=records.LeaveRequest)
         else:
             query = """
             SELECT lr.request_id, e.first_name, e.last_name, lt.type_name, 
-                   lr.start_date, lr.end_date, lr.is_approved
+                   lr.start_date, lr.end_date, lr.is_approved, lr.is_rejected
             FROM LeaveRequests lr
             JOIN Employees e ON lr.employee_id = e.employee_id
             JOIN LeaveTypes lt ON lr.leave_type_id = lt.leave_type_id
-            ORDER BY lr.is_approved, lr.start_date DESC
+            ORDER BY lr.is_approved | lr.is_rejected, lr.start_date DESC
             """
-            return self.execute_query(query)
+            return self.execute_query(query, columnar=columnar, record_type=records.LeaveRequest)
     
-    def approve_leave_request(self, request_id):
-        query = "UPDATE LeaveRequests SET is_approved = 1 WHERE request_id = ?"
-        return self.execute_query(query, (request_id,), fetch=False)
+    def approve_leave_request(self, request_id, remove_conflicts=False):
+        # approval, the move from pending to used days and the removal of shifts
+        # inside the leave succeed or fail together
+        try:
+            with self.transaction():
+                request = self.execute_query("""
+                SELECT employee_id, leave_type_id, start_date, end_date, is_approved, is_rejected
+                FROM LeaveRequests WITH (UPDLOCK)
+                WHERE request_id = ?
+                """, (request_id,))
+                if not request or request[0].is_rejected:
+                    return False
+                employee_id, leave_type_id, start_date, end_date, is_approved, _ = request[0]
+                if is_approved:
+                    return True
+                self.execute_query("UPDATE LeaveRequests SET is_approved = 1 WHERE request_id = ?",
+                                   (request_id,), fetch=False)
+                self._adjust_leave_balance(employee_id, leave_type_id, start_date, end_date,
+                                           used=1, pending=-1)
+                if remove_conflicts:
+                    self.execute_query("""
+                    DELETE sa
+                    FROM ShiftAssignments sa
+                    JOIN LeaveRequests lr ON sa.employee_id = lr.employee_id
+                     AND sa.assigned_date BETWEEN lr.start_date AND lr.end_date
+                    WHERE lr.request_id = ?
+                    """, (request_id,), fetch=False)
+            return True
+        except Exception as e:
+            print(f"Approve leave error: {e}")
+            return False
+    
+    def approve_leave_requests(self, request_ids, remove_conflicts=False):
+        """Approves many leave requests in one statement batch.
+        
+        Every pending request is checked at once against approved leave and (unless
+        remove_conflicts) against assigned shifts; the survivors are then checked
+        against each other in request_id order, as if approved one at a time, so a
+        request only loses to an earlier one that is itself approved. The ones that
+        pass are approved, their shifts removed when remove_conflicts is set, and
+        their days moved from pending to used. Returns a LeaveDecision per request id
+        (outcome is one of the LEAVE_* codes in records), or None on error.
+        """
+        try:
+            with self.transaction():
+                decisions = self.execute_query("""
+                SET NOCOUNT ON;
+                DECLARE @ids VARCHAR(MAX) = ?, @remove_conflicts BIT = ?;
+                IF OBJECT_ID('tempdb..#LeaveBatch') IS NOT NULL DROP TABLE #LeaveBatch;
+                CREATE TABLE #LeaveBatch (
+                    request_id INT PRIMARY KEY, employee_id INT, leave_type_id INT,
+                    start_date DATE, end_date DATE, outcome TINYINT NOT NULL
+                );
+                INSERT INTO #LeaveBatch
+                SELECT ids.request_id, lr.employee_id, lr.leave_type_id, lr.start_date, lr.end_date,
+                       CASE WHEN lr.request_id IS NULL OR lr.is_approved = 1 OR lr.is_rejected = 1
+                            THEN 3 ELSE 0 END
+                FROM (SELECT DISTINCT TRY_CAST(value AS INT) AS request_id FROM STRING_SPLIT(@ids, ',')) ids
+                LEFT JOIN LeaveRequests lr WITH (UPDLOCK) ON lr.request_id = ids.request_id
+                WHERE ids.request_id IS NOT NULL;
+                
+                -- overlaps leave that is already approved
+                UPDATE b SET outcome = 1
+                FROM #LeaveBatch b
+                WHERE b.outcome = 0 AND EXISTS (
+                    SELECT 1 FROM LeaveRequests lr
+                    WHERE lr.employee_id = b.employee_id AND lr.is_approved = 1
+                      AND lr.start_date <= b.end_date AND lr.end_date >= b.start_date);
+                
+                -- shifts during the leave block approval unless they are to be removed
+                UPDATE b SET outcome = 2
+                FROM #LeaveBatch b
+                WHERE b.outcome = 0 AND @remove_conflicts = 0 AND EXISTS (
+                    SELECT 1 FROM ShiftAssignments sa
+                    WHERE sa.employee_id = b.employee_id AND sa.assigned_date BETWEEN b.start_date AND b.end_date);
+                
+                -- overlaps an earlier surviving request in this batch. Each pass settles the
+                -- first such request per employee: everything before it is approved, so it
+                -- loses. Later ones are checked again once it is out of the way.
+                WHILE 1 = 1
+                BEGIN
+                    UPDATE b SET outcome = 1
+                    FROM #LeaveBatch b
+                    WHERE b.request_id IN (
+                        SELECT MIN(c.request_id) FROM #LeaveBatch c
+                        WHERE c.outcome = 0 AND EXISTS (
+                            SELECT 1 FROM #LeaveBatch o
+                            WHERE o.employee_id = c.employee_id AND o.request_id < c.request_id AND o.outcome = 0
+                              AND o.start_date <= c.end_date AND o.end_date >= c.start_date)
+                        GROUP BY c.employee_id);
+                    IF @@ROWCOUNT = 0 BREAK;
+                END
+                
+                UPDATE lr SET is_approved = 1
+                FROM LeaveRequests lr
+                JOIN #LeaveBatch b ON lr.request_id = b.request_id
+                WHERE b.outcome = 0;
+                
+                IF @remove_conflicts = 1
+                    DELETE sa
+                    FROM ShiftAssignments sa
+                    JOIN #LeaveBatch b ON sa.employee_id = b.employee_id
+                     AND sa.assigned_date BETWEEN b.start_date AND b.end_date
+                    WHERE b.outcome = 0;
+                
+                SELECT request_id, outcome, employee_id, leave_type_id, start_date, end_date
+                FROM #LeaveBatch ORDER BY request_id;
+                """, (','.join(map(str, request_ids)), remove_conflicts), record_type=records.LeaveDecision)
+                self._apply_leave_deltas([(d.employee_id, d.leave_type_id, year, days, -days)
+                                          for d in decisions if d.outcome == records.LEAVE_OK
+                                          for year, days in leave_accrual.split_by_year(d.start_date, d.end_date)
+                                          if days])
+            return decisions
+        except Exception as e:
+            print(f"Approve leave requests error: {e}")
+            return None
+    
+    def reject_leave_requests(self, request_ids):
+        # rejects the pending requests among request_ids and gives back their pending days;
+        # returns a LeaveDecision per request id, or None on error
+        try:
+            with self.transaction():
+                rejected = self.execute_query("""
+                DECLARE @ids VARCHAR(MAX) = ?;
+                UPDATE lr SET is_rejected = 1
+                OUTPUT inserted.request_id, 0 AS outcome, inserted.employee_id, inserted.leave_type_id,
+                       inserted.start_date, inserted.end_date
+                FROM LeaveRequests lr
+                JOIN (SELECT DISTINCT TRY_CAST(value AS INT) AS request_id FROM STRING_SPLIT(@ids, ',')) ids
+                  ON lr.request_id = ids.request_id
+                WHERE lr.is_approved = 0 AND lr.is_rejected = 0
+                """, (','.join(map(str, request_ids)),), record_type=records.LeaveDecision)
+                self._apply_leave_deltas([(d.employee_id, d.leave_type_id, year, 0, -days)
+                                          for d in rejected
+                                          for year, days in leave_accrual.split_by_year(d.start_date, d.end_date)
+                                          if days])
+        except Exception as e:
+            print(f"Reject leave requests error: {e}")
+            return None
+        done = {d.request_id: d for d in rejected}
+        return [done.get(request_id) or records.LeaveDecision(request_id, records.LEAVE_NOT_PENDING,
+                                                              None, None, None, None)
+                for request_id in sorted(set(request_ids))]
+    
+    def _apply_leave_deltas(self, deltas):
+        # deltas: (employee_id, leave_type_id, year, used, pending) added to LeaveBalances
+        # in one MERGE; leave types without a policy are ignored. A year's used days
+        # decide what the next year carries over, so every later balance row of a
+        # changed (employee, leave type) gets its carried_over recomputed in the same
+        # MERGE, year by year as leave_accrual.rebuild() does.
+        if not deltas:
+            return
+        cursor = self.conn.cursor()
+        cursor.execute("""
+        IF OBJECT_ID('tempdb..#LeaveDelta') IS NOT NULL DROP TABLE #LeaveDelta;
+        IF OBJECT_ID('tempdb..#LeaveChain') IS NOT NULL DROP TABLE #LeaveChain;
+        CREATE TABLE #LeaveDelta (employee_id INT, leave_type_id INT, year SMALLINT,
+                                  used DECIMAL(5,2), pending DECIMAL(5,2))
+        """)
+        cursor.fast_executemany = True
+        cursor.executemany("INSERT INTO #LeaveDelta VALUES (?, ?, ?, ?, ?)", deltas)
+        cursor.execute("""
+        SET NOCOUNT ON;
+        -- every year from the first changed one to the last balance row or change after it;
+        -- the balance rows stay locked until the transaction ends
+        WITH d AS (
+            SELECT x.employee_id, x.leave_type_id, x.year, SUM(x.used) AS used, SUM(x.pending) AS pending
+            FROM #LeaveDelta x JOIN LeavePolicies p ON p.leave_type_id = x.leave_type_id
+            GROUP BY x.employee_id, x.leave_type_id, x.year
+        ), span AS (
+            SELECT d.employee_id, d.leave_type_id, MIN(d.year) AS first_year, MAX(d.year) AS last_year
+            FROM d GROUP BY d.employee_id, d.leave_type_id
+        ), years AS (
+            SELECT s.employee_id, s.leave_type_id, s.first_year AS year, s.first_year,
+                   CASE WHEN MAX(b.year) > s.last_year THEN MAX(b.year) ELSE s.last_year END AS last_year
+            FROM span s
+            LEFT JOIN LeaveBalances b WITH (UPDLOCK, HOLDLOCK) ON b.employee_id = s.employee_id
+             AND b.leave_type_id = s.leave_type_id AND b.year > s.first_year
+            GROUP BY s.employee_id, s.leave_type_id, s.first_year, s.last_year
+            UNION ALL
+            SELECT employee_id, leave_type_id, CAST(year + 1 AS SMALLINT), first_year, last_year
+            FROM years WHERE year < last_year
+        )
+        SELECT y.employee_id, y.leave_type_id, y.year, p.days_per_year, p.max_carryover,
+               CASE WHEN y.year = y.first_year THEN 1 ELSE 0 END AS is_first,
+               b.carried_over AS stored_carry, prev.carried_over AS prev_carry, prev.used AS prev_used,
+               COALESCE(b.used, 0) + COALESCE(d.used, 0) AS used,
+               COALESCE(b.pending, 0) + COALESCE(d.pending, 0) AS pending,
+               CASE WHEN b.year IS NOT NULL OR d.year IS NOT NULL THEN 1 ELSE 0 END AS keep
+        INTO #LeaveChain
+        FROM years y
+        JOIN LeavePolicies p ON p.leave_type_id = y.leave_type_id
+        LEFT JOIN LeaveBalances b WITH (UPDLOCK, HOLDLOCK) ON b.employee_id = y.employee_id
+         AND b.leave_type_id = y.leave_type_id AND b.year = y.year
+        LEFT JOIN LeaveBalances prev ON prev.employee_id = y.employee_id
+         AND prev.leave_type_id = y.leave_type_id AND prev.year = y.year - 1
+        LEFT JOIN d ON d.employee_id = y.employee_id AND d.leave_type_id = y.leave_type_id AND d.year = y.year;
+        
+        -- the first changed year keeps its carry-over; each later one carries from the
+        -- year before it, as updated here
+        WITH chain AS (
+            SELECT employee_id, leave_type_id, year, used, pending, keep,
+                   CAST(COALESCE(stored_carry, CASE
+                       WHEN prev_carry IS NULL THEN 0
+                       WHEN prev_carry + days_per_year - prev_used > max_carryover THEN max_carryover
+                       WHEN prev_carry + days_per_year - prev_used < 0 THEN 0
+                       ELSE prev_carry + days_per_year - prev_used END) AS DECIMAL(5,2)) AS carried_over
+            FROM #LeaveChain WHERE is_first = 1
+            UNION ALL
+            SELECT c.employee_id, c.leave_type_id, c.year, c.used, c.pending, c.keep,
+                   CAST(CASE
+                       WHEN ch.carried_over + c.days_per_year - ch.used > c.max_carryover THEN c.max_carryover
+                       WHEN ch.carried_over + c.days_per_year - ch.used < 0 THEN 0
+                       ELSE ch.carried_over + c.days_per_year - ch.used END AS DECIMAL(5,2))
+            FROM chain ch
+            JOIN #LeaveChain c ON c.employee_id = ch.employee_id AND c.leave_type_id = ch.leave_type_id
+             AND c.year = ch.year + 1
+        )
+        MERGE LeaveBalances WITH (HOLDLOCK) AS b
+        USING (SELECT * FROM chain WHERE keep = 1) AS d
+        ON b.employee_id = d.employee_id AND b.leave_type_id = d.leave_type_id AND b.year = d.year
+        WHEN MATCHED THEN
+            UPDATE SET carried_over = d.carried_over, used = d.used, pending = d.pending
+        WHEN NOT MATCHED THEN
+            INSERT (employee_id, leave_type_id, year, carried_over, used, pending)
+            VALUES (d.employee_id, d.leave_type_id, d.year, d.carried_over, d.used, d.pending);
+        
+        DROP TABLE #LeaveChain;
+        """)
     
     # Manager Attendance Report
-    def get_attendance_report(self, report_date=None):
+    def get_attendance_report(self, report_date=None, department_id=None, columnar=None):
         if report_date is None:
             report_date = date.today()
+        params = [report_date]
+        department_filter = ""
+        if department_id:
+            department_filter = "WHERE e.department_id = ?"
+            params.append(department_id)
+        # the scoped employee set is built from two index seeks (scheduled that day, on
+        # approved leave that day) instead of an OR over outer joins of every employee
         query = """
+        DECLARE @report_date DATE = ?;
         SELECT e.employee_id, e.first_name, e.last_name,
                st.start_time as scheduled_start, st.end_time as scheduled_end,
                al.clock_in, al.clock_out,
@@ -250,16 +1066,173 @@ class DatabaseManager:
                    ELSE 'On Time'
                END as status,
                lr.leave_type_id
-        FROM Employees e
-        LEFT JOIN ShiftAssignments sa ON e.employee_id = sa.employee_id AND sa.assigned_date = ?
+        FROM (
+            SELECT employee_id FROM ShiftAssignments WHERE assigned_date = @report_date
+            UNION
+            SELECT employee_id FROM LeaveRequests
+            WHERE is_approved = 1 AND start_date <= @report_date AND end_date >= @report_date
+        ) scope
+        JOIN Employees e ON e.employee_id = scope.employee_id
+        LEFT JOIN ShiftAssignments sa ON e.employee_id = sa.employee_id AND sa.assigned_date = @report_date
         LEFT JOIN ShiftTypes st ON sa.shift_type_id = st.shift_type_id
-        LEFT JOIN AttendanceLogs al ON e.employee_id = al.employee_id AND al.date = ?
-        LEFT JOIN LeaveRequests lr ON e.employee_id = lr.employee_id 
-            AND ? BETWEEN lr.start_date AND lr.end_date AND lr.is_approved = 1
-        WHERE sa.assignment_id IS NOT NULL OR lr.request_id IS NOT NULL
+        LEFT JOIN {attendance} al ON e.employee_id = al.employee_id AND al.date = @report_date
+        OUTER APPLY (
+            SELECT TOP 1 l.leave_type_id FROM LeaveRequests l
+            WHERE l.employee_id = e.employee_id AND l.is_approved = 1
+              AND l.start_date <= @report_date AND l.end_date >= @report_date
+        ) lr
+        {department_filter}
         ORDER BY e.last_name, e.first_name
         """
-        return self.execute_query(query, (report_date, report_date, report_date))
+        return self.execute_query(query.format(department_filter=department_filter,
+                                               attendance=self.attendance_source(report_date)),
+                                  params, columnar=columnar, record_type=records.AttendanceReportRow)
+    
+    # Attendance Archival
+    @staticmethod
+    def attendance_source(day):
+        # the current month is always in the hot table; older days may have been archived
+        return 'AttendanceLogs' if day >= date.today().replace(day=1) else 'AttendanceHistory'
+    
+    def archive_attendance(self, before_date=None, chunk_size=5000):
+        # moves closed months out of the hot tables in small committed chunks so the
+        # live punch tables are never locked for long. Only days the projection is
+        # finished with move: a session takes punches until the end of the next day,
+        # and usp_ProjectClockEvents would insert a second AttendanceLogs row for a
+        # day whose row had already been archived. The current month always stays, as
+        # attendance_source() expects. Returns an ArchivalRun with the cutoff that was
+        # used, which may be earlier than before_date.
+        if before_date is None:
+            before_date = date.today().replace(day=1)
+        query = """
+        SET NOCOUNT ON;
+        DECLARE @chunk INT = ?, @before DATE = ?;
+        DECLARE @month DATE = DATEADD(DAY, 1, EOMONTH(SYSDATETIME(), -1));
+        DECLARE @open DATE = DATEADD(DAY, -1, CAST(SYSDATETIME() AS DATE));
+        DECLARE @unprojected DATE = (
+            SELECT MIN(work_date) FROM ClockEvents
+            WHERE row_version >= (SELECT watermark FROM ProjectionState WHERE name = 'attendance'));
+        IF @month < @before SET @before = @month;
+        IF @open < @before SET @before = @open;
+        IF @unprojected < @before SET @before = @unprojected;
+        
+        DECLARE @ids TABLE (log_id INT PRIMARY KEY);
+        INSERT INTO @ids
+        SELECT TOP (@chunk) log_id FROM AttendanceLogs WHERE date < @before ORDER BY date, log_id;
+        
+        DELETE bl
+        OUTPUT deleted.break_id, deleted.log_id, deleted.start_time, deleted.end_time
+        INTO BreakLogsArchive (break_id, log_id, start_time, end_time)
+        FROM BreakLogs bl JOIN @ids i ON bl.log_id = i.log_id;
+        
+        DELETE al
+        OUTPUT deleted.log_id, deleted.employee_id, deleted.date, deleted.clock_in, deleted.clock_out
+        INTO AttendanceLogsArchive (log_id, employee_id, date, clock_in, clock_out)
+        FROM AttendanceLogs al JOIN @ids i ON al.log_id = i.log_id;
+        
+        DELETE TOP (@chunk) ce
+        OUTPUT deleted.event_id, deleted.employee_id, deleted.ts, deleted.work_date, deleted.event_type
+        INTO ClockEventsArchive (event_id, employee_id, ts, work_date, event_type)
+        FROM ClockEvents ce WHERE ce.work_date < @before;
+        DECLARE @events INT = @@ROWCOUNT;
+        
+        SELECT COUNT(*), @events, @before FROM @ids;
+        """
+        # fold in whatever is pending first, so the watermark does not hold archival back
+        self.project_clock_events()
+        moved = 0
+        cutoff = None
+        try:
+            cursor = self.conn.cursor()
+            while True:
+                cursor.execute(query, (chunk_size, before_date))
+                count, events, cutoff = cursor.fetchone()
+                self.conn.commit()
+                moved += count
+                if count < chunk_size and events < chunk_size:
+                    return records.ArchivalRun(moved, cutoff)
+        except Exception as e:
+            print(f"Archival error: {e}")
+            self.conn.rollback()
+            return records.ArchivalRun(moved, cutoff)
+    
+    # Attendance History (streamed for exports)
+    _ATTENDANCE_HISTORY = """
+        SELECT {top}al.log_id, e.employee_id, e.first_name, e.last_name, d.department_name,
+               al.date, al.clock_in, al.clock_out,
+               ISNULL(b.break_count, 0) AS break_count, ISNULL(b.break_minutes, 0) AS break_minutes
+        FROM AttendanceHistory al
+        JOIN Employees e ON al.employee_id = e.employee_id
+        LEFT JOIN Departments d ON e.department_id = d.department_id
+        OUTER APPLY (
+            SELECT COUNT(*) AS break_count,
+                   SUM((DATEDIFF(MINUTE, bl.start_time, bl.end_time) + 1440) % 1440) AS break_minutes
+            FROM BreakHistory bl
+            WHERE bl.log_id = al.log_id
+        ) b
+        WHERE al.date BETWEEN ? AND ? {department_filter} {after_filter}
+        ORDER BY al.date, al.log_id
+        """
+    _BREAK_HISTORY = """
+        SELECT {top}bl.break_id, bl.log_id, e.employee_id, e.first_name, e.last_name, d.department_name,
+               al.date, bl.start_time, bl.end_time
+        FROM BreakHistory bl
+        JOIN AttendanceHistory al ON bl.log_id = al.log_id
+        JOIN Employees e ON al.employee_id = e.employee_id
+        LEFT JOIN Departments d ON e.department_id = d.department_id
+        WHERE al.date BETWEEN ? AND ? {department_filter} {after_filter}
+        ORDER BY al.date, bl.break_id
+        """
+    
+    def iter_attendance_history(self, start_date, end_date, department_id=None, batch_size=5000):
+        return self._iter_history(self._ATTENDANCE_HISTORY, start_date, end_date, department_id, batch_size,
+                                  records.AttendanceHistoryRow)
+    
+    def iter_break_history(self, start_date, end_date, department_id=None, batch_size=5000):
+        return self._iter_history(self._BREAK_HISTORY, start_date, end_date, department_id, batch_size,
+                                  records.BreakHistoryRow)
+    
+    # the same rows one keyset page at a time, for callers that cannot keep a cursor
+    # open between batches (AsyncDatabaseManager, the API service); after is the
+    # (date, log_id) or (date, break_id) of the last row of the previous page
+    def get_attendance_history_page(self, start_date, end_date, department_id=None, after=None, limit=5000):
+        query, params = self._history_query(self._ATTENDANCE_HISTORY, start_date, end_date, department_id,
+                                            after, 'al.log_id', limit)
+        return self.execute_query(query, params, record_type=records.AttendanceHistoryRow)
+    
+    def get_break_history_page(self, start_date, end_date, department_id=None, after=None, limit=5000):
+        query, params = self._history_query(self._BREAK_HISTORY, start_date, end_date, department_id,
+                                            after, 'bl.break_id', limit)
+        return self.execute_query(query, params, record_type=records.BreakHistoryRow)
+    
+    @staticmethod
+    def _history_query(query, start_date, end_date, department_id, after=None, id_column=None, limit=None):
+        params = [start_date, end_date]
+        department_filter = after_filter = ""
+        if department_id:
+            department_filter = "AND e.department_id = ?"
+            params.append(department_id)
+        if after is not None:
+            after_filter = f"AND (al.date > ? OR (al.date = ? AND {id_column} > ?))"
+            params.extend([after[0], after[0], after[1]])
+        top = f"TOP ({int(limit)}) " if limit else ""
+        return query.format(top=top, department_filter=department_filter, after_filter=after_filter), params
+    
+    def _iter_history(self, query, start_date, end_date, department_id, batch_size, record_type):
+        # a default (firehose) result set is streamed by the server as it is read, so
+        # fetchmany keeps at most batch_size rows in memory regardless of the range size
+        query, params = self._history_query(query, start_date, end_date, department_id)
+        
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield list(map(record_type._make, rows))
+        finally:
+            cursor.close()
     
     # User Account Management
     def get_all_user_accounts(self):
@@ -269,7 +1242,7 @@ class DatabaseManager:
         JOIN Employees e ON ua.employee_id = e.employee_id
         ORDER BY e.last_name, e.first_name
         """
-        return self.execute_query(query)
+        return self.execute_query(query, record_type=records.UserAccount)
     
     def get_employees_without_accounts(self):
         query = """
@@ -279,7 +1252,7 @@ class DatabaseManager:
         WHERE ua.user_id IS NULL
         ORDER BY e.last_name, e.first_name
         """
-        return self.execute_query(query)
+        return self.execute_query(query, record_type=records.EmployeeName)
     
     def check_username_exists(self, username):
         query = "SELECT COUNT(*) FROM UserAccounts WHERE username = ?"
@@ -291,7 +1264,8 @@ class DatabaseManager:
         INSERT INTO UserAccounts (employee_id, username, password, is_admin)
         VALUES (?, ?, ?, ?)
         """
-        return self.execute_query(query, (employee_id, username, password, is_admin), fetch=False)
+        password_hash = self.password_hasher.hash(password)
+        return self.execute_query(query, (employee_id, username, password_hash, is_admin), fetch=False)
     
     def delete_user_account(self, user_id):
         query = "DELETE FROM UserAccounts WHERE user_id = ?"
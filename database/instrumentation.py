@@ -0,0 +1,96 @@
+"""Opt-in hooks around DatabaseManager calls.
+
+Nothing is wrapped until instrument() (or add_listener()) is called, so normal
+runs pay nothing. Once a class is instrumented, every public method call:
+
+  - is pushed on a per-thread in-flight stack that other threads can read with
+    in_flight(thread_id), e.g. to say which query the UI thread is stuck in
+  - is reported to each listener as a Call when it returns or raises
+
+RemoteDatabaseManager.call(name, *args) is reported as the method it runs on
+the service, so thin-client calls are named as they would be locally.
+
+Listeners run on the calling thread and must be quick; one that raises is
+reported and otherwise ignored.
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import namedtuple
+
+# started is time.perf_counter() at entry; depth counts the instrumented calls
+# already in flight on the thread (0 for an outermost call); result is None
+# when the call raised
+Call = namedtuple('Call', 'name args started seconds result error depth thread_id')
+
+# not plain calls: a context manager, a future, and generators that run after returning
+SKIP = {'transaction', 'submit_login', 'iter_attendance_history', 'iter_break_history'}
+
+# run the method named by their first argument: RemoteDatabaseManager.call(name, ...)
+DISPATCH = {'call'}
+
+_listeners = []
+_in_flight = {}  # thread id -> [method name, ...], outermost first
+_instrumented = set()
+_lock = threading.Lock()
+
+
+def _wrap(name, func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        thread_id = threading.get_ident()
+        stack = _in_flight.setdefault(thread_id, [])
+        called, called_args = name, args
+        if name in DISPATCH and args:
+            called, called_args = args[0], args[1:]
+        stack.append(called)
+        started = time.perf_counter()
+        result = error = None
+        try:
+            result = func(self, *args, **kwargs)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            stack.pop()
+            if _listeners:
+                call = Call(called, called_args, started, seconds, result, error, len(stack), thread_id)
+                for listener in list(_listeners):
+                    try:
+                        listener(call)
+                    except Exception as e:
+                        print(f"Instrumentation listener error ({called}): {e}")
+    return wrapper
+
+
+def instrument(cls=None):
+    """Wraps the public methods of cls (DatabaseManager by default) once."""
+    if cls is None:
+        from database.db_manager import DatabaseManager
+        cls = DatabaseManager
+    with _lock:
+        if cls in _instrumented:
+            return
+        for name, value in list(vars(cls).items()):
+            if not name.startswith('_') and name not in SKIP and inspect.isfunction(value):
+                setattr(cls, name, _wrap(name, value))
+        _instrumented.add(cls)
+
+
+def add_listener(listener, cls=None):
+    # listener(call) is called after every instrumented call
+    instrument(cls)
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def in_flight(thread_id):
+    # a copy of the calls running on that thread, outermost first
+    return list(_in_flight.get(thread_id, ()))
@@ -0,0 +1,135 @@
+"""Leave entitlement per employee, leave type and year.
+
+A leave type with a row in LeavePolicies grants days_per_year, either all on
+1 January or a twelfth at the start of each month (accrues_monthly), and up to
+max_carryover unused days move into the next year. Leave is counted in working
+days (Monday to Friday). Leave types without a policy are not limited.
+
+LeaveBalances keeps, per employee, leave type and year, the days carried over
+and the days used (approved) and pending; DatabaseManager updates it on every
+submit and approval. rebuild() recomputes the whole table from LeaveRequests:
+
+    python -m database.leave_accrual
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.columnar import optional_import
+
+
+def leave_days(start, end):
+    # working days in start..end inclusive
+    if end < start:
+        return 0
+    weeks, extra = divmod((end - start).days + 1, 7)
+    first = start.weekday()
+    return weeks * 5 + sum(1 for i in range(extra) if (first + i) % 7 < 5)
+
+
+def split_by_year(start, end):
+    # [(year, working days)]; a request over New Year counts against both years
+    return [(year, leave_days(max(start, date(year, 1, 1)), min(end, date(year, 12, 31))))
+            for year in range(start.year, end.year + 1)]
+
+
+def accrued(policy, year, as_of):
+    # days of `year`'s entitlement earned by as_of
+    if as_of.year < year:
+        return 0.0
+    months = 12 if as_of.year > year or not policy.accrues_monthly else as_of.month
+    return float(policy.days_per_year) * months / 12
+
+
+def available(policy, balance, as_of):
+    # balance is a LeaveBalance; days still free to request
+    return (float(balance.carried_over) + accrued(policy, balance.year, as_of)
+            - float(balance.used) - float(balance.pending))
+
+
+def rebuild(requests, employee_ids, policies, through_year=None):
+    """Balances for every employee and policy leave type from the full request history.
+
+    requests: rows of (employee_id, leave_type_id, start_date, end_date, is_approved)
+    policies: {leave_type_id: LeavePolicy}
+    Returns rows of (employee_id, leave_type_id, year, carried_over, used, pending)
+    for every year from the first request through through_year (default: this year).
+    """
+    np = optional_import('numpy', 'Rebuilding leave balances')
+    through_year = through_year or date.today().year
+    requests = [r for r in requests if r[1] in policies]
+    employee_ids = sorted(set(employee_ids).union(r[0] for r in requests))
+    type_ids = sorted(policies)
+    if not employee_ids or not type_ids:
+        return []
+
+    first_year = min([through_year] + [r[2].year for r in requests])
+    last_year = max([through_year] + [r[3].year for r in requests])
+    years = list(range(first_year, last_year + 1))
+    shape = (len(employee_ids), len(type_ids), len(years))
+    used = np.zeros(shape)
+    pending = np.zeros(shape)
+
+    if requests:
+        employee_index = {employee_id: i for i, employee_id in enumerate(employee_ids)}
+        type_index = {type_id: i for i, type_id in enumerate(type_ids)}
+        employees = np.array([employee_index[r[0]] for r in requests])
+        types = np.array([type_index[r[1]] for r in requests])
+        starts = np.array([r[2] for r in requests], dtype='datetime64[D]')
+        ends = np.array([r[3] for r in requests], dtype='datetime64[D]') + 1  # exclusive
+        approved = np.array([bool(r[4]) for r in requests])
+
+        # one pass per year over all requests at once, clipped to that year
+        for k, year in enumerate(years):
+            lo = np.maximum(starts, np.datetime64(f'{year}-01-01'))
+            hi = np.minimum(ends, np.datetime64(f'{year + 1}-01-01'))
+            days = np.where(hi > lo, np.busday_count(lo, np.maximum(lo, hi)), 0)
+            np.add.at(used[:, :, k], (employees[approved], types[approved]), days[approved])
+            np.add.at(pending[:, :, k], (employees[~approved], types[~approved]), days[~approved])
+
+    # with no hire date on record, entitlement to a leave type starts in the year of the
+    # employee's first request for it (this year otherwise), as in the incremental updates
+    started = np.full(shape[:2], through_year)
+    if requests:
+        np.minimum.at(started, (employees, types), starts.astype('datetime64[Y]').astype(int) + 1970)
+
+    per_year = np.array([float(policies[t].days_per_year) for t in type_ids])
+    cap = np.array([float(policies[t].max_carryover) for t in type_ids])
+    carried = np.zeros(shape)
+    for k in range(1, len(years)):
+        carry = np.clip(carried[:, :, k - 1] + per_year - used[:, :, k - 1], 0, cap)
+        carried[:, :, k] = np.where(started <= years[k - 1], carry, 0)
+
+    # a row wherever something happened, plus this year's row for everyone
+    keep = (used != 0) | (pending != 0) | (carried != 0)
+    keep[:, :, years.index(through_year)] = True
+    e, t, k = np.nonzero(keep)
+    return [(employee_ids[i], type_ids[j], years[y], round(float(c), 2), float(u), float(p))
+            for i, j, y, c, u, p in zip(e.tolist(), t.tolist(), k.tolist(),
+                                        carried[keep], used[keep], pending[keep])]
+
+
+def main():
+    from database.db_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Recompute LeaveBalances from the leave request history')
+    parser.add_argument('--through-year', type=int, help='last year to carry balances into (default: this year)')
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    if not db.connect():
+        sys.exit(1)
+    try:
+        count = db.rebuild_leave_balances(args.through_year)
+        if count is None:
+            sys.exit(1)
+        print(f"Rebuilt {count} leave balance(s)")
+    finally:
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Named record types for DatabaseManager read methods.
+
+Each type is a namedtuple, so a record is a plain tuple with no per-instance
+__dict__ (positional access and unpacking keep working) and fields can be
+read by name. execute_query builds them straight from the cursor.
+"""
+from collections import namedtuple
+
+LoginRecord = namedtuple('LoginRecord', 'user_id employee_id is_admin first_name last_name password')
+User = namedtuple('User', 'user_id employee_id is_admin first_name last_name')
+
+Employee = namedtuple('Employee', 'employee_id first_name last_name department_name title_name '
+                                  'type_name skill_name')
+EmployeeName = namedtuple('EmployeeName', 'employee_id first_name last_name')
+EmployeeProfile = namedtuple('EmployeeProfile', 'employee_id first_name last_name department_id skill_id')
+AvailabilityMask = namedtuple('AvailabilityMask', 'employee_id mask')
+AvailabilityOverride = namedtuple('AvailabilityOverride', 'employee_id override_date mask')
+Department = namedtuple('Department', 'department_id department_name')
+JobTitle = namedtuple('JobTitle', 'job_id title_name')
+Skill = namedtuple('Skill', 'skill_id skill_name')
+EmploymentType = namedtuple('EmploymentType', 'type_id type_name')
+
+WeeklySchedule = namedtuple('WeeklySchedule', 'schedule_id start_date end_date is_published')
+ShiftType = namedtuple('ShiftType', 'shift_type_id shift_name start_time end_time')
+ShiftAssignment = namedtuple('ShiftAssignment', 'assignment_id assigned_date first_name last_name '
+                                                'shift_name start_time end_time')
+AssignmentSlot = namedtuple('AssignmentSlot', 'employee_id shift_type_id assigned_date')
+EmployeeShift = namedtuple('EmployeeShift', 'assigned_date shift_name start_time end_time is_published')
+TodayShift = namedtuple('TodayShift', 'assignment_id shift_name start_time end_time')
+
+AttendanceLog = namedtuple('AttendanceLog', 'log_id clock_in clock_out')
+ActiveBreak = namedtuple('ActiveBreak', 'break_id')
+DayState = namedtuple('DayState', 'shift_name start_time end_time log_id clock_in clock_out break_id')
+CoverageCount = namedtuple('CoverageCount', 'day shift_type_id department_id scheduled on_leave')
+CoverageLeave = namedtuple('CoverageLeave', 'employee_id department_id first_day last_day')
+FloorEmployee = namedtuple('FloorEmployee', 'employee_id first_name last_name department_name location')
+FloorState = namedtuple('FloorState', 'log_id employee_id clock_in clock_out on_break')
+AttendanceReportRow = namedtuple('AttendanceReportRow', 'employee_id first_name last_name scheduled_start '
+                                                        'scheduled_end clock_in clock_out status leave_type_id')
+AttendanceHistoryRow = namedtuple('AttendanceHistoryRow', 'log_id employee_id first_name last_name '
+                                                          'department_name date clock_in clock_out '
+                                                          'break_count break_minutes')
+BreakHistoryRow = namedtuple('BreakHistoryRow', 'break_id log_id employee_id first_name last_name '
+                                                'department_name date start_time end_time')
+# archive_attendance: logs moved, and the cutoff actually used (days before it were archived)
+ArchivalRun = namedtuple('ArchivalRun', 'moved before')
+
+LeaveType = namedtuple('LeaveType', 'leave_type_id type_name')
+LeaveRequest = namedtuple('LeaveRequest', 'request_id first_name last_name type_name start_date end_date '
+                                          'is_approved is_rejected')
+LeaveDecision = namedtuple('LeaveDecision', 'request_id outcome employee_id leave_type_id start_date end_date')
+LeavePolicy = namedtuple('LeavePolicy', 'leave_type_id type_name days_per_year accrues_monthly max_carryover')
+LeaveBalance = namedtuple('LeaveBalance', 'leave_type_id type_name year carried_over used pending')
+
+UserAccount = namedtuple('UserAccount', 'user_id employee_id first_name last_name username is_admin')
+
+# status codes returned by clock_in, clock_out, start_break and end_break
+PUNCH_OK = 0
+PUNCH_NOT_CLOCKED_IN = 1
+PUNCH_ALREADY_CLOCKED_IN = 2
+PUNCH_ALREADY_CLOCKED_OUT = 3
+PUNCH_BREAK_ACTIVE = 4
+PUNCH_NO_ACTIVE_BREAK = 5
+
+# ClockEvents.event_type
+CLOCK_IN = 0
+CLOCK_OUT = 1
+BREAK_START = 2
+BREAK_END = 3
+
+# EmployeeAvailabilityMask.mask: bit weekday * AVAILABILITY_SLOTS + slot (Monday = 0)
+# is set when the employee can work that slot; AvailabilityOverrides.mask holds
+# one date's slot bits. See shifting_system/availability.py.
+AVAILABILITY_SLOTS = 6
+AVAILABILITY_SLOT_MINUTES = 240
+
+# LeaveDecision.outcome from approve_leave_requests and reject_leave_requests
+LEAVE_OK = 0
+LEAVE_OVERLAPS_LEAVE = 1  # overlaps approved leave or an earlier approved request in the batch
+LEAVE_SHIFT_CLASH = 2     # shifts assigned during the leave and remove_conflicts not set
+LEAVE_NOT_PENDING = 3     # already approved or rejected, or no such request
+
+# DatabaseManager method -> the record type of each row it returns (or of the
+# single row, for the lookups that return one record or None)
+RECORD_TYPES = {
+    'get_login_record': LoginRecord,
+    'authenticate_user': User,
+    'get_all_employees': Employee,
+    'get_departments': Department,
+    'get_job_titles': JobTitle,
+    'get_skills': Skill,
+    'get_employment_types': EmploymentType,
+    'get_weekly_schedules': WeeklySchedule,
+    'get_shift_types': ShiftType,
+    'get_shift_assignments': ShiftAssignment,
+    'get_employee_shifts': EmployeeShift,
+    'get_assignment_slots': AssignmentSlot,
+    'get_assignment_slot': AssignmentSlot,
+    'get_employee_profiles': EmployeeProfile,
+    'get_availability_masks': AvailabilityMask,
+    'get_availability_overrides': AvailabilityOverride,
+    'get_signed_in_employees': EmployeeName,
+    'get_today_shift': TodayShift,
+    'get_attendance_log': AttendanceLog,
+    'get_active_break': ActiveBreak,
+    'get_day_state': DayState,
+    'get_coverage_counts': CoverageCount,
+    'get_coverage_leave': CoverageLeave,
+    'get_floor_directory': FloorEmployee,
+    'get_floor_changes': FloorState,
+    'get_leave_types': LeaveType,
+    'get_leave_requests': LeaveRequest,
+    'get_leave_policies': LeavePolicy,
+    'get_leave_balances': LeaveBalance,
+    'approve_leave_requests': LeaveDecision,
+    'reject_leave_requests': LeaveDecision,
+    'get_attendance_report': AttendanceReportRow,
+    'get_attendance_history_page': AttendanceHistoryRow,
+    'get_break_history_page': BreakHistoryRow,
+    'get_all_user_accounts': UserAccount,
+    'get_employees_without_accounts': EmployeeName,
+}
+SINGLE_RECORD_METHODS = {'get_login_record', 'authenticate_user', 'get_today_shift', 'get_assignment_slot',
+                         'get_attendance_log', 'get_active_break', 'get_day_state'}
+
+
+def wrap(method, result):
+    # applies the method's record type to rows that arrived as plain tuples/lists
+    record_type = RECORD_TYPES.get(method)
+    if record_type is None or not result or not isinstance(result, (list, tuple)):
+        return result
+    if method in SINGLE_RECORD_METHODS:
+        return record_type._make(result)
+    return [record_type._make(row) for row in result]
@@ -1,31 +1,48 @@
+import argparse
 import sys
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QStackedWidget,
                              QMessageBox, QDialog)
-from PyQt5.QtCore import Qt, QProcess
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 
 from PyQt5.QtWidgets import QWidget, QLabel, QVBoxLayout
 
 from database.db_manager import DatabaseManager
+from service.api_client import RemoteDatabaseManager
 from utils.auth import LoginDialog
+from utils.stall_detector import StallDetector
+from utils import metrics
+from utils import tracing
 
 from shifting_system.manager_dashboard import ManagerDashboard
 from shifting_system.scheduler_interface import SchedulerInterface
 from shifting_system.employee_roster_view import EmployeeRosterView
+from shifting_system.coverage_heatmap import CoverageHeatmap
 from attendance_system.leave_request_form import LeaveRequestForm
 
 from attendance_system.time_clock_dashboard import TimeClockDashboard
 
 from attendance_system.manager_attendance_report import ManagerAttendanceReport
 
+from attendance_system.occupancy_board import OccupancyBoard
+
 from admin.employee_management import EmployeeManagement
 
+# stacked widget index -> screen; employee screens 0-2, manager screens 3-8
+SCREENS = [TimeClockDashboard, EmployeeRosterView, LeaveRequestForm,
+           ManagerDashboard, SchedulerInterface, ManagerAttendanceReport, EmployeeManagement,
+           OccupancyBoard, CoverageHeatmap]
+
 class MainWindow(QMainWindow):
+    logout_requested = pyqtSignal()
+    
     def __init__(self, db_manager, user_data):
         super().__init__()
         self.db_manager = db_manager
         self.user_data = user_data
+        self.screens = {}
+        self.logging_out = False
         self.init_ui()
     
     def init_ui(self):
@@ -126,6 +143,8 @@ class MainWindow(QMainWindow):
                 ('Scheduler', 4),
                 ('Attendance Report', 5),
                 ('Employee Management', 6),
+                ('Floor Board', 7),
+                ('Coverage', 8),
             ])
         
         for btn_text, index in buttons:
@@ -143,7 +162,7 @@ class MainWindow(QMainWindow):
                     background-color: #3498db;
                 }
             """)
-            btn.clicked.connect(lambda checked, i=index: self.stacked_widget.setCurrentIndex(i))
+            btn.clicked.connect(lambda checked, i=index: self.show_screen(i))
             layout.addWidget(btn)
         
         layout.addStretch()
@@ -151,46 +170,45 @@ class MainWindow(QMainWindow):
         return nav
     
     def load_screens(self):
-        # employee screens (0-2)
-        self.time_clock = TimeClockDashboard(self.db_manager, self.user_data)
-        self.stacked_widget.addWidget(self.time_clock)
-
-        self.roster_view = EmployeeRosterView(self.db_manager, self.user_data)
-        self.stacked_widget.addWidget(self.roster_view)
-
-        self.leave_request = LeaveRequestForm(self.db_manager, self.user_data)
-        self.stacked_widget.addWidget(self.leave_request)
-
-        # manager screens (3-6)
-        self.manager_dashboard = ManagerDashboard(self.db_manager, self.user_data)
-        self.manager_dashboard.edit_schedule_signal.connect(self.open_scheduler)
-        self.stacked_widget.addWidget(self.manager_dashboard)
-        
-        self.scheduler = SchedulerInterface(self.db_manager, self.user_data)
-        self.stacked_widget.addWidget(self.scheduler)
-        
-        self.attendance_report = ManagerAttendanceReport(self.db_manager, self.user_data)
-        self.stacked_widget.addWidget(self.attendance_report)
-        
-        self.employee_mgmt = EmployeeManagement(self.db_manager, self.user_data)
-        self.stacked_widget.addWidget(self.employee_mgmt)
+        # empty slots; each screen is built the first time it is shown, so a
+        # login only pays for the screen the user lands on
+        for _ in SCREENS:
+            self.stacked_widget.addWidget(QWidget())
         
         # set initial screen
         if self.user_data['is_admin']:
-            self.stacked_widget.setCurrentIndex(3)  #manager Dashboard
+            self.show_screen(3)  #manager Dashboard
         else: #if employee
-            print("Employee screens to be developed")
-            self.stacked_widget.setCurrentIndex(0)  #employee initial screen (to be developed)
+            self.show_screen(0)  #time clock
+    
+    def screen(self, index):
+        if index not in self.screens:
+            screen = SCREENS[index](self.db_manager, self.user_data)
+            if index == 3:
+                screen.edit_schedule_signal.connect(self.open_scheduler)
+            placeholder = self.stacked_widget.widget(index)
+            self.stacked_widget.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.stacked_widget.insertWidget(index, screen)
+            self.screens[index] = screen
+        return self.screens[index]
+    
+    def show_screen(self, index):
+        self.stacked_widget.setCurrentWidget(self.screen(index))
     
     def open_scheduler(self, schedule_id):
-        self.scheduler.load_schedule(schedule_id)
-        self.stacked_widget.setCurrentIndex(4) #scheduler screen
+        self.screen(4).load_schedule(schedule_id)
+        self.show_screen(4) #scheduler screen
     
     def logout(self):
-        self.db_manager.disconnect()
-        self.close()
-        QApplication.quit()  # close app
-        QProcess.startDetached(sys.executable, sys.argv)
+        # the session controller closes this window and shows the login again
+        self.logging_out = True
+        self.logout_requested.emit()
+    
+    def closeEvent(self, event):
+        if not self.logging_out:
+            QApplication.quit()
+        super().closeEvent(event)
 
     def create_placeholder_widget(self, index):  #after development you can remove this function
         widget = QWidget()
@@ -205,27 +223,100 @@ class MainWindow(QMainWindow):
         
         return widget
 
+class SessionController:
+    """Switches users inside one process.
+    
+    Logout closes only the user's window and goes straight back to LoginDialog;
+    the database connection, password hasher and imported modules stay warm.
+    """
+    
+    def __init__(self, app, db_manager):
+        self.app = app
+        self.db_manager = db_manager
+        self.window = None
+        # windows come and go between users; quitting is explicit
+        app.setQuitOnLastWindowClosed(False)
+    
+    def login(self):
+        login = LoginDialog(self.db_manager)
+        if login.exec_() != QDialog.Accepted:
+            self.app.quit()
+            return False
+        self.window = MainWindow(self.db_manager, login.user_data)
+        self.window.logout_requested.connect(self.logout)
+        self.window.show()
+        return True
+    
+    def logout(self):
+        window, self.window = self.window, None
+        window.close()
+        window.deleteLater()
+        if isinstance(self.db_manager, RemoteDatabaseManager):
+            self.db_manager.end_session()
+        # return from the logout button's slot before the modal login opens
+        QTimer.singleShot(0, self.login)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='HR Management System')
+    parser.add_argument('--server', metavar='URL',
+                        help='thin client mode: use the API service at URL instead of a direct ODBC connection')
+    parser.add_argument('--stall-log', metavar='PATH',
+                        help='append UI stalls (event loop blocked past --stall-threshold) to PATH as JSON lines')
+    parser.add_argument('--stall-threshold', type=float, default=50, metavar='MS')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help='serve Prometheus metrics on http://HOST:PORT/metrics')
+    parser.add_argument('--metrics-host', default='127.0.0.1', metavar='HOST',
+                        help='address the metrics endpoint listens on (default: 127.0.0.1)')
+    parser.add_argument('--metrics-file', metavar='PATH',
+                        help='rewrite Prometheus metrics to PATH every --metrics-interval seconds')
+    parser.add_argument('--metrics-interval', type=float, default=15, metavar='SECONDS')
+    parser.add_argument('--trace-file', metavar='PATH',
+                        help='append a trace of each UI action and its database calls to PATH as OTLP/JSON lines')
+    args, _ = parser.parse_known_args()
+    return args
+
 def main():
+    args = parse_args()
     app = QApplication(sys.argv)
     
-    # start database
-    db_manager = DatabaseManager()
+    # start database (or the shared API service in thin client mode)
+    if args.server:
+        db_manager = RemoteDatabaseManager(args.server)
+        error = f'Failed to reach the API service at {args.server}.'
+    else:
+        db_manager = DatabaseManager()
+        error = 'Failed to connect to database. Please ensure SQL Server is running.'
+    
+    # hooked before connect() so the first connection is counted
+    registry = None
+    if args.metrics_port is not None or args.metrics_file:
+        registry = metrics.start(args.metrics_port, args.metrics_file, args.metrics_interval,
+                                 db_class=type(db_manager), host=args.metrics_host)
     
     if not db_manager.connect():
-        QMessageBox.critical(None, 'Database Error', 
-                           'Failed to connect to database. Please ensure SQL Server is running.')
+        QMessageBox.critical(None, 'Database Error', error)
         sys.exit(1)
     
-    # show login dialog
-    login = LoginDialog(db_manager)
+    if args.trace_file:
+        tracing.configure(args.trace_file, db_class=type(db_manager))
     
-    if login.exec_() == QDialog.Accepted:
-        main_window = MainWindow(db_manager, login.user_data)
-        main_window.show()
-        sys.exit(app.exec_())
-    else:
-        db_manager.disconnect()
-        sys.exit(0)
+    # show login dialog; logouts come back to it without restarting
+    session = SessionController(app, db_manager)
+    
+    if args.stall_log:
+        def active_screen():
+            if session.window is None:
+                return 'LoginDialog'
+            return type(session.window.stacked_widget.currentWidget()).__name__
+        detector = StallDetector(args.stall_log, args.stall_threshold, screen=active_screen,
+                                 db_class=type(db_manager))
+        detector.start()
+
+    status = app.exec_() if session.login() else 0
+    db_manager.disconnect()
+    if registry is not None:
+        registry.exporter.stop()
+    sys.exit(status)
 
 if __name__ == '__main__':
     main()
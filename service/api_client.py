@@ -0,0 +1,147 @@
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from database import records
+from service import codec
+from utils.passwords import PasswordHasher
+
+
+class RemoteDatabaseManager:
+    """Thin-client stand-in for DatabaseManager that talks to service.api_server.
+
+    Any DatabaseManager method the service exposes can be called by name; rows
+    come back as the same database/records.py record types DatabaseManager returns.
+    A successful authenticate_user stores the session token sent with later calls.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 8765
+        self.timeout = timeout
+        self.conn = None
+        self.token = None
+        self._password_hasher = None
+        self._lock = threading.Lock()
+        self._login_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='remote-login')
+
+    def connect(self):
+        try:
+            status, _ = self._request('GET', '/health')
+            return status == 200
+        except Exception as e:
+            print(f"API service connection error: {e}")
+            return False
+
+    def disconnect(self):
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+        self._login_executor.shutdown(wait=False)
+        if self._password_hasher is not None:
+            self._password_hasher.shutdown()
+            self._password_hasher = None
+
+    def clone(self):
+        # a second client in the same session, with its own keep-alive connection
+        client = RemoteDatabaseManager(self.base_url, self.timeout)
+        client.token = self.token
+        return client
+
+    def _request(self, method, path, body=None):
+        with self._lock:
+            # one keep-alive connection per client, reopened once if the service dropped it
+            for attempt in range(2):
+                if self.conn is None:
+                    self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                headers = {'Content-Type': 'application/json'}
+                if self.token:
+                    headers['Authorization'] = f'Bearer {self.token}'
+                try:
+                    self.conn.request(method, path, body=body, headers=headers)
+                    response = self.conn.getresponse()
+                    return response.status, response.read()
+                except (http.client.HTTPException, ConnectionError):
+                    self.conn.close()
+                    self.conn = None
+                    if attempt:
+                        raise
+
+    def call(self, name, *args, **kwargs):
+        try:
+            status, body = self._request('POST', f'/rpc/{name}',
+                                         codec.dumps({'args': args, 'kwargs': kwargs}))
+            payload = codec.loads(body)
+        except Exception as e:
+            print(f"API call error ({name}): {e}")
+            return None
+        if name == 'authenticate_user':
+            self.token = payload.get('token') if status == 200 else None
+        if status != 200:
+            print(f"API call error ({name}): {payload.get('error')}")
+            return None
+        return records.wrap(name, _to_rows(payload['result']))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    # the service verifies the password; hashes are never sent to terminals
+    def submit_login(self, username, password):
+        return self._login_executor.submit(
+            lambda: (self.call('authenticate_user', username, password), None))
+
+    def update_password_hash(self, user_id, password_hash):
+        return False
+
+    # bulk imports hash on the terminal and send only the hashes; created on first use
+    # so a terminal that never imports does not start a hashing pool
+    @property
+    def password_hasher(self):
+        if self._password_hasher is None:
+            self._password_hasher = PasswordHasher()
+        return self._password_hasher
+
+    # the service cannot hold a cursor open between requests, so exports page through it
+    def iter_attendance_history(self, start_date, end_date, department_id=None, batch_size=5000):
+        return self._iter_pages('get_attendance_history_page', lambda row: (row.date, row.log_id),
+                                start_date, end_date, department_id, batch_size)
+
+    def iter_break_history(self, start_date, end_date, department_id=None, batch_size=5000):
+        return self._iter_pages('get_break_history_page', lambda row: (row.date, row.break_id),
+                                start_date, end_date, department_id, batch_size)
+
+    def _iter_pages(self, name, key, start_date, end_date, department_id, batch_size):
+        after = None
+        while True:
+            rows = self.call(name, start_date, end_date, department_id, after, batch_size)
+            if rows is None:
+                raise RuntimeError(f'{name} failed')
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            after = key(rows[-1])
+
+    def end_session(self):
+        if self.token is None:
+            return
+        try:
+            self._request('POST', '/logout')
+        except Exception as e:
+            print(f"API service logout error: {e}")
+        self.token = None
+
+
+def _to_rows(result):
+    # lists of lists are result sets, a flat list is a single row
+    if isinstance(result, list):
+        if result and all(isinstance(item, list) for item in result):
+            return [tuple(item) for item in result]
+        return tuple(result) if result else []
+    return result
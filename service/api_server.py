@@ -0,0 +1,415 @@
+"""Local JSON API in front of DatabaseManager.
+
+Terminals run the Qt client with --server http://host:8765 and share the
+service's small connection pool instead of opening one ODBC connection each.
+
+authenticate_user answers with a session token, and every other /rpc/ call
+must send it as "Authorization: Bearer <token>". Methods outside
+EMPLOYEE_METHODS need an admin session, and SELF_METHODS run for the session's
+own employee whatever employee_id the client sent (punches always do, even for
+admins). Failed logins are throttled per username and per client address.
+
+    python -m service.api_server --port 8765 --pool-size 4 --cache-ttl 5 --metrics-port 9108
+"""
+import argparse
+import asyncio
+import functools
+import inspect
+import secrets
+import time
+from collections import deque
+
+from database.archival import ArchivalJob
+from database.clock_projector import ProjectionJob
+from database.async_db_manager import AsyncDatabaseManager
+from database.db_manager import DatabaseManager
+from service import codec
+from utils import metrics
+
+# read methods may be answered from the response cache
+READ_METHODS = {
+    'get_all_employees', 'get_departments', 'get_job_titles', 'get_skills',
+    'get_employment_types', 'get_weekly_schedules', 'get_shift_types',
+    'get_shift_assignments', 'get_employee_shifts', 'get_assignment_slots', 'get_assignment_slot',
+    'get_employee_profiles', 'get_availability_masks', 'get_availability_overrides', 'get_signed_in_employees',
+    'get_today_shift', 'get_attendance_log', 'get_active_break', 'get_day_state', 'get_leave_types',
+    'get_floor_directory', 'get_floor_watermark', 'get_floor_changes',
+    'get_coverage_counts', 'get_coverage_leave',
+    'get_leave_requests', 'get_leave_policies', 'get_leave_balances', 'get_attendance_report',
+    'get_attendance_history_page', 'get_break_history_page', 'get_all_user_accounts',
+    'get_employees_without_accounts', 'check_username_exists',
+}
+WRITE_METHODS = {
+    'add_employee', 'add_employee_with_account', 'bulk_import_employees', 'create_weekly_schedule',
+    'publish_schedule', 'add_shift_assignment', 'delete_shift_assignment', 'reassign_shift', 'set_availability_mask',
+    'set_availability_override', 'import_legacy_availability', 'clock_in', 'clock_out',
+    'start_break', 'end_break', 'project_clock_events', 'submit_leave_request', 'approve_leave_request',
+    'approve_leave_requests', 'reject_leave_requests',
+    'create_user_account', 'delete_user_account',
+}
+# never cached, and the password hash itself never leaves the service
+AUTH_METHODS = {'authenticate_user'}
+# punch state changes every few seconds; caching it would show stale buttons
+UNCACHED_METHODS = {'get_attendance_log', 'get_active_break', 'get_day_state', 'get_signed_in_employees',
+                    'get_floor_watermark', 'get_floor_changes'}
+# employee_id (the first argument) always comes from the session. Punches only append
+# to ClockEvents, which nothing cached reads, so they leave the response cache alone;
+# project_clock_events is what changes the attendance tables
+PUNCH_METHODS = {'clock_in', 'clock_out', 'start_break', 'end_break'}
+# employee_id comes from the session unless the session is an admin's
+SELF_METHODS = PUNCH_METHODS | {
+    'get_day_state', 'get_today_shift', 'get_attendance_log', 'get_employee_shifts',
+    'get_leave_balances', 'get_leave_requests', 'submit_leave_request',
+}
+# everything else needs an admin session
+EMPLOYEE_METHODS = SELF_METHODS | {
+    'get_departments', 'get_job_titles', 'get_skills', 'get_employment_types', 'get_shift_types',
+    'get_leave_types', 'get_leave_policies',
+}
+
+MAX_BODY = 1024 * 1024
+MAX_PIPELINE = 32
+MAX_CACHE_ENTRIES = 1024
+SESSION_TTL = 12 * 3600  # seconds since the session was last used
+# failed logins allowed per window, per username and per client address (terminals are shared)
+LOGIN_WINDOW = 300
+LOGIN_ATTEMPTS = 5
+LOGIN_ATTEMPTS_PER_ADDRESS = 50
+
+
+class SessionStore:
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self.sessions = {}  # token -> [user, expires]
+
+    def create(self, user):
+        now = time.monotonic()
+        self.sessions = {token: entry for token, entry in self.sessions.items() if entry[1] > now}
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = [user, now + self.ttl]
+        return token
+
+    def get(self, token):
+        entry = self.sessions.get(token) if token else None
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if entry[1] <= now:
+            del self.sessions[token]
+            return None
+        entry[1] = now + self.ttl
+        return entry[0]
+
+    def revoke(self, token):
+        self.sessions.pop(token, None)
+
+
+class LoginThrottle:
+    def __init__(self, window=LOGIN_WINDOW, per_user=LOGIN_ATTEMPTS, per_address=LOGIN_ATTEMPTS_PER_ADDRESS):
+        self.window = window
+        self.limits = {'user': per_user, 'address': per_address}
+        self.failures = {}  # (kind, value) -> deque of failure times
+
+    def _recent(self, key):
+        failures = self.failures.get(key)
+        if failures is None:
+            return 0
+        cutoff = time.monotonic() - self.window
+        while failures and failures[0] <= cutoff:
+            failures.popleft()
+        if not failures:
+            del self.failures[key]
+            return 0
+        return len(failures)
+
+    def blocked(self, username, address):
+        return (self._recent(('user', username)) >= self.limits['user']
+                or self._recent(('address', address)) >= self.limits['address'])
+
+    def failed(self, username, address):
+        now = time.monotonic()
+        for key in (('user', username), ('address', address)):
+            self.failures.setdefault(key, deque()).append(now)
+
+    def succeeded(self, username):
+        self.failures.pop(('user', username), None)
+
+
+@functools.lru_cache(maxsize=None)
+def _signature(name):
+    return inspect.signature(getattr(DatabaseManager, name))
+
+
+def argument_error(name, args, kwargs):
+    # why args/kwargs do not fit DatabaseManager.<name>, or None when they do
+    try:
+        _signature(name).bind(None, *args, **kwargs)
+    except TypeError as e:
+        return str(e)
+    return None
+
+
+class ResponseCache:
+    def __init__(self, ttl, max_entries=MAX_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key, body):
+        now = time.monotonic()
+        if len(self.entries) >= self.max_entries:
+            self.entries = {k: entry for k, entry in self.entries.items() if entry[0] > now}
+            # still full of live entries: drop the oldest
+            while len(self.entries) >= self.max_entries:
+                del self.entries[next(iter(self.entries))]
+        self.entries.pop(key, None)  # re-inserted at the end, so insertion order stays oldest first
+        self.entries[key] = (now + self.ttl, body)
+
+    def clear(self):
+        # any write may change any read, so the whole cache is dropped
+        self.entries.clear()
+
+
+class ApiServer:
+    def __init__(self, db, cache_ttl=0):
+        self.db = db
+        self.cache = ResponseCache(cache_ttl) if cache_ttl > 0 else None
+        self.sessions = SessionStore()
+        self.throttle = LoginThrottle()
+
+    async def handle_connection(self, reader, writer):
+        # requests are read ahead and dispatched concurrently (pipelining);
+        # responses are written back in request order
+        pending = asyncio.Queue(maxsize=MAX_PIPELINE)
+        writer_task = asyncio.ensure_future(self.write_responses(pending, writer))
+        peer = writer.get_extra_info('peername')
+        address = peer[0] if peer else ''
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                await pending.put((asyncio.ensure_future(self.dispatch(*request[:4], address)), request[4]))
+                if not request[4]:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await pending.put(None)
+            await writer_task
+            writer.close()
+
+    async def read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            return 'BAD', '', b'', None, False
+
+        headers = {}
+        while True:
+            header = await reader.readline()
+            if header in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = header.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return 'BAD', path, b'', None, False
+        if length < 0 or length > MAX_BODY:
+            return 'BAD', path, b'', None, False
+        body = await reader.readexactly(length) if length else b''
+
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        token = token.strip() if scheme.lower() == 'bearer' else None
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        return method, path, body, token, keep_alive
+
+    async def write_responses(self, pending, writer):
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            task, keep_alive = item
+            try:
+                status, body = await task
+            except Exception as e:
+                # a response is still owed, or every request pipelined behind this one would hang
+                status, body = '500 Internal Server Error', codec.dumps({'error': str(e)})
+            writer.write(
+                f'HTTP/1.1 {status}\r\n'
+                f'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1')
+                + body)
+            try:
+                await writer.drain()
+            except ConnectionError:
+                break
+
+    async def dispatch(self, method, path, body, token, address):
+        if method == 'BAD':
+            return '400 Bad Request', codec.dumps({'error': 'malformed request'})
+        if method == 'GET' and path == '/health':
+            return '200 OK', codec.dumps({'status': 'ok'})
+        if method == 'POST' and path == '/logout':
+            self.sessions.revoke(token)
+            return '200 OK', codec.dumps({'result': True})
+        if method != 'POST' or not path.startswith('/rpc/'):
+            return '404 Not Found', codec.dumps({'error': 'unknown endpoint'})
+
+        name = path[len('/rpc/'):]
+        if name not in READ_METHODS | WRITE_METHODS | AUTH_METHODS:
+            return '404 Not Found', codec.dumps({'error': f'unknown method {name}'})
+
+        try:
+            payload = codec.loads(body) if body else {}
+        except ValueError:
+            return '400 Bad Request', codec.dumps({'error': 'invalid JSON'})
+        args = payload.get('args', []) if isinstance(payload, dict) else None
+        kwargs = payload.get('kwargs', {}) if isinstance(payload, dict) else None
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            return '400 Bad Request', codec.dumps({'error': 'body must be {"args": [...], "kwargs": {...}}'})
+        if kwargs.get('columnar'):
+            # numpy/arrow results only make sense in-process
+            return '400 Bad Request', codec.dumps({'error': 'columnar results are not available over the service'})
+
+        if name in AUTH_METHODS:
+            return await self.login(args, kwargs, token, address)
+
+        user = self.sessions.get(token)
+        if user is None:
+            return '401 Unauthorized', codec.dumps({'error': 'login required'})
+        if not user.is_admin and name not in EMPLOYEE_METHODS:
+            return '403 Forbidden', codec.dumps({'error': f'{name} requires an administrator'})
+        if name in PUNCH_METHODS or (name in SELF_METHODS and not user.is_admin):
+            kwargs.pop('employee_id', None)
+            args = [user.employee_id] + list(args[1:])
+
+        error = argument_error(name, args, kwargs)
+        if error is not None:
+            return '400 Bad Request', codec.dumps({'error': f'{name}: {error}'})
+
+        cacheable = self.cache is not None and name in READ_METHODS and name not in UNCACHED_METHODS
+        if cacheable:
+            key = (name, codec.dumps({'args': args, 'kwargs': kwargs}))
+            cached = self.cache.get(key)
+            if cached is not None:
+                return '200 OK', cached
+
+        try:
+            result = await self.db.run(name, *args, **kwargs)
+        except Exception as e:
+            return '503 Service Unavailable', codec.dumps({'error': str(e)})
+
+        response = codec.dumps({'result': result})
+        if cacheable:
+            self.cache.put(key, response)
+        elif self.cache is not None and name in WRITE_METHODS and name not in PUNCH_METHODS:
+            # the attendance report projects before every refresh; with the ProjectionJob
+            # running there is usually nothing new, and then nothing cached is stale
+            if name != 'project_clock_events' or result:
+                self.cache.clear()
+        return '200 OK', response
+
+    async def login(self, args, kwargs, token, address):
+        # a new login on a terminal ends whatever session it held before
+        self.sessions.revoke(token)
+        try:
+            username, password = list(args) + [kwargs[key] for key in ('username', 'password') if key in kwargs]
+        except ValueError:
+            return '400 Bad Request', codec.dumps({'error': 'username and password required'})
+        if self.throttle.blocked(username, address):
+            return '429 Too Many Requests', codec.dumps({'error': 'too many failed logins, try again later'})
+        try:
+            user = await self.db.run('authenticate_user', username, password)
+        except Exception as e:
+            return '503 Service Unavailable', codec.dumps({'error': str(e)})
+        if user is None:
+            self.throttle.failed(username, address)
+            return '200 OK', codec.dumps({'result': None})
+        self.throttle.succeeded(username)
+        return '200 OK', codec.dumps({'result': user, 'token': self.sessions.create(user)})
+
+    async def serve(self, host, port):
+        if not await self.db.connect():
+            return
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"API service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.db.disconnect()
+
+
+def register_metrics(api, registry):
+    if registry is None:
+        return
+    pool = api.db.pool
+    registry.register('pool_connections', 'gauge', 'Pooled database connections by state',
+                      lambda: {(('state', state),): count for state, count in pool.stats().items()
+                               if state in ('open', 'idle', 'in_use')})
+    registry.register('pool_size', 'gauge', 'Maximum pooled database connections', lambda: pool.size)
+    registry.register('pool_timeouts_total', 'counter', 'Requests that found no free connection in time',
+                      lambda: pool.stats()['timeouts'])
+    cache = api.cache
+    if cache is not None:
+        registry.register('response_cache_requests_total', 'counter', 'Response cache lookups by result',
+                          lambda: {(('result', 'hit'),): cache.hits, (('result', 'miss'),): cache.misses})
+        registry.register('response_cache_entries', 'gauge', 'Cached responses, including expired ones',
+                          lambda: len(cache.entries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HR Management System API service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help='seconds to cache read responses (0 disables the cache)')
+    parser.add_argument('--archive-interval', type=float, default=0,
+                        help='hours between attendance archival runs (0 disables the job)')
+    parser.add_argument('--project-interval', type=float, default=5,
+                        help='seconds between punch event projection runs (0 disables the job)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='serve Prometheus metrics on http://METRICS_HOST:PORT/metrics')
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help='address the metrics endpoint listens on (default: 127.0.0.1)')
+    parser.add_argument('--server', default='localhost\\SQLEXPRESS', help='SQL Server instance')
+    parser.add_argument('--database', default='DBPROJECT')
+    args = parser.parse_args()
+
+    if args.archive_interval > 0:
+        ArchivalJob(args.archive_interval * 3600, server=args.server, database=args.database).start()
+    if args.project_interval > 0:
+        ProjectionJob(args.project_interval, server=args.server, database=args.database).start()
+
+    api = ApiServer(AsyncDatabaseManager(args.pool_size, server=args.server, database=args.database),
+                    cache_ttl=args.cache_ttl)
+    if args.metrics_port is not None:
+        # the pool's connections are reported by register_metrics, not as one connection
+        register_metrics(api, metrics.start(port=args.metrics_port, db_class=DatabaseManager,
+                                            host=args.metrics_host, connections=False))
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
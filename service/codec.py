@@ -0,0 +1,43 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+# dates and times are tagged so the client gets real date/time objects back
+# (the screens do date arithmetic on schedule rows)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, time):
+        return {'$time': value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    try:
+        # pyodbc.Row and other row-like sequences
+        return list(value)
+    except TypeError:
+        raise TypeError(f'Cannot encode {type(value).__name__}')
+
+
+def _object_hook(obj):
+    if len(obj) == 1:
+        if '$datetime' in obj:
+            return datetime.fromisoformat(obj['$datetime'])
+        if '$date' in obj:
+            return date.fromisoformat(obj['$date'])
+        if '$time' in obj:
+            return time.fromisoformat(obj['$time'])
+    return obj
+
+
+def dumps(value):
+    return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    return json.loads(data, object_hook=_object_hook)
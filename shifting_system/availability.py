@@ -0,0 +1,126 @@
+"""Employee availability as bitmasks, with an array-backed index for bulk queries.
+
+A week is 7 days of records.AVAILABILITY_SLOTS slots (4 hours each); bit
+weekday * AVAILABILITY_SLOTS + slot of EmployeeAvailabilityMask.mask is set
+when the employee can work that slot. An AvailabilityOverrides row replaces
+one date's slot bits. Employees with no mask row are available at any time.
+
+AvailabilityIndex holds every employee's mask, skill and department in numpy
+arrays, so "who can work the Night shift on 2025-12-02 with skill X" is one
+vectorized AND over all employees. A shift needs every slot it touches,
+including the next day's for shifts that run past midnight.
+"""
+from datetime import timedelta
+
+from database.records import AVAILABILITY_SLOTS, AVAILABILITY_SLOT_MINUTES
+from database.columnar import optional_import
+from shifting_system import labor_rules
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+DAY_PREFIXES = tuple(day[:3].upper() for day in WEEKDAYS)
+DAY_BITS = (1 << AVAILABILITY_SLOTS) - 1
+ALL_WEEK = (1 << 7 * AVAILABILITY_SLOTS) - 1
+
+
+def weekday_index(day_of_week):
+    # a free-text day name as stored in the legacy EmployeeAvailability table, told
+    # apart by its first three letters after leading spaces, in any case; the rule
+    # DatabaseManager.import_legacy_availability applies in SQL
+    try:
+        return DAY_PREFIXES.index((day_of_week or '').lstrip(' ')[:3].upper())
+    except ValueError:
+        return None
+
+
+def slot_label(slot):
+    # 'HH:MM-HH:MM' for one slot of a day
+    start, end = slot * AVAILABILITY_SLOT_MINUTES, (slot + 1) * AVAILABILITY_SLOT_MINUTES
+    return f'{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}'
+
+
+def weekday_mask(unavailable_days):
+    # week mask with whole weekdays (0 = Monday) switched off
+    mask = ALL_WEEK
+    for weekday in unavailable_days:
+        mask &= ~(DAY_BITS << weekday * AVAILABILITY_SLOTS)
+    return mask
+
+
+def required_slots(start_minute, length):
+    # {day offset: slot bits} a shift needs, from labor_rules.shift_spans values
+    needed = {}
+    first = start_minute // AVAILABILITY_SLOT_MINUTES
+    last = (start_minute + length - 1) // AVAILABILITY_SLOT_MINUTES
+    for slot in range(first, last + 1):
+        offset, slot = divmod(slot, AVAILABILITY_SLOTS)
+        needed[offset] = needed.get(offset, 0) | 1 << slot
+    return needed
+
+
+class AvailabilityIndex:
+    def __init__(self, profiles, shift_types, masks, overrides=()):
+        # profiles: EmployeeProfile rows; masks: AvailabilityMask rows; overrides:
+        # AvailabilityOverride rows for the dates that will be queried
+        np = self.np = optional_import('numpy', 'Availability matching')
+        count = len(profiles)
+        self.employee_ids = np.fromiter((p.employee_id for p in profiles), np.int64, count)
+        # 0 stands in for "no skill"/"no department"; real ids start at 1
+        self.skills = np.fromiter((p.skill_id or 0 for p in profiles), np.int64, count)
+        self.departments = np.fromiter((p.department_id or 0 for p in profiles), np.int64, count)
+        position = {employee_id: i for i, employee_id in enumerate(self.employee_ids.tolist())}
+
+        self.masks = np.full(count, ALL_WEEK, dtype=np.uint64)
+        known = [(position[row.employee_id], row.mask) for row in masks if row.employee_id in position]
+        if known:
+            rows, bits = zip(*known)
+            self.masks[np.array(rows, dtype=np.int64)] = np.array(bits, dtype=np.uint64)
+
+        by_date = {}
+        for row in overrides:
+            i = position.get(row.employee_id)
+            if i is not None:
+                by_date.setdefault(row.override_date, ([], []))
+                by_date[row.override_date][0].append(i)
+                by_date[row.override_date][1].append(row.mask)
+        self.overrides = {day: (np.array(rows, dtype=np.int64), np.array(bits, dtype=np.uint64))
+                          for day, (rows, bits) in by_date.items()}
+        self.needed = {shift_type_id: required_slots(start, length)
+                       for shift_type_id, (start, length) in labor_rules.shift_spans(shift_types).items()}
+
+    def day_bits(self, day):
+        # every employee's slot bits for one date, overrides applied
+        np = self.np
+        bits = (self.masks >> np.uint64(day.weekday() * AVAILABILITY_SLOTS)) & np.uint64(DAY_BITS)
+        override = self.overrides.get(day)
+        if override is not None:
+            bits[override[0]] = override[1]
+        return bits
+
+    def available(self, shift_type_id, day, skill_id=None, department_id=None):
+        """Boolean array over employee_ids: who can work the shift on day."""
+        np = self.np
+        match = np.ones(len(self.employee_ids), dtype=bool)
+        for offset, slots in self.needed.get(shift_type_id, {}).items():
+            slots = np.uint64(slots)
+            match &= (self.day_bits(day + timedelta(days=offset)) & slots) == slots
+        if skill_id is not None:
+            match &= self.skills == skill_id
+        if department_id is not None:
+            match &= self.departments == department_id
+        return match
+
+    def employees(self, shift_type_id, day, skill_id=None, department_id=None):
+        # the matching employee ids as a list
+        return self.employee_ids[self.available(shift_type_id, day, skill_id, department_id)].tolist()
+
+
+def load(db_manager, start_date, end_date):
+    # AvailabilityIndex with the overrides for [start_date, end_date]; None on error
+    profiles = db_manager.get_employee_profiles()
+    shift_types = db_manager.get_shift_types()
+    masks = db_manager.get_availability_masks()
+    # a night shift on end_date also needs the next day's first slot
+    overrides = db_manager.get_availability_overrides(start_date, end_date + timedelta(days=1))
+    if any(rows is None for rows in (profiles, shift_types, masks, overrides)):
+        return None
+    return AvailabilityIndex(profiles, shift_types, masks, overrides)
@@ -0,0 +1,128 @@
+"""Staffing coverage per department, shift and day over a date range.
+
+load() reads the assignment counts per (day, shift, department) and the approved
+leave overlapping the range, then builds whole-range arrays with numpy:
+
+    scheduled[d, s, t]  shifts assigned in department d, shift type s, on day t
+    absent[d, s, t]     of those, assignments that fall inside approved leave
+    staffed[d, s, t]    scheduled - absent
+    on_leave[d, t]      employees of department d on approved leave on day t
+
+A quarter for thousands of employees is a few thousand count rows plus the leave
+rows, so nothing is done per employee-day in Python.
+"""
+from datetime import timedelta
+
+from database.columnar import optional_import
+
+UNASSIGNED = 'Unassigned'
+
+
+class Coverage:
+    def __init__(self, start, days, departments, shift_types, scheduled, absent, on_leave):
+        np = optional_import('numpy', 'Coverage')
+        self.start = start
+        self.days = days
+        self.departments = departments    # [(department_id, name)], 0 = no department
+        self.shift_types = shift_types    # [ShiftType]
+        self.scheduled = scheduled
+        self.absent = absent
+        self.staffed = scheduled - absent
+        self.on_leave = on_leave
+
+        # the usual headcount is the median for the same weekday over the range, so a
+        # thin Tuesday stands out against other Tuesdays rather than against Sundays
+        self.usual = np.zeros(self.staffed.shape)
+        for weekday in range(min(7, days)):
+            columns = np.arange(weekday, days, 7)
+            self.usual[:, :, columns] = np.median(self.staffed[:, :, columns], axis=2)[:, :, None]
+
+    def date(self, day):
+        return self.start + timedelta(days=day)
+
+    def shift_index(self, shift_type_id):
+        return next(i for i, shift in enumerate(self.shift_types) if shift.shift_type_id == shift_type_id)
+
+    def totals(self, shift_type_id=None):
+        # (staffed, usual) per department and day, for one shift type or all of them
+        if shift_type_id is None:
+            return self.staffed.sum(axis=1), self.usual.sum(axis=1)
+        i = self.shift_index(shift_type_id)
+        return self.staffed[:, i, :], self.usual[:, i, :]
+
+    def ratio(self, shift_type_id=None):
+        # staffed / usual; NaN where nobody is usually scheduled
+        np = optional_import('numpy', 'Coverage')
+        staffed, usual = self.totals(shift_type_id)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(usual > 0, staffed / np.maximum(usual, 1e-9), np.nan)
+
+
+def _positions(np, ids, values):
+    # (index of each value in ids, whether it was found); ids need not be sorted
+    order = np.argsort(ids, kind='stable')
+    slots = np.minimum(np.searchsorted(ids, values, sorter=order), len(ids) - 1)
+    index = order[slots]
+    return index, ids[index] == values
+
+
+def build(start, days, departments, shift_types, counts, leave):
+    """Coverage from get_coverage_counts and get_coverage_leave rows.
+
+    counts: (day, shift_type_id, department_id, scheduled, on_leave) with day as
+    an offset from start and department_id 0 for no department
+    leave: (employee_id, department_id, first_day, last_day), clipped to the range
+
+    Rows naming a department or shift type that is not in departments or
+    shift_types (created after those were read) are left out.
+    """
+    np = optional_import('numpy', 'Coverage')
+    department_ids = np.array(sorted({0} | {d[0] for d in departments}), dtype=np.int64)
+    names = dict(departments)
+    departments = [(int(i), names.get(int(i), UNASSIGNED)) for i in department_ids]
+    shift_ids = np.array([shift.shift_type_id for shift in shift_types], dtype=np.int64)
+    shape = (len(department_ids), len(shift_ids), days)
+    size = int(np.prod(shape))
+
+    scheduled = np.zeros(shape, dtype=np.int64)
+    absent = np.zeros(shape, dtype=np.int64)
+    if counts and len(shift_ids):
+        c = np.array(counts, dtype=np.int64).reshape(-1, 5)
+        dept_index, dept_known = _positions(np, department_ids, c[:, 2])
+        shift_index, shift_known = _positions(np, shift_ids, c[:, 1])
+        known = dept_known & shift_known
+        c = c[known]
+        flat = np.ravel_multi_index((dept_index[known], shift_index[known], c[:, 0]), shape)
+        scheduled = np.bincount(flat, weights=c[:, 3], minlength=size).reshape(shape).astype(np.int64)
+        absent = np.bincount(flat, weights=c[:, 4], minlength=size).reshape(shape).astype(np.int64)
+
+    on_leave = np.zeros(shape[::2], dtype=np.int64)
+    if leave:
+        rows = np.array(leave, dtype=np.int64).reshape(-1, 4)
+        rows = rows[_positions(np, department_ids, rows[:, 1])[1]]
+        employees, depts, first, last = rows.T
+        # expand every leave range into one (employee, day) pair per day at once
+        lengths = last - first + 1
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        day = np.repeat(first, lengths) + offsets
+        # overlapping requests of one employee count once per day
+        keys, index = np.unique(np.repeat(employees, lengths) * days + day, return_index=True)
+        dept_index = _positions(np, department_ids, np.repeat(depts, lengths)[index])[0]
+        on_leave = np.bincount(dept_index * days + keys % days,
+                               minlength=shape[0] * days).reshape(shape[0], days)
+
+    return Coverage(start, days, departments, list(shift_types), scheduled, absent, on_leave)
+
+
+def load(db_manager, start, end):
+    # None when a query failed
+    days = (end - start).days + 1
+    departments = db_manager.get_departments()
+    shift_types = db_manager.get_shift_types()
+    counts = db_manager.get_coverage_counts(start, end)
+    leave = db_manager.get_coverage_leave(start, end)
+    if departments is None or shift_types is None or counts is None or leave is None:
+        return None
+    shift_types = sorted(shift_types, key=lambda shift: shift.shift_type_id)
+    return build(start, days, [(d.department_id, d.department_name) for d in departments],
+                 shift_types, counts, leave)
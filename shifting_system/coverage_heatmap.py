@@ -0,0 +1,137 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QTableWidget, QTableWidgetItem,
+                             QComboBox, QDateEdit, QHeaderView, QMessageBox)
+from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtGui import QFont, QColor
+from datetime import timedelta
+
+from shifting_system import coverage
+
+# staffed / usual below these is short (red) or thin (yellow)
+SHORT = 0.8
+THIN = 0.95
+
+class CoverageHeatmap(QWidget):
+    def __init__(self, db_manager, user_data):
+        super().__init__()
+        self.db_manager = db_manager
+        self.user_data = user_data
+        self.coverage = None
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # header
+        header = QLabel('Department Coverage')
+        header.setFont(QFont('Arial', 16, QFont.Bold))
+        layout.addWidget(header)
+
+        # controls
+        controls = QHBoxLayout()
+
+        controls.addWidget(QLabel('From:'))
+        self.start_date = QDateEdit()
+        self.start_date.setCalendarPopup(True)
+        today = QDate.currentDate()
+        self.start_date.setDate(QDate(today.year(), 3 * ((today.month() - 1) // 3) + 1, 1))  # quarter start
+        controls.addWidget(self.start_date)
+
+        self.range_combo = QComboBox()
+        self.range_combo.addItem('4 weeks', 28)
+        self.range_combo.addItem('Quarter (13 weeks)', 91)
+        self.range_combo.setCurrentIndex(1)
+        controls.addWidget(self.range_combo)
+
+        controls.addWidget(QLabel('Shift:'))
+        self.shift_combo = QComboBox()
+        self.shift_combo.addItem('All Shifts', None)
+        for shift in self.db_manager.get_shift_types() or []:
+            self.shift_combo.addItem(shift.shift_name, shift.shift_type_id)
+        self.shift_combo.currentIndexChanged.connect(self.render)
+        controls.addWidget(self.shift_combo)
+
+        load_btn = QPushButton('Load Coverage')
+        load_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #3498db;
+                color: white;
+                padding: 8px 15px;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #2980b9;
+            }
+        """)
+        load_btn.clicked.connect(self.load_coverage)
+        controls.addWidget(load_btn)
+
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        # legend
+        legend = QHBoxLayout()
+        legend.addWidget(QLabel('Staffed vs. the usual for that weekday:'))
+        for text, color in ((' Normal ', 'lightgreen'), (f' Under {THIN:.0%} ', 'lightyellow'),
+                            (f' Under {SHORT:.0%} ', 'lightcoral'), (' Not usually staffed ', 'lightgray')):
+            label = QLabel(text)
+            label.setStyleSheet(f'background-color: {color}; padding: 5px;')
+            legend.addWidget(label)
+        legend.addStretch()
+        layout.addLayout(legend)
+
+        # departments down, days across
+        self.table = QTableWidget()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        # fixed-width day columns; sizing 91 columns to their contents is slow
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setDefaultSectionSize(48)
+        layout.addWidget(self.table)
+
+        self.setLayout(layout)
+        self.load_coverage()
+
+    def load_coverage(self):
+        start = self.start_date.date().toPyDate()
+        end = start + timedelta(days=self.range_combo.currentData() - 1)
+        try:
+            self.coverage = coverage.load(self.db_manager, start, end)
+        except RuntimeError as e:
+            QMessageBox.warning(self, 'Error', str(e))
+            return
+        self.render()
+
+    def render(self):
+        result = self.coverage
+        if result is None:
+            self.table.setRowCount(0)
+            return
+        shift_type_id = self.shift_combo.currentData()
+        staffed, usual = result.totals(shift_type_id)
+        ratio = result.ratio(shift_type_id)
+
+        # departments nobody is scheduled in are left out
+        rows = [i for i in range(len(result.departments)) if usual[i].any() or staffed[i].any()]
+        self.table.setRowCount(len(rows))
+        self.table.setColumnCount(result.days)
+        self.table.setVerticalHeaderLabels([result.departments[i][1] for i in rows])
+        self.table.setHorizontalHeaderLabels([result.date(day).strftime('%a\n%m-%d') for day in range(result.days)])
+
+        for row, i in enumerate(rows):
+            name = result.departments[i][1]
+            for day in range(result.days):
+                item = QTableWidgetItem(str(int(staffed[i, day])))
+                item.setTextAlignment(Qt.AlignCenter)
+                value = ratio[i, day]
+                if value != value:  # NaN: nobody usually scheduled
+                    item.setBackground(QColor(211, 211, 211))  # Light gray
+                elif value < SHORT:
+                    item.setBackground(QColor(240, 128, 128))  # Light coral
+                elif value < THIN:
+                    item.setBackground(QColor(255, 255, 200))  # Light yellow
+                else:
+                    item.setBackground(QColor(144, 238, 144))  # Light green
+                item.setToolTip(f"{name}, {result.date(day).strftime('%A %d %B %Y')}\n"
+                                f"Staffed: {int(staffed[i, day])} (usually {usual[i, day]:g})\n"
+                                f"On approved leave: {int(result.on_leave[i, day])}")
+                self.table.setItem(row, day, item)
@@ -53,15 +53,14 @@ class EmployeeRosterView(QWidget):
         self.table.setRowCount(len(shifts))
         
         for row, shift in enumerate(shifts):
-            # shift: (assigned_date, shift_name, start_time, end_time, is_published)
-            self.table.setItem(row, 0, QTableWidgetItem(str(shift[0])))
-            self.table.setItem(row, 1, QTableWidgetItem(shift[1]))
-            self.table.setItem(row, 2, QTableWidgetItem(str(shift[2])))
-            self.table.setItem(row, 3, QTableWidgetItem(str(shift[3])))
+            self.table.setItem(row, 0, QTableWidgetItem(str(shift.assigned_date)))
+            self.table.setItem(row, 1, QTableWidgetItem(shift.shift_name))
+            self.table.setItem(row, 2, QTableWidgetItem(str(shift.start_time)))
+            self.table.setItem(row, 3, QTableWidgetItem(str(shift.end_time)))
             
-            status = 'Published' if shift[4] else 'Draft'
+            status = 'Published' if shift.is_published else 'Draft'
             status_item = QTableWidgetItem(status)
-            if shift[4]:
+            if shift.is_published:
                 status_item.setBackground(Qt.green)
             else:
                 status_item.setBackground(Qt.yellow)
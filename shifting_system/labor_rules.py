@@ -0,0 +1,234 @@
+"""Labor-rule checks for shift assignments.
+
+Three rules, with limits overridable from the environment:
+
+    rest            at least HR_MIN_REST_HOURS between the end of one shift and
+                    the start of the next (shifts that overlap are reported too)
+    weekly hours    at most HR_MAX_WEEK_HOURS per Monday-Sunday week, counted on
+                    the week a shift starts in
+    consecutive     at most HR_MAX_CONSECUTIVE_DAYS worked days in a row
+
+RuleEngine keeps rolling state per employee (shifts by day, minutes per week)
+so check() looks at a fixed number of neighbouring days whatever the schedule
+size. recheck() evaluates a whole list of assignments at once with numpy.
+"""
+import os
+from collections import defaultdict, namedtuple
+from datetime import date, timedelta
+
+from database.columnar import optional_import
+
+REST = 'rest'
+OVERLAP = 'overlap'
+WEEK_HOURS = 'weekly hours'
+CONSECUTIVE_DAYS = 'consecutive days'
+
+Limits = namedtuple('Limits', 'min_rest_hours max_week_hours max_consecutive_days')
+DEFAULT_LIMITS = Limits(float(os.environ.get('HR_MIN_REST_HOURS', 11)),
+                        float(os.environ.get('HR_MAX_WEEK_HOURS', 48)),
+                        int(os.environ.get('HR_MAX_CONSECUTIVE_DAYS', 6)))
+
+Violation = namedtuple('Violation', 'employee_id assigned_date shift_type_id rule message')
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def shift_spans(shift_types):
+    # shift_type_id -> (start minute of the day, length in minutes); an end at or
+    # before the start means the shift runs past midnight
+    spans = {}
+    for shift in shift_types:
+        start = _minutes(shift.start_time)
+        length = (_minutes(shift.end_time) - start) % 1440 or 1440
+        spans[shift.shift_type_id] = (start, length)
+    return spans
+
+
+def window(start_date, end_date, limits=DEFAULT_LIMITS):
+    # the assignments that can affect a check inside [start_date, end_date]: the
+    # whole weeks it touches plus enough days either side for rest and streaks
+    margin = max(2, limits.max_consecutive_days)
+    first = min(start_date - timedelta(days=start_date.weekday()), start_date - timedelta(days=margin))
+    last = max(end_date + timedelta(days=6 - end_date.weekday()), end_date + timedelta(days=margin))
+    return first, last
+
+
+def _describe(minutes):
+    return f'{minutes / 60:g}h'
+
+
+class _EmployeeState:
+    __slots__ = ('days', 'week_minutes')
+
+    def __init__(self):
+        self.days = defaultdict(list)         # ordinal -> [(start, end)] in absolute minutes
+        self.week_minutes = defaultdict(int)  # ordinal of the week's Monday -> minutes
+
+
+class RuleEngine:
+    def __init__(self, shift_types, limits=DEFAULT_LIMITS):
+        self.spans = shift_spans(shift_types)
+        self.names = {shift.shift_type_id: shift.shift_name for shift in shift_types}
+        self.limits = limits
+        self.employees = {}
+        self.pending = defaultdict(list)  # employee_id -> rows not yet folded into state
+
+    def _interval(self, shift_type_id, day):
+        start, length = self.spans[shift_type_id]
+        start += day.toordinal() * 1440
+        return start, start + length
+
+    def load(self, assignments):
+        # rows with employee_id, shift_type_id, assigned_date (e.g. AssignmentSlot); an
+        # employee's state is only built the first time they are checked
+        pending = self.pending
+        for row in assignments:
+            pending[row[0]].append(row)
+        return self
+
+    def _state(self, employee_id):
+        state = self.employees.get(employee_id)
+        if state is None:
+            state = self.employees[employee_id] = _EmployeeState()
+            for row in self.pending.pop(employee_id, ()):
+                self._fold(state, row.shift_type_id, row.assigned_date)
+        return state
+
+    def add(self, employee_id, shift_type_id, day):
+        self._fold(self._state(employee_id), shift_type_id, day)
+
+    def week_minutes(self, employee_id, day):
+        # minutes already assigned in the Monday-Sunday week containing day
+        return self._state(employee_id).week_minutes.get(day.toordinal() - day.weekday(), 0)
+
+    def _fold(self, state, shift_type_id, day):
+        start, end = self._interval(shift_type_id, day)
+        ordinal = day.toordinal()
+        state.days[ordinal].append((start, end))
+        state.week_minutes[ordinal - day.weekday()] += end - start
+
+    def check(self, employee_id, shift_type_id, day):
+        """Violations the assignment would cause; [] when it is fine."""
+        limits = self.limits
+        state = self._state(employee_id)
+        start, end = self._interval(shift_type_id, day)
+        ordinal = day.toordinal()
+        name = self.names.get(shift_type_id, 'shift')
+        violations = []
+
+        def violation(rule, message):
+            violations.append(Violation(employee_id, day, shift_type_id, rule, message))
+
+        # shifts are at most a day long, so only the two days either side can be too close
+        rest = limits.min_rest_hours * 60
+        for other in range(ordinal - 2, ordinal + 3):
+            for other_start, other_end in state.days.get(other, ()):
+                if other_start < end and start < other_end:
+                    violation(OVERLAP, f'{name} shift overlaps another shift on {date.fromordinal(other)}')
+                else:
+                    gap = start - other_end if other_end <= start else other_start - end
+                    if gap < rest:
+                        violation(REST, f'only {_describe(gap)} rest next to the shift on '
+                                        f'{date.fromordinal(other)} (minimum {limits.min_rest_hours:g}h)')
+
+        week = state.week_minutes.get(ordinal - day.weekday(), 0) + end - start
+        if week > limits.max_week_hours * 60:
+            violation(WEEK_HOURS, f'{_describe(week)} in the week (maximum {limits.max_week_hours:g}h)')
+
+        if ordinal not in state.days:
+            run = 1
+            for step in (-1, 1):
+                other = ordinal + step
+                while other in state.days and run <= limits.max_consecutive_days:
+                    run += 1
+                    other += step
+            if run > limits.max_consecutive_days:
+                violation(CONSECUTIVE_DAYS, f'more than {limits.max_consecutive_days} days in a row')
+        return violations
+
+
+def recheck(assignments, shift_types, limits=DEFAULT_LIMITS):
+    """Every violation in a list of assignments, in one vectorized pass.
+
+    assignments: rows of employee_id, shift_type_id, assigned_date. Each
+    violation is reported on the later shift involved, so a schedule built
+    with RuleEngine.check in date order reports the same shifts.
+    """
+    np = optional_import('numpy', 'Re-checking a schedule')
+    if not assignments:
+        return []
+    spans = shift_spans(shift_types)
+    type_ids = np.array(sorted(spans))
+    span_table = np.array([spans[i] for i in type_ids.tolist()], dtype=np.int64).reshape(-1, 2)
+
+    employees = np.fromiter((row.employee_id for row in assignments), np.int64, len(assignments))
+    shift_ids = np.fromiter((row.shift_type_id for row in assignments), np.int64, len(assignments))
+    days = np.fromiter((row.assigned_date.toordinal() for row in assignments), np.int64, len(assignments))
+    kind = np.searchsorted(type_ids, shift_ids)
+    starts = days * 1440 + span_table[kind, 0]
+    lengths = span_table[kind, 1]
+
+    order = np.lexsort((starts, employees))
+    employees, shift_ids, days, starts, lengths = (a[order] for a in (employees, shift_ids, days, starts, lengths))
+    ends = starts + lengths
+    same = np.zeros(len(order), dtype=bool)
+    same[1:] = employees[1:] == employees[:-1]
+
+    found = []  # (index, rule, message)
+
+    # rest: each shift against the latest end among the employee's earlier shifts;
+    # offsetting every employee by more than the whole span keeps one running max
+    # from leaking across employees
+    rank = np.cumsum(~same) - 1
+    base = ends.min()
+    stride = ends.max() - base + 1
+    latest = np.maximum.accumulate(ends - base + rank * stride) - rank * stride + base
+    gap = np.zeros(len(order), dtype=np.int64)
+    gap[1:] = starts[1:] - latest[:-1]
+    for i in np.flatnonzero(same & (gap < 0)):
+        found.append((i, OVERLAP, 'overlaps the previous shift'))
+    for i in np.flatnonzero(same & (gap >= 0) & (gap < limits.min_rest_hours * 60)):
+        found.append((i, REST, f'only {_describe(int(gap[i]))} rest after the previous shift '
+                               f'(minimum {limits.min_rest_hours:g}h)'))
+
+    # weekly hours: running total per (employee, week); flag every shift past the limit
+    weeks = days - (days - 1) % 7  # ordinal 1 is a Monday, so this is the week's Monday
+    new_week = ~same
+    new_week[1:] |= weeks[1:] != weeks[:-1]
+    group = np.cumsum(new_week) - 1
+    total = np.cumsum(lengths)
+    before_group = (total - lengths)[new_week]
+    running = total - before_group[group]
+    limit = limits.max_week_hours * 60
+    for i in np.flatnonzero(running > limit):
+        found.append((i, WEEK_HOURS, f'{_describe(int(running[i]))} in the week so far '
+                                     f'(maximum {limits.max_week_hours:g}h)'))
+
+    # consecutive days: runs of distinct worked days per employee
+    first_of_day = np.ones(len(order), dtype=bool)
+    first_of_day[1:] = ~same[1:] | (days[1:] != days[:-1])
+    worked = np.flatnonzero(first_of_day)
+    day_list, emp_list = days[worked], employees[worked]
+    breaks = np.ones(len(worked), dtype=bool)
+    breaks[1:] = (emp_list[1:] != emp_list[:-1]) | (day_list[1:] - day_list[:-1] != 1)
+    run_start = np.flatnonzero(breaks)
+    position = np.arange(len(worked)) - run_start[np.cumsum(breaks) - 1] + 1
+    for j in np.flatnonzero(position > limits.max_consecutive_days):
+        found.append((worked[j], CONSECUTIVE_DAYS,
+                      f'day {position[j]} in a row (maximum {limits.max_consecutive_days})'))
+
+    found.sort(key=lambda f: (int(employees[f[0]]), int(starts[f[0]])))
+    return [Violation(int(employees[i]), date.fromordinal(int(days[i])), int(shift_ids[i]), rule, message)
+            for i, rule, message in found]
+
+
+def load(db_manager, start_date, end_date, limits=DEFAULT_LIMITS):
+    # RuleEngine loaded with everything that can affect assignments in the range; None on error
+    shift_types = db_manager.get_shift_types()
+    first, last = window(start_date, end_date, limits)
+    assignments = db_manager.get_assignment_slots(first, last)
+    if shift_types is None or assignments is None:
+        return None
+    return RuleEngine(shift_types, limits).load(assignments)
@@ -5,6 +5,8 @@ from PyQt5.QtCore import Qt, pyqtSignal, QDate
 from PyQt5.QtGui import QFont
 from datetime import datetime, timedelta
 
+from utils import tracing
+
 class ManagerDashboard(QWidget):
     edit_schedule_signal = pyqtSignal(int)  # emits schedule_id
     
@@ -71,41 +73,43 @@ class ManagerDashboard(QWidget):
         self.setLayout(layout)
         self.load_schedules()
     
+    @tracing.traced
     def load_schedules(self):
         schedules = self.db_manager.get_weekly_schedules()
         self.table.setRowCount(len(schedules))
         
-        for row, schedule in enumerate(schedules):
-            self.table.setItem(row, 0, QTableWidgetItem(str(schedule[0])))
-            self.table.setItem(row, 1, QTableWidgetItem(str(schedule[1])))
-            self.table.setItem(row, 2, QTableWidgetItem(str(schedule[2])))
-            
-            status = 'Published' if schedule[3] else 'Draft'
-            status_item = QTableWidgetItem(status)
-            if schedule[3]:
-                status_item.setBackground(Qt.green)
-            else:
-                status_item.setBackground(Qt.yellow)
-            self.table.setItem(row, 3, status_item)
-            
-            # action Buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout()
-            action_layout.setContentsMargins(5, 2, 5, 2)
-            
-            edit_btn = QPushButton('Edit')
-            edit_btn.setStyleSheet('background-color: #3498db; color: white; padding: 5px;')
-            edit_btn.clicked.connect(lambda checked, sid=schedule[0]: self.edit_schedule(sid))
-            action_layout.addWidget(edit_btn)
-            
-            if not schedule[3]:  # If not published
-                publish_btn = QPushButton('Publish')
-                publish_btn.setStyleSheet('background-color: #27ae60; color: white; padding: 5px;')
-                publish_btn.clicked.connect(lambda checked, sid=schedule[0]: self.publish_schedule(sid))
-                action_layout.addWidget(publish_btn)
-            
-            action_widget.setLayout(action_layout)
-            self.table.setCellWidget(row, 4, action_widget)
+        with tracing.span('populate schedules table', rows=len(schedules)):
+            for row, schedule in enumerate(schedules):
+                self.table.setItem(row, 0, QTableWidgetItem(str(schedule.schedule_id)))
+                self.table.setItem(row, 1, QTableWidgetItem(str(schedule.start_date)))
+                self.table.setItem(row, 2, QTableWidgetItem(str(schedule.end_date)))
+                
+                status = 'Published' if schedule.is_published else 'Draft'
+                status_item = QTableWidgetItem(status)
+                if schedule.is_published:
+                    status_item.setBackground(Qt.green)
+                else:
+                    status_item.setBackground(Qt.yellow)
+                self.table.setItem(row, 3, status_item)
+                
+                # action Buttons
+                action_widget = QWidget()
+                action_layout = QHBoxLayout()
+                action_layout.setContentsMargins(5, 2, 5, 2)
+                
+                edit_btn = QPushButton('Edit')
+                edit_btn.setStyleSheet('background-color: #3498db; color: white; padding: 5px;')
+                edit_btn.clicked.connect(lambda checked, sid=schedule.schedule_id: self.edit_schedule(sid))
+                action_layout.addWidget(edit_btn)
+                
+                if not schedule.is_published:
+                    publish_btn = QPushButton('Publish')
+                    publish_btn.setStyleSheet('background-color: #27ae60; color: white; padding: 5px;')
+                    publish_btn.clicked.connect(lambda checked, sid=schedule.schedule_id: self.publish_schedule(sid))
+                    action_layout.addWidget(publish_btn)
+                
+                action_widget.setLayout(action_layout)
+                self.table.setCellWidget(row, 4, action_widget)
     
     def create_schedule(self):
         # get start date
@@ -118,9 +122,23 @@ class ManagerDashboard(QWidget):
             start = datetime.strptime(start_date, '%Y-%m-%d').date()
             end = start + timedelta(days=6)  # One week
             
-            if self.db_manager.create_weekly_schedule(start, end):
+            # offer to start from the latest week's assignments
+            copy_from = None
+            schedules = self.db_manager.get_weekly_schedules()
+            if schedules:
+                latest = schedules[0]
+                reply = QMessageBox.question(self, 'Create Schedule',
+                                             f'Copy the shift assignments from the week of {latest.start_date}?',
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if reply == QMessageBox.Yes:
+                    copy_from = latest.schedule_id
+            
+            with tracing.span('ManagerDashboard.create_schedule'):
+                created = self.db_manager.create_weekly_schedule(start, end, copy_from)
+                if created:
+                    self.load_schedules()
+            if created:
                 QMessageBox.information(self, 'Success', 'Schedule created successfully!')
-                self.load_schedules()
             else:
                 QMessageBox.warning(self, 'Error', 'Failed to create schedule')
         except ValueError:
@@ -134,8 +152,11 @@ class ManagerDashboard(QWidget):
                                      'Are you sure you want to publish this schedule?',
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            if self.db_manager.publish_schedule(schedule_id):
+            with tracing.span('ManagerDashboard.publish_schedule'):
+                published = self.db_manager.publish_schedule(schedule_id)
+                if published:
+                    self.load_schedules()
+            if published:
                 QMessageBox.information(self, 'Success', 'Schedule published!')
-                self.load_schedules()
             else:
                 QMessageBox.warning(self, 'Error', 'Failed to publish schedule')
\ No newline at end of file
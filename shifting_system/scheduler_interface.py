@@ -1,11 +1,17 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QTableWidget, QTableWidgetItem,
                              QComboBox, QDialog, QDialogButtonBox, QMessageBox,
-                             QHeaderView, QListWidget)
+                             QHeaderView, QListWidget, QListWidgetItem, QCheckBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from datetime import datetime, timedelta
 
+from database.records import AVAILABILITY_SLOTS
+from shifting_system import availability
+from shifting_system import labor_rules
+from shifting_system import shift_swap
+from utils import tracing
+
 class SchedulerInterface(QWidget):
     def __init__(self, db_manager, user_data):
         super().__init__()
@@ -13,6 +19,9 @@ class SchedulerInterface(QWidget):
         self.user_data = user_data
         self.current_schedule_id = None
         self.schedule_info = None
+        self.rules = None
+        self.swaps = None
+        self.availability = None
         self.init_ui()
     
     def init_ui(self):
@@ -42,8 +51,32 @@ class SchedulerInterface(QWidget):
         self.skill_filter.currentIndexChanged.connect(self.filter_employees)
         controls.addWidget(self.skill_filter)
         
+        # availability filter; the days are filled in when a schedule is loaded
+        controls.addWidget(QLabel('Available:'))
+        self.day_filter = QComboBox()
+        self.day_filter.addItem('Any Day', None)
+        self.day_filter.currentIndexChanged.connect(self.filter_employees)
+        controls.addWidget(self.day_filter)
+        
+        self.shift_filter = QComboBox()
+        self.load_shift_types()
+        self.shift_filter.currentIndexChanged.connect(self.filter_employees)
+        controls.addWidget(self.shift_filter)
+        
         controls.addStretch()
         
+        swap_btn = QPushButton('Find Replacement')
+        swap_btn.clicked.connect(self.find_replacement)
+        controls.addWidget(swap_btn)
+        
+        availability_btn = QPushButton('Edit Availability')
+        availability_btn.clicked.connect(self.edit_availability)
+        controls.addWidget(availability_btn)
+        
+        rules_btn = QPushButton('Check Labor Rules')
+        rules_btn.clicked.connect(self.check_rules)
+        controls.addWidget(rules_btn)
+        
         refresh_btn = QPushButton('Refresh')
         refresh_btn.clicked.connect(self.load_assignments)
         controls.addWidget(refresh_btn)
@@ -82,18 +115,24 @@ class SchedulerInterface(QWidget):
     def load_departments(self):
         departments = self.db_manager.get_departments()
         for dept in departments:
-            self.dept_filter.addItem(dept[1], dept[0])
+            self.dept_filter.addItem(dept.department_name, dept.department_id)
     
     def load_skills(self):
         skills = self.db_manager.get_skills()
         for skill in skills:
-            self.skill_filter.addItem(skill[1], skill[0])
+            self.skill_filter.addItem(skill.skill_name, skill.skill_id)
+    
+    def load_shift_types(self):
+        shifts = self.db_manager.get_shift_types()
+        for shift in shifts:
+            self.shift_filter.addItem(shift.shift_name, shift.shift_type_id)
     
     def load_employees(self):
         employees = self.db_manager.get_all_employees()
         self.all_employees = employees
         self.filter_employees()
     
+    @tracing.traced
     def filter_employees(self):
         # reload employees from database to get latest data
         self.all_employees = self.db_manager.get_all_employees()
@@ -101,35 +140,73 @@ class SchedulerInterface(QWidget):
         dept_id = self.dept_filter.currentData()
         skill_id = self.skill_filter.currentData()
         
+        # one vectorized pass over everyone's availability bits
+        available = None
+        day = self.day_filter.currentData()
+        if day is not None and self.availability is not None:
+            available = set(self.availability.employees(self.shift_filter.currentData(), day, skill_id, dept_id))
+        
         self.employee_list.clear()
         for emp in self.all_employees:
-            # emp: (employee_id, first_name, last_name, dept_name, job_title, emp_type, skill_name)
-            if dept_id and emp[3]:  # Filter by department
-                if emp[3] != self.dept_filter.currentText():
+            if available is not None and emp.employee_id not in available:
+                continue
+            
+            if dept_id and emp.department_name:  # Filter by department
+                if emp.department_name != self.dept_filter.currentText():
                     continue
             
-            if skill_id and emp[6]:  # Filter by skill
-                if emp[6] != self.skill_filter.currentText():
+            if skill_id and emp.skill_name:  # Filter by skill
+                if emp.skill_name != self.skill_filter.currentText():
                     continue
             
-            display_text = f"{emp[1]} {emp[2]} - {emp[6] or 'No Skill'}"
+            display_text = f"{emp.first_name} {emp.last_name} - {emp.skill_name or 'No Skill'}"
             item = self.employee_list.addItem(display_text)
             # Store employee_id in item data
-            self.employee_list.item(self.employee_list.count() - 1).setData(Qt.UserRole, emp[0])
+            self.employee_list.item(self.employee_list.count() - 1).setData(Qt.UserRole, emp.employee_id)
     
+    @tracing.traced
     def load_schedule(self, schedule_id):
         self.current_schedule_id = schedule_id
         
         # get schedule infos
         schedules = self.db_manager.get_weekly_schedules()
         for schedule in schedules:
-            if schedule[0] == schedule_id:
+            if schedule.schedule_id == schedule_id:
                 self.schedule_info = schedule
                 break
         
-        self.header.setText(f'Scheduler - Week {self.schedule_info[1]} to {self.schedule_info[2]}')
+        self.header.setText(f'Scheduler - Week {self.schedule_info.start_date} to {self.schedule_info.end_date}')
+        self.load_rules()
+        self.load_availability()
         self.load_assignments()
     
+    def load_availability(self):
+        start, end = self.schedule_info.start_date, self.schedule_info.end_date
+        try:
+            self.availability = availability.load(self.db_manager, start, end)
+        except RuntimeError as e:
+            self.availability = None
+            self.day_filter.setToolTip(str(e))
+        
+        filtered = self.day_filter.currentData() is not None
+        self.day_filter.blockSignals(True)
+        self.day_filter.clear()
+        self.day_filter.addItem('Any Day', None)
+        if self.availability is not None:
+            current = start
+            while current <= end:
+                self.day_filter.addItem(current.strftime('%a %Y-%m-%d'), current)
+                current += timedelta(days=1)
+        self.day_filter.blockSignals(False)
+        if filtered:
+            self.filter_employees()
+    
+    def load_rules(self):
+        # rolling per-employee state for the week, so each assignment is checked without a query
+        self.rules = labor_rules.load(self.db_manager, self.schedule_info.start_date, self.schedule_info.end_date)
+        self.swaps = None  # rebuilt on the next Find Replacement
+    
+    @tracing.traced
     def load_assignments(self):
         if not self.current_schedule_id:
             return
@@ -137,19 +214,21 @@ class SchedulerInterface(QWidget):
         assignments = self.db_manager.get_shift_assignments(self.current_schedule_id)
         self.assignments_table.setRowCount(len(assignments))
         
-        for row, assignment in enumerate(assignments):
-            # assignment: (assignment_id, assigned_date, first_name, last_name, shift_name, start_time, end_time)
-            self.assignments_table.setItem(row, 0, QTableWidgetItem(str(assignment[1])))
-            self.assignments_table.setItem(row, 1, QTableWidgetItem(f"{assignment[2]} {assignment[3]}"))
-            self.assignments_table.setItem(row, 2, QTableWidgetItem(assignment[4]))
-            self.assignments_table.setItem(row, 3, QTableWidgetItem(str(assignment[5])))
-            self.assignments_table.setItem(row, 4, QTableWidgetItem(str(assignment[6])))
-            
-            # delete button
-            delete_btn = QPushButton('Delete')
-            delete_btn.setStyleSheet('background-color: #e74c3c; color: white; padding: 5px;')
-            delete_btn.clicked.connect(lambda checked, aid=assignment[0]: self.delete_assignment(aid))
-            self.assignments_table.setCellWidget(row, 5, delete_btn)
+        with tracing.span('populate assignments table', rows=len(assignments)):
+            for row, assignment in enumerate(assignments):
+                date_item = QTableWidgetItem(str(assignment.assigned_date))
+                date_item.setData(Qt.UserRole, assignment.assignment_id)
+                self.assignments_table.setItem(row, 0, date_item)
+                self.assignments_table.setItem(row, 1, QTableWidgetItem(f"{assignment.first_name} {assignment.last_name}"))
+                self.assignments_table.setItem(row, 2, QTableWidgetItem(assignment.shift_name))
+                self.assignments_table.setItem(row, 3, QTableWidgetItem(str(assignment.start_time)))
+                self.assignments_table.setItem(row, 4, QTableWidgetItem(str(assignment.end_time)))
+                
+                # delete button
+                delete_btn = QPushButton('Delete')
+                delete_btn.setStyleSheet('background-color: #e74c3c; color: white; padding: 5px;')
+                delete_btn.clicked.connect(lambda checked, aid=assignment.assignment_id: self.delete_assignment(aid))
+                self.assignments_table.setCellWidget(row, 5, delete_btn)
     
     def assign_employee(self, item):
         if not self.current_schedule_id:
@@ -164,10 +243,26 @@ class SchedulerInterface(QWidget):
             date = dialog.selected_date
             shift_type_id = dialog.selected_shift_id
             
-            if self.db_manager.add_shift_assignment(self.current_schedule_id, employee_id, 
-                                                    shift_type_id, date):
+            violations = self.rules.check(employee_id, shift_type_id, date) if self.rules else []
+            if violations:
+                reply = QMessageBox.question(self, 'Labor Rules',
+                                             'This assignment breaks labor rules:\n' +
+                                             '\n'.join(f'- {v.message}' for v in violations) +
+                                             '\n\nAssign anyway?',
+                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if reply != QMessageBox.Yes:
+                    return
+            
+            with tracing.span('SchedulerInterface.assign_employee'):
+                assigned = self.db_manager.add_shift_assignment(self.current_schedule_id, employee_id,
+                                                                shift_type_id, date)
+                if assigned:
+                    if self.rules:
+                        self.rules.add(employee_id, shift_type_id, date)
+                    self.swaps = None
+                    self.load_assignments()
+            if assigned:
                 QMessageBox.information(self, 'Success', 'Shift assigned successfully!')
-                self.load_assignments()
             else:
                 QMessageBox.warning(self, 'Error', 'Failed to assign shift')
     
@@ -176,11 +271,109 @@ class SchedulerInterface(QWidget):
                                      'Are you sure you want to delete this assignment?',
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            if self.db_manager.delete_shift_assignment(assignment_id):
+            with tracing.span('SchedulerInterface.delete_assignment'):
+                deleted = self.db_manager.delete_shift_assignment(assignment_id)
+                if deleted:
+                    self.load_rules()
+                    self.load_assignments()
+            if deleted:
                 QMessageBox.information(self, 'Success', 'Assignment deleted!')
-                self.load_assignments()
             else:
                 QMessageBox.warning(self, 'Error', 'Failed to delete assignment')
+    
+    def find_replacement(self):
+        # for the assignment selected in the table
+        row = self.assignments_table.currentRow()
+        item = self.assignments_table.item(row, 0) if row >= 0 else None
+        if item is None:
+            QMessageBox.warning(self, 'Error', 'Select an assignment first')
+            return
+        
+        assignment_id = item.data(Qt.UserRole)
+        slot = self.db_manager.get_assignment_slot(assignment_id)
+        if slot is None:
+            QMessageBox.warning(self, 'Error', 'Assignment not found')
+            return
+        
+        # eligibility sets for the whole week, kept until the schedule changes
+        if self.swaps is None:
+            try:
+                with tracing.span('SchedulerInterface.find_replacement'):
+                    self.swaps = shift_swap.load(self.db_manager, self.schedule_info.start_date,
+                                                 self.schedule_info.end_date)
+            except RuntimeError as e:
+                QMessageBox.warning(self, 'Error', str(e))
+                return
+            if self.swaps is None:
+                QMessageBox.warning(self, 'Error', 'Failed to load availability')
+                return
+        
+        dialog = ReplacementDialog(self.swaps, slot, self.dept_filter.currentData())
+        if dialog.exec_() == QDialog.Accepted:
+            with tracing.span('SchedulerInterface.reassign_shift'):
+                reassigned = self.db_manager.reassign_shift(assignment_id, dialog.selected_employee_id)
+                if reassigned:
+                    self.load_rules()
+                    self.load_assignments()
+            if reassigned:
+                QMessageBox.information(self, 'Success', 'Shift reassigned!')
+            else:
+                QMessageBox.warning(self, 'Error', 'Failed to reassign shift. The employee may already work that day.')
+    
+    def edit_availability(self):
+        # for the employee selected in the list; date exceptions only within the loaded week
+        item = self.employee_list.currentItem()
+        if item is None:
+            QMessageBox.warning(self, 'Error', 'Select an employee first')
+            return
+        
+        days = []
+        if self.schedule_info:
+            current = self.schedule_info.start_date
+            while current <= self.schedule_info.end_date:
+                days.append(current)
+                current += timedelta(days=1)
+        
+        name = item.text().rsplit(' - ', 1)[0]
+        dialog = AvailabilityDialog(self.db_manager, item.data(Qt.UserRole), name, days)
+        if dialog.exec_() == QDialog.Accepted:
+            QMessageBox.information(self, 'Success', 'Availability saved!')
+            if self.schedule_info:
+                self.swaps = None
+                self.load_availability()
+    
+    def check_rules(self):
+        if not self.current_schedule_id:
+            QMessageBox.warning(self, 'Error', 'No schedule selected')
+            return
+        
+        # re-check the whole week in one pass, e.g. after assignments made elsewhere
+        start, end = self.schedule_info.start_date, self.schedule_info.end_date
+        first, last = labor_rules.window(start, end)
+        try:
+            with tracing.span('SchedulerInterface.check_rules'):
+                assignments = self.db_manager.get_assignment_slots(first, last)
+                shift_types = self.db_manager.get_shift_types()
+                if assignments is None or shift_types is None:
+                    violations = None
+                else:
+                    violations = labor_rules.recheck(assignments, shift_types)
+        except RuntimeError as e:
+            QMessageBox.warning(self, 'Error', str(e))
+            return
+        if violations is None:
+            QMessageBox.warning(self, 'Error', 'Failed to load assignments')
+            return
+        
+        violations = [v for v in violations if start <= v.assigned_date <= end]
+        if not violations:
+            QMessageBox.information(self, 'Labor Rules', 'No labor rule violations this week.')
+            return
+        names = {emp.employee_id: f"{emp.first_name} {emp.last_name}" for emp in self.all_employees}
+        lines = [f"{v.assigned_date} {names.get(v.employee_id, v.employee_id)}: {v.message}" for v in violations[:30]]
+        if len(violations) > 30:
+            lines.append(f'... and {len(violations) - 30} more')
+        QMessageBox.warning(self, 'Labor Rules', f'{len(violations)} violation(s) this week:\n' + '\n'.join(lines))
 
 class AssignmentDialog(QDialog):
     def __init__(self, db_manager, schedule_info):
@@ -200,8 +393,8 @@ class AssignmentDialog(QDialog):
         self.date_combo = QComboBox()
         
         # Add dates from schedule
-        start = self.schedule_info[1]
-        end = self.schedule_info[2]
+        start = self.schedule_info.start_date
+        end = self.schedule_info.end_date
         current = start
         while current <= end:
             self.date_combo.addItem(str(current), current)
@@ -215,7 +408,7 @@ class AssignmentDialog(QDialog):
         
         shifts = self.db_manager.get_shift_types()
         for shift in shifts:
-            self.shift_combo.addItem(f"{shift[1]} ({shift[2]} - {shift[3]})", shift[0])
+            self.shift_combo.addItem(f"{shift.shift_name} ({shift.start_time} - {shift.end_time})", shift.shift_type_id)
         
         layout.addWidget(self.shift_combo)
         
@@ -230,4 +423,195 @@ class AssignmentDialog(QDialog):
     def accept(self):
         self.selected_date = self.date_combo.currentData()
         self.selected_shift_id = self.shift_combo.currentData()
-        super().accept()
\ No newline at end of file
+        super().accept()
+
+class ReplacementDialog(QDialog):
+    def __init__(self, engine, slot, department_id=None):
+        super().__init__()
+        self.engine = engine
+        self.slot = slot
+        self.department_id = department_id
+        self.selected_employee_id = None
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle('Find Replacement')
+        layout = QVBoxLayout()
+        
+        current = self.engine.profiles.get(self.slot.employee_id)
+        name = f"{current.first_name} {current.last_name}" if current else 'Unknown'
+        shift = self.engine.rules.names.get(self.slot.shift_type_id, 'Shift')
+        layout.addWidget(QLabel(f"{shift} on {self.slot.assigned_date}, assigned to {name}"))
+        
+        self.same_skill = QCheckBox('Same skill only')
+        self.same_skill.setChecked(True)
+        self.same_skill.toggled.connect(self.load_candidates)
+        layout.addWidget(self.same_skill)
+        
+        layout.addWidget(QLabel('Available employees (fewest hours this week first):'))
+        self.candidate_list = QListWidget()
+        self.candidate_list.itemDoubleClicked.connect(self.accept)
+        layout.addWidget(self.candidate_list)
+        
+        #buttons
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.button(QDialogButtonBox.Ok).setText('Reassign')
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        
+        self.setLayout(layout)
+        self.load_candidates()
+    
+    @tracing.traced
+    def load_candidates(self):
+        self.candidate_list.clear()
+        candidates = self.engine.candidates(self.slot.employee_id, self.slot.shift_type_id, self.slot.assigned_date,
+                                            self.department_id, self.same_skill.isChecked())
+        for candidate in candidates:
+            item = QListWidgetItem(f"{candidate.first_name} {candidate.last_name} - {candidate.week_hours:g}h this week")
+            item.setData(Qt.UserRole, candidate.employee_id)
+            self.candidate_list.addItem(item)
+        if not candidates:
+            item = QListWidgetItem('No eligible employees')
+            item.setFlags(Qt.NoItemFlags)
+            self.candidate_list.addItem(item)
+    
+    def accept(self):
+        item = self.candidate_list.currentItem()
+        if item is None or item.data(Qt.UserRole) is None:
+            QMessageBox.warning(self, 'Error', 'Select an employee')
+            return
+        self.selected_employee_id = item.data(Qt.UserRole)
+        super().accept()
+
+class AvailabilityDialog(QDialog):
+    def __init__(self, db_manager, employee_id, name, days):
+        # days: the dates an exception can be set for
+        super().__init__()
+        self.db_manager = db_manager
+        self.employee_id = employee_id
+        self.name = name
+        self.days = days
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle(f'Availability - {self.name}')
+        layout = QVBoxLayout()
+        
+        # weekly slots; an employee without a mask row can work any time
+        layout.addWidget(QLabel('Every week (checked = can work):'))
+        self.week_table = self.slot_table(availability.WEEKDAYS)
+        masks = self.db_manager.get_availability_masks(self.employee_id) or []
+        self.mask = masks[0].mask if masks else availability.ALL_WEEK
+        for weekday in range(7):
+            self.show_bits(self.week_table, weekday, self.mask >> weekday * AVAILABILITY_SLOTS)
+        layout.addWidget(self.week_table)
+        
+        # one-off exceptions; pending holds the edited override per date, None for none
+        self.loaded = {}
+        if self.days:
+            overrides = self.db_manager.get_availability_overrides(self.days[0], self.days[-1],
+                                                                   self.employee_id) or []
+            self.loaded = {row.override_date: row.mask for row in overrides}
+        self.pending = dict(self.loaded)
+        
+        exception = QHBoxLayout()
+        exception.addWidget(QLabel('Exception on:'))
+        self.day_combo = QComboBox()
+        for day in self.days:
+            self.day_combo.addItem(day.strftime('%a %Y-%m-%d'), day)
+        self.day_combo.currentIndexChanged.connect(self.show_override)
+        exception.addWidget(self.day_combo)
+        self.override_check = QCheckBox('Differs from every week')
+        self.override_check.toggled.connect(self.toggle_override)
+        exception.addWidget(self.override_check)
+        exception.addStretch()
+        layout.addLayout(exception)
+        
+        self.day_table = self.slot_table(['Available'])
+        self.day_table.setFixedHeight(self.day_table.verticalHeader().length() +
+                                      self.day_table.horizontalHeader().height() + 4)
+        self.day_table.itemChanged.connect(self.keep_override)
+        layout.addWidget(self.day_table)
+        
+        if not self.days:
+            self.day_combo.setEnabled(False)
+            self.override_check.setEnabled(False)
+            self.day_table.setEnabled(False)
+            layout.addWidget(QLabel('Load a schedule to set exceptions for its week.'))
+        
+        #buttons
+        buttons = QDialogButtonBox(QDialogButtonBox.Save | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        
+        self.setLayout(layout)
+        self.show_override()
+    
+    def slot_table(self, labels):
+        table = QTableWidget(len(labels), AVAILABILITY_SLOTS)
+        table.setVerticalHeaderLabels(labels)
+        table.setHorizontalHeaderLabels([availability.slot_label(slot) for slot in range(AVAILABILITY_SLOTS)])
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for row in range(len(labels)):
+            for slot in range(AVAILABILITY_SLOTS):
+                item = QTableWidgetItem()
+                item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+                table.setItem(row, slot, item)
+        return table
+    
+    def show_bits(self, table, row, bits):
+        table.blockSignals(True)
+        for slot in range(AVAILABILITY_SLOTS):
+            table.item(row, slot).setCheckState(Qt.Checked if bits >> slot & 1 else Qt.Unchecked)
+        table.blockSignals(False)
+    
+    def row_bits(self, table, row):
+        return sum(1 << slot for slot in range(AVAILABILITY_SLOTS)
+                   if table.item(row, slot).checkState() == Qt.Checked)
+    
+    def week_mask(self):
+        return sum(self.row_bits(self.week_table, weekday) << weekday * AVAILABILITY_SLOTS for weekday in range(7))
+    
+    def show_override(self):
+        # the selected date's exception, or its weekday's slots greyed out when it has none
+        day = self.day_combo.currentData()
+        if day is None:
+            return
+        bits = self.pending.get(day)
+        self.override_check.blockSignals(True)
+        self.override_check.setChecked(bits is not None)
+        self.override_check.blockSignals(False)
+        self.day_table.setEnabled(bits is not None)
+        if bits is None:
+            bits = self.row_bits(self.week_table, day.weekday())
+        self.show_bits(self.day_table, 0, bits)
+    
+    def toggle_override(self, checked):
+        day = self.day_combo.currentData()
+        if checked:
+            self.pending[day] = self.row_bits(self.day_table, 0)
+        else:
+            self.pending.pop(day, None)
+        self.show_override()
+    
+    def keep_override(self, item):
+        day = self.day_combo.currentData()
+        if day is not None and self.override_check.isChecked():
+            self.pending[day] = self.row_bits(self.day_table, 0)
+    
+    def accept(self):
+        mask = self.week_mask()
+        saved = True
+        if mask != self.mask:
+            saved = self.db_manager.set_availability_mask(self.employee_id, mask)
+        for day in sorted(set(self.loaded) | set(self.pending)):
+            if saved and self.pending.get(day) != self.loaded.get(day):
+                # None deletes the exception
+                saved = self.db_manager.set_availability_override(self.employee_id, day, self.pending.get(day))
+        if not saved:
+            QMessageBox.warning(self, 'Error', 'Failed to save availability')
+            return
+        super().accept()
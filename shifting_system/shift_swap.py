@@ -0,0 +1,81 @@
+"""Replacement candidates for a shift swap.
+
+SwapEngine loads a schedule week once and keeps one eligibility set per day:
+everyone not on approved leave and not already assigned that day. A
+candidates() call intersects the day's set with the employees the
+availability index (shifting_system/availability.py) says can work that
+shift, with the outgoing employee's skill and, optionally, a department,
+then runs the labor_rules.RuleEngine rest, overlap, weekly-hours and
+consecutive-days checks on the survivors only.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from shifting_system import availability as availability_index
+from shifting_system import labor_rules
+
+Candidate = namedtuple('Candidate', 'employee_id first_name last_name week_hours')
+
+
+class SwapEngine:
+    def __init__(self, profiles, shift_types, availability, leave, assignments, start_date, end_date,
+                 limits=labor_rules.DEFAULT_LIMITS):
+        # profiles: EmployeeProfile rows; availability: an AvailabilityIndex; leave:
+        # CoverageLeave rows for the week; assignments: AssignmentSlot rows covering
+        # labor_rules.window() of the week
+        self.start_date = start_date
+        self.end_date = end_date
+        self.profiles = {p.employee_id: p for p in profiles}
+        self.availability = availability
+
+        everyone = frozenset(self.profiles)
+        self.free = {}  # date -> employees not on leave or already working that day
+        day = start_date
+        while day <= end_date:
+            self.free[day] = set(everyone)
+            day += timedelta(days=1)
+        for row in leave:
+            for offset in range(row.first_day, row.last_day + 1):
+                free = self.free.get(start_date + timedelta(days=offset))
+                if free is not None:
+                    free.discard(row.employee_id)
+        for row in assignments:
+            free = self.free.get(row.assigned_date)
+            if free is not None:
+                free.discard(row.employee_id)
+
+        self.rules = labor_rules.RuleEngine(shift_types, limits).load(assignments)
+
+    def candidates(self, employee_id, shift_type_id, day, department_id=None, same_skill=True):
+        """Employees who can take over the shift, fewest hours that week first."""
+        free = self.free.get(day)
+        if not free:
+            return []
+        profile = self.profiles.get(employee_id)
+        skill_id = profile.skill_id if same_skill and profile is not None else None
+        pool = free.intersection(self.availability.employees(shift_type_id, day, skill_id, department_id))
+
+        found = []
+        for candidate in pool:
+            if candidate == employee_id or self.rules.check(candidate, shift_type_id, day):
+                continue
+            p = self.profiles[candidate]
+            found.append(Candidate(candidate, p.first_name, p.last_name,
+                                   self.rules.week_minutes(candidate, day) / 60))
+        found.sort(key=lambda c: (c.week_hours, c.last_name, c.first_name))
+        return found
+
+
+def load(db_manager, start_date, end_date, limits=labor_rules.DEFAULT_LIMITS):
+    # SwapEngine for the week; None on error, RuntimeError without numpy
+    first, last = labor_rules.window(start_date, end_date, limits)
+    profiles = db_manager.get_employee_profiles()
+    shift_types = db_manager.get_shift_types()
+    masks = db_manager.get_availability_masks()
+    overrides = db_manager.get_availability_overrides(start_date, end_date + timedelta(days=1))
+    leave = db_manager.get_coverage_leave(start_date, end_date)
+    assignments = db_manager.get_assignment_slots(first, last)
+    if any(rows is None for rows in (profiles, shift_types, masks, overrides, leave, assignments)):
+        return None
+    availability = availability_index.AvailabilityIndex(profiles, shift_types, masks, overrides)
+    return SwapEngine(profiles, shift_types, availability, leave, assignments, start_date, end_date, limits)
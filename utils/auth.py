@@ -1,13 +1,17 @@
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QMessageBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 
 class LoginDialog(QDialog):
+    # emitted from the hashing worker thread, delivered on the GUI thread
+    login_finished = pyqtSignal(object)
+    
     def __init__(self, db_manager):
         super().__init__()
         self.db_manager = db_manager
         self.user_data = None
+        self.login_finished.connect(self.finish_login)
         self.init_ui()
     
     def init_ui(self):
@@ -61,6 +65,9 @@ class LoginDialog(QDialog):
         self.setLayout(layout)
     
     def login(self):
+        if not self.login_btn.isEnabled():  # verification already in flight
+            return
+        
         username = self.username_input.text().strip()
         password = self.password_input.text().strip()
         
@@ -68,15 +75,31 @@ class LoginDialog(QDialog):
             QMessageBox.warning(self, 'Error', 'Please enter both username and password')
             return
         
-        user = self.db_manager.authenticate_user(username, password)
+        # the lookup is a single indexed seek; the slow hash check runs in the worker pool
+        self.login_btn.setEnabled(False)
+        self.login_btn.setText('Signing in...')
+        future = self.db_manager.submit_login(username, password)
+        future.add_done_callback(lambda f: self.login_finished.emit(f))
+    
+    def finish_login(self, future):
+        self.login_btn.setEnabled(True)
+        self.login_btn.setText('Login')
+        
+        try:
+            user, new_hash = future.result()
+        except Exception as e:
+            print(f"Login error: {e}")
+            user, new_hash = None, None
         
         if user:
+            if new_hash:
+                self.db_manager.update_password_hash(user.user_id, new_hash)
             self.user_data = {
-                'user_id': user[0],
-                'employee_id': user[1],
-                'is_admin': bool(user[2]),
-                'first_name': user[3],
-                'last_name': user[4]
+                'user_id': user.user_id,
+                'employee_id': user.employee_id,
+                'is_admin': bool(user.is_admin),
+                'first_name': user.first_name,
+                'last_name': user.last_name
             }
             self.accept()
         else:
@@ -0,0 +1,253 @@
+"""Opt-in Prometheus metrics for the client and the API service.
+
+    python main.py --metrics-port 9108
+    python main.py --metrics-file /var/lib/node_exporter/textfile/hr.prom --metrics-interval 15
+    python -m service.api_server --metrics-port 9108
+
+Counts come from the DatabaseManager call hooks (database/instrumentation.py):
+calls, failures and a latency histogram per method, connection state, connects
+and reconnects, and punches by type and result. Other components add gauges
+or counters with register(), e.g. the API service's response cache and pool.
+The connection series describe the client's single connection; the service
+runs many pooled ones and leaves them out (see its pool_connections gauge).
+
+The exporter listens on 127.0.0.1 unless given another host.
+
+The text exposition format is served on /metrics from a background thread,
+rewritten to a file every interval for node_exporter's textfile collector, or
+both. The hook itself only takes a lock and bumps a few integers.
+"""
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from database import instrumentation
+from database import records
+
+# seconds; Prometheus' default histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PUNCHES = {'clock_in', 'clock_out', 'start_break', 'end_break'}
+PUNCH_STATUS = {value: name[len('PUNCH_'):].lower()
+                for name, value in vars(records).items() if name.startswith('PUNCH_')}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+class _MethodStats:
+    __slots__ = ('calls', 'failures', 'seconds', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # per bucket, not cumulative; the last is +Inf
+
+
+class Metrics:
+    def __init__(self, prefix='hr', connections=True):
+        self.prefix = prefix
+        self.track_connections = connections
+        self.lock = threading.Lock()
+        self.methods = {}
+        self.connected = 0
+        self.connects = {'ok': 0, 'failed': 0}
+        self.reconnects = 0
+        self.punches = {}  # (punch, status) -> count
+        self.collectors = []  # (name, kind, help, func), see register()
+        self.exporter = None
+
+    def on_call(self, call):
+        # instrumentation listener; nested calls (execute_query inside get_...) are part
+        # of the outer call's time and are not counted again
+        if call.depth:
+            return
+        name = call.name
+        failed = call.error is not None or call.result is False
+        if name in ('connect', 'disconnect') and not self.track_connections:
+            return
+        with self.lock:
+            if name == 'connect':
+                ok = call.error is None and bool(call.result)
+                if ok and self.connects['ok']:
+                    self.reconnects += 1
+                self.connects['ok' if ok else 'failed'] += 1
+                self.connected = int(ok)
+                return
+            if name == 'disconnect':
+                self.connected = 0
+                return
+            stats = self.methods.get(name)
+            if stats is None:
+                stats = self.methods[name] = _MethodStats()
+            stats.calls += 1
+            stats.failures += failed
+            stats.seconds += call.seconds
+            stats.buckets[bisect.bisect_left(BUCKETS, call.seconds)] += 1
+            if name in PUNCHES:
+                status = 'error' if call.result is None else PUNCH_STATUS.get(call.result, str(call.result))
+                key = (name, status)
+                self.punches[key] = self.punches.get(key, 0) + 1
+
+    def register(self, name, kind, help, func):
+        """Adds a metric read at export time; kind is 'gauge' or 'counter'.
+
+        func returns a number, or a dict mapping tuples of (label, value) pairs
+        to numbers.
+        """
+        self.collectors.append((name, kind, help, func))
+
+    def render(self):
+        p = self.prefix
+        with self.lock:
+            methods = {name: (s.calls, s.failures, s.seconds, list(s.buckets)) for name, s in self.methods.items()}
+            connected, connects, reconnects = self.connected, dict(self.connects), self.reconnects
+            punches = dict(self.punches)
+
+        lines = []
+
+        def family(name, kind, help):
+            lines.append(f'# HELP {p}_{name} {help}')
+            lines.append(f'# TYPE {p}_{name} {kind}')
+
+        def sample(name, value, **labels):
+            lines.append(f'{p}_{name}{_labels(labels)} {_number(value)}')
+
+        family('db_calls_total', 'counter', 'DatabaseManager calls by method')
+        for method, (calls, _, _, _) in sorted(methods.items()):
+            sample('db_calls_total', calls, method=method)
+        family('db_call_failures_total', 'counter', 'DatabaseManager calls that raised or returned False')
+        for method, (_, failures, _, _) in sorted(methods.items()):
+            sample('db_call_failures_total', failures, method=method)
+        family('db_call_duration_seconds', 'histogram', 'DatabaseManager call latency by method')
+        for method, (calls, _, seconds, buckets) in sorted(methods.items()):
+            total = 0
+            for bound, count in zip(BUCKETS, buckets):
+                total += count
+                sample('db_call_duration_seconds_bucket', total, method=method, le=_number(float(bound)))
+            sample('db_call_duration_seconds_bucket', calls, method=method, le='+Inf')
+            sample('db_call_duration_seconds_sum', float(seconds), method=method)
+            sample('db_call_duration_seconds_count', calls, method=method)
+
+        if self.track_connections:
+            family('db_connected', 'gauge', '1 while the database connection is open')
+            sample('db_connected', connected)
+            family('db_connects_total', 'counter', 'Connection attempts by result')
+            for result, count in connects.items():
+                sample('db_connects_total', count, result=result)
+            family('db_reconnects_total', 'counter', 'Successful connections after the first')
+            sample('db_reconnects_total', reconnects)
+
+        family('punches_total', 'counter', 'Clock and break punches by type and result')
+        for (punch, status), count in sorted(punches.items()):
+            sample('punches_total', count, punch=punch, status=status)
+
+        for name, kind, help, func in self.collectors:
+            try:
+                value = func()
+            except Exception as e:
+                print(f"Metrics collector error ({name}): {e}")
+                continue
+            family(name, kind, help)
+            if isinstance(value, dict):
+                for labels, number in value.items():
+                    sample(name, number, **dict(labels))
+            else:
+                sample(name, value)
+        return '\n'.join(lines) + '\n'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would flood the console
+
+
+class MetricsExporter:
+    """Serves metrics over HTTP and/or rewrites them to a file every interval, on daemon threads."""
+
+    def __init__(self, metrics, port=None, path=None, interval=15, host='127.0.0.1'):
+        self.metrics = metrics
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.host = host
+        self.server = None
+        self.stopped = threading.Event()
+        self.dumper = None
+
+    def start(self):
+        if self.port is not None:
+            try:
+                handler = type('MetricsHandler', (_Handler,), {'metrics': self.metrics})
+                self.server = ThreadingHTTPServer((self.host, self.port), handler)
+            except OSError as e:
+                print(f"Metrics exporter error: {e}")
+                return False
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True).start()
+        if self.path:
+            self.dumper = threading.Thread(target=self.dump_forever, name='metrics-dump', daemon=True)
+            self.dumper.start()
+        return True
+
+    def dump_forever(self):
+        self.dump()
+        while not self.stopped.wait(self.interval):
+            self.dump()
+        self.dump()  # the final values
+
+    def dump(self):
+        # written beside the target and renamed, so a collector never reads half a file
+        temp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(temp, 'w') as f:
+                f.write(self.metrics.render())
+            os.replace(temp, self.path)
+        except OSError as e:
+            print(f"Metrics dump error: {e}")
+
+    def stop(self):
+        self.stopped.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.dumper is not None:
+            self.dumper.join()
+
+
+def start(port=None, path=None, interval=15, db_class=None, host='127.0.0.1', connections=True):
+    """Hooks db_class (DatabaseManager by default) and starts exporting; returns the Metrics or None.
+
+    connections=False leaves out the connection series, for processes with many connections.
+    """
+    metrics = Metrics(connections=connections)
+    exporter = MetricsExporter(metrics, port, path, interval, host)
+    if not exporter.start():
+        return None
+    instrumentation.add_listener(metrics.on_call, db_class)
+    metrics.exporter = exporter
+    return metrics
@@ -0,0 +1,81 @@
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+
+# stored format: pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>
+ALGORITHM = 'pbkdf2_sha256'
+DEFAULT_ITERATIONS = int(os.environ.get('HR_PASSWORD_ITERATIONS', 200000))
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def hash_password(password, iterations=DEFAULT_ITERATIONS, salt=None):
+    if salt is None:
+        salt = secrets.token_bytes(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, HASH_BYTES)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_hashed(stored):
+    return bool(stored) and stored.startswith(ALGORITHM + '$')
+
+
+def verify_password(password, stored):
+    if not stored:
+        return False
+    if not is_hashed(stored):
+        # legacy plaintext row, still accepted until upgrade_password_hashes() runs
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    try:
+        _, iterations, salt, expected = stored.split('$')
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'),
+                                     bytes.fromhex(salt), int(iterations), len(expected) // 2)
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+def needs_rehash(stored, iterations=DEFAULT_ITERATIONS):
+    if not is_hashed(stored):
+        return True
+    try:
+        return int(stored.split('$')[1]) != iterations
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasher:
+    """Runs PBKDF2 in a worker pool; hashlib releases the GIL while hashing."""
+
+    def __init__(self, iterations=DEFAULT_ITERATIONS, workers=None):
+        self.iterations = iterations
+        self.workers = workers or os.cpu_count() or 4
+        self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                           thread_name_prefix='password-hasher')
+        # verified against when the username does not exist so timing does not leak it
+        self.dummy_hash = hash_password(secrets.token_hex(8), iterations)
+
+    def hash(self, password):
+        return hash_password(password, self.iterations)
+
+    def hash_many(self, passwords):
+        return list(self.executor.map(self.hash, passwords))
+
+    def verify(self, password, stored):
+        return verify_password(password, stored or self.dummy_hash) and stored is not None
+
+    def verify_and_rehash(self, password, stored):
+        # returns (ok, new_hash) where new_hash is set when the stored value is outdated
+        if not self.verify(password, stored):
+            return False, None
+        if needs_rehash(stored, self.iterations):
+            return True, self.hash(password)
+        return True, None
+
+    def submit_verify(self, password, stored):
+        return self.executor.submit(self.verify_and_rehash, password, stored)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
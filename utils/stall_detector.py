@@ -0,0 +1,112 @@
+"""Opt-in watchdog for the Qt event loop.
+
+    python main.py --stall-log stalls.jsonl --stall-threshold 50
+
+A QTimer beats on the UI thread every few milliseconds; a beat that arrives
+more than the threshold late means the event loop was blocked for that long.
+While the UI thread is blocked, a watchdog thread samples its Python stack and
+the DatabaseManager calls it has in flight (database/instrumentation.py).
+When the loop recovers, one JSON line per stall is appended to the log with
+the duration, the active screen, any modal dialog and the samples.
+"""
+import json
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from database import instrumentation
+
+MAX_SAMPLES = 20
+MAX_FRAMES = 30
+
+
+class StallDetector(QObject):
+    def __init__(self, path, threshold_ms=50, interval_ms=10, screen=None, db_class=None):
+        super().__init__()
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.screen = screen      # callable returning the active screen's name
+        self.db_class = db_class  # DatabaseManager class to instrument, if any
+        self.ui_thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.samples = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.watchdog = threading.Thread(target=self.watch, name='stall-watchdog', daemon=True)
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.beat)
+
+    def start(self):
+        if self.db_class is not None:
+            instrumentation.instrument(self.db_class)
+        self.last_beat = time.perf_counter()
+        self.timer.start()
+        self.watchdog.start()
+
+    def stop(self):
+        self.timer.stop()
+        self.stopped.set()
+
+    def beat(self):
+        # UI thread: how late is this beat?
+        now = time.perf_counter()
+        late = now - self.last_beat - self.interval
+        self.last_beat = now
+        with self.lock:
+            samples, self.samples = self.samples, []
+        if late >= self.threshold:
+            self.record(late, samples)
+
+    def watch(self):
+        # watchdog thread: sample the UI thread once per threshold while it is blocked
+        next_sample = None
+        while not self.stopped.wait(self.threshold / 4):
+            beat = self.last_beat
+            blocked = time.perf_counter() - beat
+            if blocked < self.threshold:
+                next_sample = None
+                continue
+            if next_sample is not None and next_sample[0] == beat and blocked < next_sample[1]:
+                continue
+            self.sample(blocked)
+            next_sample = (beat, blocked + self.threshold)
+
+    def sample(self, blocked):
+        frame = sys._current_frames().get(self.ui_thread_id)
+        if frame is None:
+            return
+        stack = [f"{entry.filename}:{entry.lineno} {entry.name}"
+                 for entry in traceback.extract_stack(frame)[-MAX_FRAMES:]]
+        with self.lock:
+            if len(self.samples) < MAX_SAMPLES:
+                self.samples.append({'after_ms': round(blocked * 1000, 1),
+                                     'db_calls': instrumentation.in_flight(self.ui_thread_id),
+                                     'stack': stack})
+
+    def record(self, late, samples):
+        modal = QApplication.activeModalWidget()
+        db_calls = []
+        for sample in samples:
+            for name in sample['db_calls']:
+                if name not in db_calls:
+                    db_calls.append(name)
+        entry = {
+            'at': datetime.now().isoformat(timespec='milliseconds'),
+            'duration_ms': round(late * 1000, 1),
+            'screen': self.screen() if self.screen else None,
+            'modal': f"{type(modal).__name__}: {modal.windowTitle()}" if modal else None,
+            'db_calls': db_calls,
+            'samples': samples,
+        }
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        except OSError as e:
+            print(f"Stall log error: {e}")
@@ -0,0 +1,209 @@
+"""Lightweight tracing from UI actions down to DatabaseManager calls.
+
+    python main.py --trace-file traces.jsonl
+
+UI slots decorated with @traced open a span (the root span of a trace when no
+other span is open); code inside can add child spans with `with span(...)`.
+Slots that wait on a confirmation or a modal dialog are not decorated; they
+open `with span('Class.method')` once the user has answered, so the span
+measures the work rather than the time spent reading the prompt.
+Every DatabaseManager call made while a span is open becomes a child span
+carrying the method name, row count and, for execute_query, the statement.
+When a root span ends its whole trace is appended to the file as one line of
+OTLP/JSON (an ExportTraceServiceRequest), which OpenTelemetry collectors and
+viewers such as Jaeger can import.
+
+Until configure() is called every hook is a no-op.
+"""
+import contextlib
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+from database import instrumentation
+
+SERVICE_NAME = 'hr-management'
+MAX_STATEMENT = 1000
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_tracer = None
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, trace_id, parent_id, name, start_ns, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error else {'code': STATUS_OK},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _rows(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None or result is False else 1
+
+
+class Tracer:
+    def __init__(self, path, service_name=SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # Call.started is perf_counter seconds; this turns it into wall-clock ns
+        self.offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def _state(self):
+        local = self.local
+        if not hasattr(local, 'open'):
+            local.open = []      # spans entered and not yet ended, outermost first
+            local.finished = []  # ended spans of the current trace
+            local.pending = []   # (depth, Span) of nested DB calls awaiting their parent
+        return local
+
+    def start(self, name, attributes=None):
+        state = self._state()
+        parent = state.open[-1] if state.open else None
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        span = Span(trace_id, parent.span_id if parent else None, name, time.time_ns(), attributes)
+        state.open.append(span)
+        return span
+
+    def end(self, span, error=None):
+        state = self._state()
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        state.open.remove(span)
+        state.finished.append(span)
+        if not state.open:
+            finished, state.finished, state.pending = state.finished, [], []
+            self.export(finished)
+
+    def on_call(self, call):
+        # instrumentation listener; only calls made inside a span are traced
+        state = self._state()
+        if not state.open:
+            return
+        parent = state.open[-1]
+        start_ns = int(call.started * 1e9) + self.offset_ns
+        span = Span(parent.trace_id, parent.span_id, f"DatabaseManager.{call.name}", start_ns,
+                    {'db.system': 'mssql', 'code.function': call.name, 'db.rows': _rows(call.result)})
+        span.end_ns = start_ns + int(call.seconds * 1e9)
+        if call.name == 'execute_query' and call.args:
+            span.attributes['db.statement'] = ' '.join(str(call.args[0]).split())[:MAX_STATEMENT]
+        if call.error is not None:
+            span.error = f"{type(call.error).__name__}: {call.error}"
+        elif call.result is False:
+            span.error = 'returned False'  # DatabaseManager writes report failure as False
+
+        # nested calls finish first; the next call one level up is their parent
+        children = [child for depth, child in state.pending if depth == call.depth + 1]
+        for child in children:
+            child.parent_id = span.span_id
+        state.pending = [(depth, child) for depth, child in state.pending if depth <= call.depth]
+        if call.depth:
+            state.pending.append((call.depth, span))
+        state.finished.extend(children)
+        if not call.depth:
+            state.finished.append(span)
+
+    def export(self, spans):
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': [s.to_otlp() for s in spans]}],
+        }]}
+        try:
+            with self.lock, open(self.path, 'a') as f:
+                f.write(json.dumps(request) + '\n')
+        except OSError as e:
+            print(f"Trace export error: {e}")
+
+
+def configure(path, db_class=None, service_name=SERVICE_NAME):
+    """Starts tracing to path; db_class is the DatabaseManager class whose calls become spans."""
+    global _tracer
+    _tracer = Tracer(path, service_name)
+    instrumentation.add_listener(_tracer.on_call, db_class)
+    return _tracer
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    # a child span (or a root span when none is open); yields the Span, or None when tracing is off
+    tracer = _tracer
+    if tracer is None:
+        yield None
+        return
+    current = tracer.start(name, attributes)
+    try:
+        yield current
+    except BaseException as e:
+        tracer.end(current, e)
+        raise
+    tracer.end(current)
+
+
+def set_attribute(key, value):
+    # on the innermost open span, if any
+    tracer = _tracer
+    if tracer is not None:
+        state = tracer._state()
+        if state.open:
+            state.open[-1].attributes[key] = value
+
+
+def traced(func):
+    """Decorator for UI slots: the call becomes a span named Class.method.
+
+    Extra arguments from Qt signals (such as clicked's `checked`) are dropped
+    when the slot does not take them.
+    """
+    code = func.__code__
+    limit = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if limit is not None and len(args) > limit:
+            args = args[:limit]
+        if _tracer is None:
+            return func(*args, **kwargs)
+        with span(func.__qualname__):
+            return func(*args, **kwargs)
+    return wrapper
+